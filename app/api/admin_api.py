@@ -0,0 +1,253 @@
+import logging
+
+from typing import Dict
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status
+)
+from fastapi.responses import PlainTextResponse
+
+from app.api.vm.api_response import response_fail_status_codes
+from app.conf.app_settings import server_settings
+from app.conf.dependencies import get_user_index_advisor
+from app.repository.index_advisor import IndexAdvisor
+from app.schema.admin_dto import (BlockingEvent, IndexAdvice, IndexAdviceApply, IndexBuildDTO, LoopLagReport,
+                                  ProfileReport, ProfileSummary)
+from app.schema.broadcast_dto import BroadcastCreate, BroadcastJobDTO
+from app.security import auth_handler
+from app.service.broadcast_service import broadcast_service
+from app.utils.loop_watchdog import loop_watchdog
+from app.utils.request_profiler import profile_store
+
+_resource = "admin"
+_path = f"{server_settings.CONTEXT_PATH}/{_resource}"
+_log = logging.getLogger(__name__)
+
+router = APIRouter(prefix=_path,
+                   tags=[_resource],
+                   dependencies=[Depends(auth_handler.get_admin_user)],
+                   responses=response_fail_status_codes
+                   )
+
+
+@router.get(
+    path="/profiles",
+    operation_id="list_profiles",
+    name="list_profiles",
+    summary="List recent request profiles",
+    response_model=list[ProfileSummary],
+    status_code=status.HTTP_200_OK
+)
+async def list_profiles() -> list[ProfileSummary]:
+    """
+    List the request profiles captured with the profiling header, newest first.
+
+    **return**: Profile summaries (wall, cpu and await time).
+    """
+    _log.debug(f"AdminApi Listing request profiles")
+    return [ProfileSummary(**report.model_dump(include=set(ProfileSummary.model_fields)))
+            for report in profile_store.list()]
+
+
+@router.get(
+    path="/profiles/{profile_id}",
+    operation_id="get_profile",
+    name="get_profile",
+    summary="Get request profile",
+    response_model=ProfileReport,
+    status_code=status.HTTP_200_OK
+)
+async def get_profile(profile_id: str) -> ProfileReport:
+    """
+    Get a request profile with the top functions and the call tree.
+
+    **profile_id**: Profile id from the X-Profile-Id response header, profiles are kept per worker process
+    and only found on the worker that returned the id.
+    **return**: Profile report.
+    """
+    _log.debug(f"AdminApi Retrieving request profile: {profile_id}")
+    report = profile_store.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return report
+
+
+@router.get(
+    path="/loop-lag",
+    operation_id="get_loop_lag",
+    name="get_loop_lag",
+    summary="Get event loop lag histogram",
+    response_model=LoopLagReport,
+    status_code=status.HTTP_200_OK
+)
+async def get_loop_lag() -> LoopLagReport:
+    """
+    Get the event loop lag histogram measured by the watchdog heartbeat.
+
+    **return**: Cumulative lag histogram in milliseconds and the number of blocking events.
+    """
+    _log.debug(f"AdminApi Retrieving event loop lag")
+    return loop_watchdog.report()
+
+
+@router.get(
+    path="/loop-lag/metrics",
+    operation_id="get_loop_lag_metrics",
+    name="get_loop_lag_metrics",
+    summary="Get event loop lag metrics in Prometheus format",
+    response_class=PlainTextResponse,
+    status_code=status.HTTP_200_OK
+)
+async def get_loop_lag_metrics() -> str:
+    """
+    Get the event loop lag histogram in the Prometheus text exposition format.
+    """
+    return loop_watchdog.prometheus()
+
+
+@router.get(
+    path="/loop-lag/blocking",
+    operation_id="list_blocking_events",
+    name="list_blocking_events",
+    summary="List recent blocking calls on the event loop",
+    response_model=list[BlockingEvent],
+    status_code=status.HTTP_200_OK
+)
+async def list_blocking_events() -> list[BlockingEvent]:
+    """
+    List the recent blocking events, newest first, with the stack of the code that blocked the event loop.
+    """
+    _log.debug(f"AdminApi Listing blocking events")
+    return loop_watchdog.blocking_events()
+
+
+@router.post(
+    path="/broadcasts",
+    operation_id="create_broadcast",
+    name="create_broadcast",
+    summary="Create email broadcast job",
+    response_model=BroadcastJobDTO,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def create_broadcast(broadcast: BroadcastCreate,
+                           token_data: Dict = Depends(auth_handler.get_admin_user)) -> BroadcastJobDTO:
+    """
+    Send the email template to every user matching the query. The job runs in the background,
+    poll the job to follow the progress.
+
+    **broadcast**: Template, template variables, user filter, concurrency and rate.
+    **return**: Created broadcast job.
+    """
+    _log.debug(f"AdminApi Creating broadcast job for template: {broadcast.template}")
+    job = await broadcast_service.create(broadcast, token_data.get("sub"))
+    return BroadcastJobDTO.model_validate(job)
+
+
+@router.get(
+    path="/broadcasts",
+    operation_id="list_broadcasts",
+    name="list_broadcasts",
+    summary="List email broadcast jobs",
+    response_model=list[BroadcastJobDTO],
+    status_code=status.HTTP_200_OK
+)
+async def list_broadcasts() -> list[BroadcastJobDTO]:
+    """
+    List the recent broadcast jobs, newest first.
+    """
+    _log.debug(f"AdminApi Listing broadcast jobs")
+    return [BroadcastJobDTO.model_validate(job) for job in await broadcast_service.find()]
+
+
+@router.get(
+    path="/broadcasts/{job_id}",
+    operation_id="get_broadcast",
+    name="get_broadcast",
+    summary="Get email broadcast job",
+    response_model=BroadcastJobDTO,
+    status_code=status.HTTP_200_OK
+)
+async def get_broadcast(job_id: str) -> BroadcastJobDTO:
+    """
+    Get the broadcast job progress.
+
+    **job_id**: Broadcast job id.
+    **return**: Broadcast job with the checkpointed counters.
+    """
+    _log.debug(f"AdminApi Retrieving broadcast job: {job_id}")
+    return BroadcastJobDTO.model_validate(await broadcast_service.retrieve(job_id))
+
+
+@router.post(
+    path="/broadcasts/{job_id}/cancel",
+    operation_id="cancel_broadcast",
+    name="cancel_broadcast",
+    summary="Cancel email broadcast job",
+    response_model=BroadcastJobDTO,
+    status_code=status.HTTP_200_OK
+)
+async def cancel_broadcast(job_id: str) -> BroadcastJobDTO:
+    """
+    Cancel a pending or running broadcast job, the messages sent up to the cancellation are not recalled.
+
+    **job_id**: Broadcast job id.
+    **return**: Cancelled broadcast job.
+    """
+    _log.debug(f"AdminApi Cancelling broadcast job: {job_id}")
+    return BroadcastJobDTO.model_validate(await broadcast_service.cancel(job_id))
+
+
+def _require_advisor(advisor: IndexAdvisor | None) -> IndexAdvisor:
+    if advisor is None:
+        raise HTTPException(status_code=404, detail="Index advisor is disabled")
+    return advisor
+
+
+@router.get(
+    path="/indexes/advice",
+    operation_id="get_index_advice",
+    name="get_index_advice",
+    summary="Get index advice for the user list filters",
+    response_model=IndexAdvice,
+    status_code=status.HTTP_200_OK
+)
+async def get_index_advice(limit: int = 50,
+                           advisor: IndexAdvisor | None = Depends(get_user_index_advisor)) -> IndexAdvice:
+    """
+    Get the filter shapes seen by the user list query, the compound indexes recommended for them in
+    equality, sort, range order and the usage of the existing indexes.
+
+    **limit**: Number of filter shapes, most expensive first.
+    **return**: Filter shapes, recommended indexes, existing indexes and index builds.
+    """
+    _log.debug(f"AdminApi Retrieving index advice")
+    advisor = _require_advisor(advisor)
+    return IndexAdvice(shapes=advisor.shapes(limit),
+                       recommendations=await advisor.recommend(),
+                       indexes=await advisor.index_usage(),
+                       builds=[IndexBuildDTO.model_validate(build, from_attributes=True)
+                               for build in advisor.builds.values()])
+
+
+@router.post(
+    path="/indexes/advice/apply",
+    operation_id="apply_index_advice",
+    name="apply_index_advice",
+    summary="Create the recommended indexes",
+    response_model=list[IndexBuildDTO],
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def apply_index_advice(apply: IndexAdviceApply,
+                             advisor: IndexAdvisor | None = Depends(get_user_index_advisor)) -> list[IndexBuildDTO]:
+    """
+    Create the recommended indexes in the background, get the index advice to follow the builds.
+
+    **apply**: Recommended index names, all recommendations when empty.
+    **return**: Started (or running) index builds.
+    """
+    _log.debug(f"AdminApi Applying index advice: {apply.names}")
+    advisor = _require_advisor(advisor)
+    return [IndexBuildDTO.model_validate(build, from_attributes=True) for build in await advisor.apply(apply.names)]
@@ -7,18 +7,25 @@ from fastapi import (
     Depends,
     status,
     HTTPException,
+    Query,
     Request,
+    Response,
 )
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
 
 from app.api.vm.api_response import response_fail_status_codes
 from app.conf.app_settings import server_settings
-from app.conf.dependencies import get_user_service
-from app.conf.query_params import QueryParams
+from app.conf.dependencies import get_user_service, get_user_stats_service
+from app.conf.query_params import QueryParams, parse_filter
+from app.repository.result_cache import cache_status
 from app.schema.user_dto import UserDTO, UserCreate, UserUpdate
+from app.schema.user_stats_dto import UserStatsDTO
 from app.security import auth_handler
 from app.service.user_service import UserService
-from app.utils.header_utils import create_list_header
+from app.service.user_stats_service import UserStatsService
+from app.utils.etag import none_match, user_etag
+from app.utils.header_utils import accepts_encoding, create_list_header
+from app.utils.server_timing import TimedJSONResponse, timing_span
 
 _resource = "users"
 _path = f"{server_settings.CONTEXT_PATH}/{_resource}"
@@ -41,6 +48,7 @@ router = APIRouter(prefix=_path,
 )
 async def create(
         request: Request,
+        response: Response,
         user_create_data: Annotated[UserCreate, Body(
             ...,
             title="User Create Data",
@@ -99,11 +107,59 @@ async def create(
         _log.error(f"UserApi User not created")
         raise HTTPException(status_code=400, detail="User not created")
     _log.debug(f"UserApi User created: {result}")
+    response.headers["ETag"] = user_etag(result.user_id, result.last_updated_date)
     return result
 
 
+# defined before /{user_id}, otherwise "stats" and "export" are taken as user ids
+@router.get("/stats", response_model=UserStatsDTO, status_code=status.HTTP_200_OK)
+async def stats(days: int | None = Query(None, ge=1, description="Daily signups of the last days, all when empty"),
+                user_stats_service: UserStatsService | None = Depends(get_user_stats_service)
+                ) -> UserStatsDTO:
+    """
+    User counters: total, active, inactive, users per role and signups per day.
+
+    **days**: Number of days of daily signups to return.
+    **return**: User stats.
+
+    The counters are read from one materialized document maintained by the user writes, not counted per request.
+    """
+    _log.debug(f"UserApi Retrieving user stats")
+    if user_stats_service is None:
+        raise HTTPException(status_code=404, detail="User stats are disabled")
+    return await user_stats_service.retrieve(days)
+
+
+@router.get("/export", status_code=status.HTTP_200_OK, response_class=StreamingResponse)
+async def export(request: Request,
+                 q: str | None = Query(None, min_length=3, max_length=1000, description="User filter"),
+                 export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv|arrow)$"),
+                 fields: str | None = Query(None, description="Comma separated fields, all fields when empty"),
+                 user_service: UserService = Depends(get_user_service)
+                 ) -> StreamingResponse:
+    """
+    Export the users matching the filter as a stream, in _id order.
+
+    **q**: Query to filter the users, same syntax as the list endpoint.
+    **format**: ndjson (default), csv or arrow (Arrow IPC stream, needs pyarrow).
+    **fields**: Comma separated fields to export, e.g. username,email,created_date.
+
+    The rows are read with a batched cursor and written as they arrive, the memory use does not depend on the
+    number of users. The stream is gzip compressed when the client accepts gzip (Accept-Encoding with a q-value > 0).
+    An invalid q is answered with 400.
+    """
+    _log.debug(f"UserApi Exporting users as {export_format}")
+    gzip = accepts_encoding(request.headers.get("accept-encoding"), "gzip")
+    field_names = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    writer, stream = await user_service.export(parse_filter(q) if q else None, export_format, field_names, gzip)
+    headers = {"Content-Disposition": f'attachment; filename="users.{writer.extension}"', "Vary": "Accept-Encoding"}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(stream, media_type=writer.media_type, headers=headers)
+
+
 @router.get("/{user_id}", response_model=UserDTO, status_code=status.HTTP_200_OK)
-async def retrieve(user_id: str,
+async def retrieve(request: Request, response: Response, user_id: str,
                    user_service: UserService = Depends(get_user_service)
                    ) -> Optional[UserDTO]:
     """
@@ -113,13 +169,19 @@ async def retrieve(user_id: str,
     **return**: User details.
 
     The endpoint retrieves the user by user id and returns the user details.
+    The ETag header changes with the last update of the user, a request with If-None-Match of the current ETag is
+    answered with 304 Not Modified and no body.
     """
     _log.debug(f"UserApi Retrieving user: {user_id}")
     result = await user_service.retrieve(user_id)
     if result is None:
         _log.error(f"AccountApi Account not found")
         raise HTTPException(status_code=404, detail="User not found")
+    etag = user_etag(result.user_id, result.last_updated_date)
+    if not none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
     _log.debug(f"UserApi User retrieved: {result}")
+    response.headers["ETag"] = etag
     return result
 
 
@@ -146,9 +208,10 @@ async def retrieve_by_username(username: str,
 
 
 @router.get("", response_model=list[UserDTO])
-async def find(query: QueryParams = Depends(QueryParams),
+async def find(request: Request,
+               query: QueryParams = Depends(QueryParams),
                user_service: UserService = Depends(get_user_service)
-               ) -> JSONResponse:
+               ) -> TimedJSONResponse:
     """
     List and filter users with the provided query, page, limit, and sort.
 
@@ -168,26 +231,45 @@ async def find(query: QueryParams = Depends(QueryParams),
     - /users?q={"username": {"$in": ["john_doe1", "john_doe2"]}}
 
     The endpoint lists the users with the provided query, page, limit, and sort and returns the list of users.
+    With the result cache enabled, the X-Cache header tells whether the page was served from the cache (HIT),
+    from an expired entry being refreshed (STALE) or from the database (MISS).
+    The ETag header changes with every user write, a request with If-None-Match of the current ETag is answered
+    with 304 Not Modified before the users are queried.
     """
     _log.debug(f"UserApi list with query")
-    page_response = await user_service.find(query=query.q, page=query.offset, size=query.limit, sort=query.sort)
+    # the version is read before the page, a write in between makes the ETag older than the page, never newer
+    etag = await user_service.list_etag(query.filter, query.offset, query.limit, query.sort)
+    if etag is not None and not none_match(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    page_response = await user_service.find(query=query.filter, page=query.offset, size=query.limit,
+                                           sort=query.sort)
     # headers =  {"X-Total-Count": str(page_response.total)}
     headers = create_list_header(page_response)
+    if etag is not None:
+        headers["ETag"] = etag
+    if cache_status() is not None:
+        headers["X-Cache"] = cache_status()
     _log.debug(f"UserApi list retrieved with {page_response.total} records")
-    json_result = [user.to_json() for user in page_response.content]
-    return JSONResponse(content=json_result, headers=headers)
+    # JSON encoding is the serialize metric of TimedJSONResponse.render
+    with timing_span("dto"):
+        json_result = [user.to_json() for user in page_response.content]
+    return TimedJSONResponse(content=json_result, headers=headers)
 
 
 @router.put("/{user_id}", response_model=UserDTO, status_code=status.HTTP_200_OK)
-async def update(user_id: str, user: UserUpdate,
+async def update(request: Request, response: Response, user_id: str, user: UserUpdate,
                  user_service: UserService = Depends(get_user_service)
                  ) -> UserDTO:
+    """
+    Update the user.
+
+    With an If-Match header, the user is updated only if its ETag is still one of the given ETags, checked by the
+    update itself. Otherwise the response is 412 Precondition Failed.
+    """
     _log.debug(f"UserApi Updating user: {user_id}")
-    result = await user_service.update(user_id, user)
-    if result is None:
-        _log.error(f"UserApi User not updated")
-        raise HTTPException(status_code=400, detail="User not updated")
+    result = await user_service.update(user_id, user, request.state.jwt_user, request.headers.get("if-match"))
     _log.debug(f"UserApi User updated: {result}")
+    response.headers["ETag"] = user_etag(result.user_id, result.last_updated_date)
     return result
 
 
@@ -1,12 +1,19 @@
 from pydantic_settings import BaseSettings
 
+from app.conf.env.cache_config import CacheSettings
 from app.conf.env.cors_config import CorsSettings
 from app.conf.env.db_config import DatabaseSettings
 from app.conf.env.email_config import SMTPSettings
+from app.conf.env.export_config import ExportSettings
 from app.conf.env.jwt_config import JWTSettings
 from app.conf.env.log_config import LoggingSettings
+from app.conf.env.profiling_config import ProfilingSettings
+from app.conf.env.query_config import QuerySettings
 from app.conf.env.security_settings import SecuritySettings
 from app.conf.env.server_config import ServerSettings
+from app.conf.env.stats_config import StatsSettings
+from app.conf.env.tracing_config import TracingSettings
+from app.conf.env.watchdog_config import WatchdogSettings
 
 
 class ApplicationSettings(BaseSettings):
@@ -34,3 +41,10 @@ email_settings = SMTPSettings()
 server_settings = ServerSettings()
 jwt_settings = JWTSettings()
 security_settings = SecuritySettings()
+profiling_settings = ProfilingSettings()
+watchdog_settings = WatchdogSettings()
+tracing_settings = TracingSettings()
+query_settings = QuerySettings()
+cache_settings = CacheSettings()
+export_settings = ExportSettings()
+stats_settings = StatsSettings()
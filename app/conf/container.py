@@ -0,0 +1,161 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from app.conf.app_settings import cache_settings, db_settings, query_settings, security_settings, stats_settings
+from app.conf.env.db_config import close_db, init_db
+from app.entity.user_entity import User
+from app.migration import user_migration
+from app.repository.change_version import ChangeVersion
+from app.repository.index_advisor import IndexAdvisor
+from app.repository.insert_batcher import InsertBatcher
+from app.repository.query_guard import QueryGuard
+from app.repository.result_cache import ResultCache
+from app.repository.sort_policy import SortPolicy
+from app.repository.user_repository import SORTABLE_FIELDS, UserRepository
+from app.repository.user_stats_repository import UserStatsRepository
+from app.security.auth_service import AuthService
+from app.service.account_service import AccountService
+from app.service.broadcast_service import broadcast_service
+from app.service.email_outbox import email_outbox
+from app.service.email_template import email_templates
+from app.service.user_service import UserService
+from app.service.user_stats_service import UserStatsService
+from app.utils.pass_util import PasswordUtil
+
+_log = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Application scoped services and the resources they share.
+
+    Started once by the lifespan: connects the database, applies the pending migrations, creates the password hasher
+    pool, the user query guard, the optional user index advisor, result cache, change version, stats and insert
+    batcher, builds the repositories and services, loads the email templates and starts the email outbox (SMTP pool)
+    and broadcast workers. The FastAPI dependencies (app.conf.dependencies) resolve to these instances instead of
+    building new ones per request. stop() releases everything in reverse order.
+
+    Tests replace services with override(), e.g. ``with container.override(user_service=mock): ...``
+    """
+
+    def __init__(self):
+        self.hasher_executor: ThreadPoolExecutor | None = None
+        self.hasher: PasswordUtil | None = None
+        self.user_insert_batcher: InsertBatcher | None = None
+        self.user_query_guard: QueryGuard | None = None
+        self.user_sort_policy: SortPolicy | None = None
+        self.user_index_advisor: IndexAdvisor | None = None
+        self.user_result_cache: ResultCache | None = None
+        self.user_change_version: ChangeVersion | None = None
+        self.user_stats_repository: UserStatsRepository | None = None
+        self.user_repository: UserRepository | None = None
+        self.user_service: UserService | None = None
+        self.user_stats_service: UserStatsService | None = None
+        self.auth_service: AuthService | None = None
+        self.account_service: AccountService | None = None
+        self.email_templates = email_templates
+        self.email_outbox = email_outbox
+        self.broadcast_service = broadcast_service
+        self._overrides: dict[str, object] = {}
+
+    async def start(self):
+        _log.info("ServiceContainer Starting")
+        await init_db()
+        # before the stats service, whose first recount includes the seeded users
+        await user_migration.init_migration()
+        self.hasher_executor = ThreadPoolExecutor(max_workers=security_settings.PASSWORD_HASH_WORKERS,
+                                                  thread_name_prefix="password-hasher")
+        self.hasher = PasswordUtil(self.hasher_executor)
+        if db_settings.INSERT_BATCH_ENABLED:
+            self.user_insert_batcher = InsertBatcher(User, db_settings.INSERT_BATCH_MAX_SIZE,
+                                                     db_settings.INSERT_BATCH_MAX_DELAY_MS)
+        self.user_query_guard = QueryGuard(User,
+                                           mode=query_settings.GUARD_MODE,
+                                           max_time_ms=query_settings.MAX_TIME_MS,
+                                           collscan_threshold=query_settings.COLLSCAN_THRESHOLD,
+                                           collscan_concurrency=query_settings.COLLSCAN_CONCURRENCY,
+                                           scan_wait_ms=query_settings.COLLSCAN_WAIT_MS,
+                                           plan_cache_size=query_settings.PLAN_CACHE_SIZE,
+                                           plan_cache_seconds=query_settings.PLAN_CACHE_SECONDS)
+        self.user_sort_policy = SortPolicy(User, SORTABLE_FIELDS, refresh_seconds=query_settings.PLAN_CACHE_SECONDS)
+        if query_settings.ADVISOR_ENABLED:
+            self.user_index_advisor = IndexAdvisor(User, self.user_query_guard,
+                                                   max_shapes=query_settings.ADVISOR_MAX_SHAPES,
+                                                   min_count=query_settings.ADVISOR_MIN_COUNT,
+                                                   sort_policy=self.user_sort_policy)
+        if cache_settings.ENABLED:
+            self.user_result_cache = ResultCache(cache_settings.TTL_SECONDS, cache_settings.STALE_SECONDS,
+                                                 cache_settings.MAX_BYTES, sizeof=UserRepository.page_size)
+        if cache_settings.ETAG_ENABLED:
+            self.user_change_version = ChangeVersion(User, cache_settings.ETAG_VERSION_SECONDS)
+        if stats_settings.ENABLED:
+            self.user_stats_repository = UserStatsRepository()
+            self.user_stats_service = UserStatsService(self.user_stats_repository, stats_settings.RECONCILE_SECONDS)
+        self.user_repository = UserRepository(self.user_insert_batcher, self.user_query_guard,
+                                              self.user_index_advisor, self.user_result_cache,
+                                              self.user_stats_repository, self.user_change_version,
+                                              self.user_sort_policy)
+        self.user_service = UserService(self.user_repository, self.hasher)
+        self.auth_service = AuthService(self.user_repository, self.hasher)
+        self.account_service = AccountService(self.user_service)
+        if self.user_stats_service is not None:
+            await self.user_stats_service.start()
+        self.email_templates.load()
+        await self.email_outbox.start()
+        await self.broadcast_service.start()
+        _log.info("ServiceContainer Started")
+
+    async def stop(self):
+        _log.info("ServiceContainer Stopping")
+        await self.broadcast_service.stop()
+        await self.email_outbox.stop()
+        if self.user_stats_service is not None:
+            await self.user_stats_service.stop()
+        if self.user_insert_batcher is not None:
+            await self.user_insert_batcher.drain()
+        if self.user_index_advisor is not None:
+            await self.user_index_advisor.stop()
+        if self.user_result_cache is not None:
+            await self.user_result_cache.stop()
+        self.user_insert_batcher = None
+        self.user_index_advisor = None
+        self.user_result_cache = None
+        self.user_change_version = None
+        self.user_query_guard = None
+        self.user_sort_policy = None
+        if self.hasher_executor is not None:
+            await asyncio.to_thread(self.hasher_executor.shutdown, wait=True, cancel_futures=True)
+        self.hasher_executor = None
+        self.hasher = None
+        self.user_repository = self.user_service = self.auth_service = self.account_service = None
+        self.user_stats_repository = self.user_stats_service = None
+        close_db()
+        _log.info("ServiceContainer Stopped")
+
+    def get(self, name: str):
+        """
+        Service by attribute name, an override wins
+        """
+        if name in self._overrides:
+            return self._overrides[name]
+        service = getattr(self, name)
+        if service is None:
+            raise RuntimeError(f"ServiceContainer is not started, {name} is not available")
+        return service
+
+    @contextmanager
+    def override(self, **services):
+        """
+        Replace services while the context is active, e.g. with mocks in tests
+        """
+        previous = dict(self._overrides)
+        self._overrides.update(services)
+        try:
+            yield self
+        finally:
+            self._overrides = previous
+
+
+container = ServiceContainer()
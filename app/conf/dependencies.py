@@ -1,22 +1,34 @@
-from fastapi import Depends
-
+from app.conf.app_settings import query_settings, stats_settings
+from app.conf.container import container
+from app.repository.index_advisor import IndexAdvisor
 from app.repository.user_repository import UserRepository
 from app.security.auth_service import AuthService
 from app.service.account_service import AccountService
 from app.service.user_service import UserService
+from app.service.user_stats_service import UserStatsService
 
 
 async def get_user_repository() -> UserRepository:
-    return UserRepository()
+    return container.get("user_repository")
+
+
+async def get_user_service() -> UserService:
+    return container.get("user_service")
+
+
+async def get_auth_service() -> AuthService:
+    return container.get("auth_service")
 
 
-async def get_user_service(user_repository: UserRepository = Depends(get_user_repository)) -> UserService:
-    return UserService(user_repository)
+async def get_account_service() -> AccountService:
+    return container.get("account_service")
 
 
-async def get_auth_service(user_repository: UserRepository = Depends(get_user_repository)) -> AuthService:
-    return AuthService(user_repository)
+async def get_user_index_advisor() -> IndexAdvisor | None:
+    # None when the advisor is disabled (QUERY_ADVISOR_ENABLED)
+    return container.get("user_index_advisor") if query_settings.ADVISOR_ENABLED else None
 
 
-async def get_account_service(user_service: UserService = Depends(get_user_service)) -> AccountService:
-    return AccountService(user_service)
+async def get_user_stats_service() -> UserStatsService | None:
+    # None when the stats are disabled (STATS_ENABLED)
+    return container.get("user_stats_service") if stats_settings.ENABLED else None
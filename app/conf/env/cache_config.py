@@ -0,0 +1,36 @@
+# Result cache configuration
+from pydantic_settings import BaseSettings
+
+
+class CacheSettings(BaseSettings):
+    """
+    Result cache settings of the user list query (GET /users)
+
+    Attributes:
+    -----------
+    ENABLED: bool
+        Cache the list results by filter, sort, page and size, every user write drops the cache
+    TTL_SECONDS: float
+        Time a result is served from the cache
+    STALE_SECONDS: float
+        Time an expired result is still served while it is refreshed in the background
+    MAX_BYTES: int
+        Memory budget of the cached results, least recently used results are evicted above it
+    ETAG_ENABLED: bool
+        ETags of the list pages, every user write increments the change version of the users collection
+    ETAG_VERSION_SECONDS: float
+        Time a worker caches the change version, a write of another worker changes the ETags after it
+    """
+
+    ENABLED: bool = False
+    TTL_SECONDS: float = 5
+    STALE_SECONDS: float = 30
+    MAX_BYTES: int = 16 * 1024 * 1024
+    ETAG_ENABLED: bool = True
+    ETAG_VERSION_SECONDS: float = 1
+
+    class Config:
+        env_prefix = "CACHE_"
+        env_file = ".env.dev"
+        env_file_encoding = "utf-8"
+        case_sensitive = True
@@ -6,6 +6,7 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic_settings import BaseSettings
 
 from app import entity
+from app.conf.env.tracing_config import TracingSettings
 
 log = logging.getLogger(__name__)
 client = None
@@ -22,6 +23,16 @@ class DatabaseSettings(BaseSettings):
         MongoDB URI to connect to the database
     DATABASE_NAME: str
         Database name to connect to in MongoDB
+    INSERT_BATCH_ENABLED: bool
+        Group concurrent user inserts into one unordered insert_many
+    INSERT_BATCH_MAX_SIZE: int
+        Maximum documents of an insert batch
+    INSERT_BATCH_MAX_DELAY_MS: int
+        Maximum time the first insert of a batch waits for more inserts
+    MIGRATION_LEASE_SECONDS: int
+        Lease of the migration lock, extended after every applied migration
+    MIGRATION_WAIT_SECONDS: int
+        Maximum time a worker waits for the migrations applied by another worker
     """
 
     MONGODB_URI: str | None = None
@@ -31,6 +42,11 @@ class DatabaseSettings(BaseSettings):
     USERNAME: str | None = None
     PASSWORD: str | None = None
     LOG_COLLECTION: str = "app_log"
+    INSERT_BATCH_ENABLED: bool = False
+    INSERT_BATCH_MAX_SIZE: int = 100
+    INSERT_BATCH_MAX_DELAY_MS: int = 5
+    MIGRATION_LEASE_SECONDS: int = 60
+    MIGRATION_WAIT_SECONDS: int = 120
 
     class Config:
         env_prefix = "DB_"
@@ -54,8 +70,28 @@ async def init_db():
 
     log.debug(f"Database name: {DatabaseSettings().DATABASE_NAME}")
 
+    event_listeners = []
+    if TracingSettings().ENABLED:
+        from app.utils.tracing import TracingCommandListener
+        event_listeners.append(TracingCommandListener())
+
     global client, db
-    client = AsyncIOMotorClient(mongodb_uri)
+    client = AsyncIOMotorClient(mongodb_uri, event_listeners=event_listeners)
     db = client[DatabaseSettings().DATABASE_NAME]
 
-    await init_beanie(database=db, document_models=[entity.User, entity.Role])  # TODO change-me: add more entities here
+    # TODO change-me: add more entities here
+    await init_beanie(database=db,
+                      document_models=[entity.User, entity.Role, entity.OutboxEmail, entity.BroadcastJob,
+                                       entity.UserStats, entity.MigrationState, entity.CollectionVersion])
+
+
+def close_db():
+    """
+    Close the database client
+    """
+    global client, db
+    if client is not None:
+        log.info("Closing database connection")
+        client.close()
+    client = None
+    db = None
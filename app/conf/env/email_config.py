@@ -19,6 +19,42 @@ class SMTPSettings(BaseSettings):
         SMTP server password
     SMTP_TLS: bool
         SMTP server TLS
+    SMTP_TIMEOUT: int
+        SMTP socket timeout in seconds
+    SMTP_POOL_SIZE: int
+        Maximum number of authenticated SMTP connections kept by the pool
+    SMTP_POOL_IDLE_TIMEOUT: int
+        Idle pooled connections older than this value (seconds) are checked with NOOP before reuse
+    TEMPLATE_DIR: str
+        Directory of the Jinja2 email templates (<name>.subject.j2, <name>.txt.j2 and optional <name>.html.j2)
+    ATTACHMENT_CACHE_SIZE: int
+        Number of encoded attachment payloads kept in memory and reused across messages
+    OUTBOX_WORKERS: int
+        Number of background workers draining the email outbox
+    OUTBOX_BATCH_SIZE: int
+        Maximum number of messages a worker claims and sends over one connection at a time
+    OUTBOX_POLL_INTERVAL_MS: int
+        Idle workers look for due messages at this interval (messages queued by other nodes, retries)
+    OUTBOX_LEASE_SECONDS: int
+        Claimed messages are reclaimed by other workers when they are not acknowledged within the lease
+    OUTBOX_MAX_ATTEMPTS: int
+        Messages failing this many times are dead-lettered
+    OUTBOX_RETRY_BASE_SECONDS: int
+        Delay of the first retry, doubled on every attempt with jitter
+    OUTBOX_RETRY_MAX_SECONDS: int
+        Maximum delay between retries
+    OUTBOX_RETENTION_DAYS: int
+        Sent messages are removed from the outbox collection after this many days
+    BROADCAST_BATCH_SIZE: int
+        Recipients read from the cursor and checkpointed at a time by a broadcast job
+    BROADCAST_CONCURRENCY: int
+        Default number of concurrent SMTP sends of a broadcast job (capped by SMTP_POOL_SIZE)
+    BROADCAST_RATE: float
+        Default maximum messages per second of a broadcast job, 0 disables the rate limit
+    BROADCAST_LEASE_SECONDS: int
+        A running job is resumed by another node when its checkpoint is older than the lease
+    BROADCAST_POLL_INTERVAL_SECONDS: int
+        Interval of the check for pending and abandoned broadcast jobs
     """
 
     SMTP_HOST: str = "smtp.gmail.com"
@@ -26,6 +62,24 @@ class SMTPSettings(BaseSettings):
     SMTP_USERNAME: str = "pfapi@gmail.com"
     SMTP_PASSWORD: str = "password"
     SMTP_TLS: bool = True
+    SMTP_TIMEOUT: int = 30
+    SMTP_POOL_SIZE: int = 4
+    SMTP_POOL_IDLE_TIMEOUT: int = 60
+    TEMPLATE_DIR: str = "templates/email"
+    ATTACHMENT_CACHE_SIZE: int = 32
+    OUTBOX_WORKERS: int = 2
+    OUTBOX_BATCH_SIZE: int = 50
+    OUTBOX_POLL_INTERVAL_MS: int = 1000
+    OUTBOX_LEASE_SECONDS: int = 120
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: int = 30
+    OUTBOX_RETRY_MAX_SECONDS: int = 3600
+    OUTBOX_RETENTION_DAYS: int = 7
+    BROADCAST_BATCH_SIZE: int = 500
+    BROADCAST_CONCURRENCY: int = 4
+    BROADCAST_RATE: float = 20
+    BROADCAST_LEASE_SECONDS: int = 120
+    BROADCAST_POLL_INTERVAL_SECONDS: int = 30
 
     class Config:
         env_prefix = "MAIL_"
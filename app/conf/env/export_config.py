@@ -0,0 +1,24 @@
+# Bulk export configuration
+from pydantic_settings import BaseSettings
+
+
+class ExportSettings(BaseSettings):
+    """
+    Bulk export settings of the users (GET /users/export)
+
+    Attributes:
+    -----------
+    BATCH_SIZE: int
+        Documents fetched per cursor round trip and encoded together
+    GZIP_LEVEL: int
+        Compression level when the client accepts gzip, 1 (fast) to 9 (small)
+    """
+
+    BATCH_SIZE: int = 1000
+    GZIP_LEVEL: int = 6
+
+    class Config:
+        env_prefix = "EXPORT_"
+        env_file = ".env.dev"
+        env_file_encoding = "utf-8"
+        case_sensitive = True
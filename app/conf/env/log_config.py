@@ -14,7 +14,7 @@ class LoggingSettings(BaseSettings):
     LOG_FILE: str
         Logging file
     LOG_FORMAT: str
-        Logging format string for log messages like timestamp, name, level, message
+        Logging format string for log messages like timestamp, name, level, message, trace_id, span_id
     LOG_HANDLER: list[str]
         Logging handlers like console, file, db
     LOG_BACKUP_COUNT: int 7
@@ -27,7 +27,7 @@ class LoggingSettings(BaseSettings):
 
     LOG_LEVEL: str = "DEBUG"
     LOG_FILE: str = "/tmp/app.log"
-    LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s"
     LOG_HANDLER: list[str] = ["console", "file", "db"]
     LOG_BACKUP_COUNT: int = 7  # log file will be rotated after 7 files
     LOG_MAX_DAYS: int = 7  # log file will be rotated after 7 days
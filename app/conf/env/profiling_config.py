@@ -0,0 +1,34 @@
+# On-demand request profiling configuration
+from pydantic_settings import BaseSettings
+
+
+class ProfilingSettings(BaseSettings):
+    """
+    On-demand request profiling settings
+
+    Attributes:
+    -----------
+    ENABLED: bool
+        Allow admins to profile single requests with the profiling header
+    HEADER: str
+        Request header that turns the profiler on for one request like X-Profile: 1
+    TOP_N: int
+        Number of functions kept in the report
+    SORT_BY: str
+        pstats sort key for the report like cumulative, tottime, ncalls
+    HISTORY_SIZE: int
+        Number of reports kept in memory for the admin endpoint. The reports are per worker process,
+        a profile id is only found on the worker that returned it
+    """
+
+    ENABLED: bool = True
+    HEADER: str = "X-Profile"
+    TOP_N: int = 30
+    SORT_BY: str = "cumulative"
+    HISTORY_SIZE: int = 50
+
+    class Config:
+        env_prefix = "PROFILE_"
+        env_file = ".env.dev"
+        env_file_encoding = "utf-8"
+        case_sensitive = True
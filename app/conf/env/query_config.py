@@ -0,0 +1,52 @@
+# Query guard configuration
+from pydantic_settings import BaseSettings
+
+
+class QuerySettings(BaseSettings):
+    """
+    Cost guard settings of the client filters (q) of list and count queries
+
+    Attributes:
+    -----------
+    MAX_TIME_MS: int
+        maxTimeMS of every list and count query, 0 disables the limit
+    GUARD_MODE: str
+        Handling of filters whose winning plan is a collection scan: reject, throttle or off
+    COLLSCAN_THRESHOLD: int
+        Collection scans are allowed while the collection has fewer documents than this value
+    COLLSCAN_CONCURRENCY: int
+        Collection scans running at the same time in throttle mode
+    COLLSCAN_WAIT_MS: int
+        Time a throttled collection scan waits for a scan slot before it fails with 503 and Retry-After
+    PLAN_CACHE_SIZE: int
+        Number of query shapes whose plan verdict is cached
+    PLAN_CACHE_SECONDS: int
+        Time a plan verdict and the index list of the sort policy are cached, new indexes are taken into account
+        after this time
+    PARSE_CACHE_SIZE: int
+        Number of parsed q filters cached by their raw string
+    ADVISOR_ENABLED: bool
+        Record the filter shapes of list queries and recommend indexes for them (admin index advice)
+    ADVISOR_MAX_SHAPES: int
+        Number of filter shapes recorded, the least recently seen ones are dropped
+    ADVISOR_MIN_COUNT: int
+        Times a filter shape must be seen before an index is recommended for it
+    """
+
+    MAX_TIME_MS: int = 5000
+    GUARD_MODE: str = "reject"
+    COLLSCAN_THRESHOLD: int = 10_000
+    COLLSCAN_CONCURRENCY: int = 2
+    COLLSCAN_WAIT_MS: int = 200
+    PLAN_CACHE_SIZE: int = 256
+    PLAN_CACHE_SECONDS: int = 300
+    PARSE_CACHE_SIZE: int = 1024
+    ADVISOR_ENABLED: bool = True
+    ADVISOR_MAX_SHAPES: int = 500
+    ADVISOR_MIN_COUNT: int = 5
+
+    class Config:
+        env_prefix = "QUERY_"
+        env_file = ".env.dev"
+        env_file_encoding = "utf-8"
+        case_sensitive = True
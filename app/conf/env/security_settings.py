@@ -6,6 +6,8 @@ class SecuritySettings(BaseSettings):
     ENABLED: bool = False
     # List of paths that do not require authorization like /docs,/redoc,/openapi.json,/health,/ping,/,/api/v1,/api/v1/public,/api/v1/auth/login,/api/v1/auth/register
     ALLOWED_PATHS: list[str] = []
+    # Threads of the password hasher pool, bcrypt releases the GIL so the hashes run in parallel
+    PASSWORD_HASH_WORKERS: int = 4
 
     class Config:
         env_prefix = "SECURITY_"
@@ -20,6 +20,8 @@ class ServerSettings(BaseSettings):
         Number of worker processes to spawn
     CONTEXT_PATH: str
         Base path for the API endpoints in the server like /api/v1 or /pyfapi/api/v2 etc.
+    TIMING_ENABLED: bool
+        Return the Server-Timing response header (auth, db, bcrypt, email, dto, serialize, total)
     """
 
     HOST: str = "0.0.0.0"
@@ -28,6 +30,7 @@ class ServerSettings(BaseSettings):
     RELOAD: bool = True
     WORKERS: int = 1
     CONTEXT_PATH: str = "/api/v1"
+    TIMING_ENABLED: bool = True
 
     class Config:
         env_prefix = "SERVER_"
@@ -0,0 +1,24 @@
+# Materialized user stats configuration
+from pydantic_settings import BaseSettings
+
+
+class StatsSettings(BaseSettings):
+    """
+    Materialized user stats settings (GET /users/stats)
+
+    Attributes:
+    -----------
+    ENABLED: bool
+        Maintain the user stats document on every user write
+    RECONCILE_SECONDS: int
+        Interval of the recount that corrects the drift of the counters, 0 disables it
+    """
+
+    ENABLED: bool = True
+    RECONCILE_SECONDS: int = 3600
+
+    class Config:
+        env_prefix = "STATS_"
+        env_file = ".env.dev"
+        env_file_encoding = "utf-8"
+        case_sensitive = True
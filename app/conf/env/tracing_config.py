@@ -0,0 +1,45 @@
+# In-process tracing configuration
+from pydantic_settings import BaseSettings
+
+
+class TracingSettings(BaseSettings):
+    """
+    Tracing settings
+
+    Attributes:
+    -----------
+    ENABLED: bool
+        Enable tracing middleware, spans and the Mongo command listener
+    SAMPLE_RATE: float
+        Ratio of the requests traced when the caller does not send a traceparent header (0.0 - 1.0)
+    EXPORTER: str
+        Span exporter: none, log, file, otlp
+    FILE_PATH: str
+        JSON lines file for the file exporter
+    OTLP_ENDPOINT: str
+        OTLP/HTTP JSON endpoint of the collector for the otlp exporter
+    SERVICE_NAME: str
+        service.name resource attribute of the exported spans
+    BATCH_SIZE: int
+        Maximum number of spans exported at once
+    FLUSH_INTERVAL_MS: int
+        Export interval in milliseconds
+    MAX_QUEUE_SIZE: int
+        Finished spans waiting for export, new spans are dropped when the queue is full
+    """
+
+    ENABLED: bool = True
+    SAMPLE_RATE: float = 0.1
+    EXPORTER: str = "log"
+    FILE_PATH: str = "/tmp/app-traces.jsonl"
+    OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    SERVICE_NAME: str = "pyfapi"
+    BATCH_SIZE: int = 512
+    FLUSH_INTERVAL_MS: int = 5000
+    MAX_QUEUE_SIZE: int = 8192
+
+    class Config:
+        env_prefix = "TRACING_"
+        env_file = ".env.dev"
+        env_file_encoding = "utf-8"
+        case_sensitive = True
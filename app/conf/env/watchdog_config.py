@@ -0,0 +1,33 @@
+# Event loop watchdog configuration
+from pydantic_settings import BaseSettings
+
+
+class WatchdogSettings(BaseSettings):
+    """
+    Event loop lag and blocking-call watchdog settings
+
+    Attributes:
+    -----------
+    ENABLED: bool
+        Start the watchdog with the application
+    INTERVAL_MS: int
+        Heartbeat interval of the event loop in milliseconds, lag is measured on each heartbeat
+    THRESHOLD_MS: int
+        The loop is considered blocked when a heartbeat is late by more than this value, the stack is captured
+    HISTORY_SIZE: int
+        Number of blocking events kept in the ring buffer
+    STACK_LIMIT: int
+        Maximum number of frames captured for a blocking event
+    """
+
+    ENABLED: bool = True
+    INTERVAL_MS: int = 50
+    THRESHOLD_MS: int = 100
+    HISTORY_SIZE: int = 100
+    STACK_LIMIT: int = 30
+
+    class Config:
+        env_prefix = "WATCHDOG_"
+        env_file = ".env.dev"
+        env_file_encoding = "utf-8"
+        case_sensitive = True
@@ -25,11 +25,97 @@
 #         "sort": sort
 #     }
 import json
-from typing import Dict, Any
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any
 
 from fastapi import HTTPException
 from pydantic import BaseModel, Field, field_validator
 
+from app.conf.app_settings import query_settings
+
+_ALLOWED_OPERATORS = {"$eq", "$gt", "$gte", "$in", "$lt", "$lte", "$ne", "$nin", "$or", "$and", "$nor"}
+_LOGICAL_OPERATORS = {"$or", "$and", "$nor"}
+
+
+class QueryFilter(dict):
+    """
+    Validated, canonical q filter: filter and operator keys are sorted and the values of the *_date fields are
+    datetimes. Instances are shared by the parse cache and must not be modified. key is the canonical JSON of the
+    filter, the same for every spelling of the filter (cache and metrics key).
+    """
+
+    __slots__ = ("key",)
+
+
+def _coerce(field: str, value: Any) -> Any:
+    # the date fields of the entities are named *_date, clients send ISO 8601 strings
+    if not field.endswith("_date") or not isinstance(value, str):
+        return value
+    try:
+        result = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date for {field}: {value}")
+    return result if result.tzinfo else result.replace(tzinfo=timezone.utc)
+
+
+def _canonical(query: Any) -> dict:
+    if not isinstance(query, dict):
+        raise HTTPException(status_code=400, detail="Query must be a JSON object")
+    result = {}
+    for key in sorted(query):
+        value = query[key]
+        if key.startswith("$"):
+            if key not in _ALLOWED_OPERATORS:
+                raise HTTPException(status_code=400, detail=f"Unauthorized query operator: {key}")
+            if not isinstance(value, list):
+                raise HTTPException(status_code=400, detail=f"Query operator {key} expects a list")
+            result[key] = [_canonical(clause) for clause in value]
+        elif isinstance(value, dict) and any(k.startswith("$") for k in value):
+            operators = {}
+            for operator in sorted(value):
+                if operator not in _ALLOWED_OPERATORS or operator in _LOGICAL_OPERATORS:
+                    raise HTTPException(status_code=400, detail=f"Unauthorized query operator: {operator}")
+                operand = value[operator]
+                operators[operator] = [_coerce(key, item) for item in operand] if isinstance(operand, list) \
+                    else _coerce(key, operand)
+            result[key] = operators
+        elif isinstance(value, dict):
+            # embedded document equality depends on the key order, it is kept as is
+            _check_literal(value)
+            result[key] = value
+        else:
+            result[key] = _coerce(key, value)
+    return result
+
+
+def _check_literal(value: Any):
+    if isinstance(value, dict):
+        for k, v in value.items():
+            if k.startswith("$"):
+                raise HTTPException(status_code=400, detail=f"Unauthorized query operator: {k}")
+            _check_literal(v)
+    elif isinstance(value, list):
+        for item in value:
+            _check_literal(item)
+
+
+@lru_cache(maxsize=query_settings.PARSE_CACHE_SIZE)
+def parse_filter(q: str) -> QueryFilter:
+    """
+    Parse, validate and canonicalize a q filter. Results are cached by the raw string, a repeated filter is not
+    parsed again.
+    :param q: JSON filter
+    :return: Shared canonical filter, must not be modified
+    """
+    try:
+        query = json.loads(q)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Query must be valid JSON")
+    result = QueryFilter(_canonical(query))
+    result.key = json.dumps(result, separators=(",", ":"), default=str)
+    return result
+
 
 class QueryParams(BaseModel):
     """
@@ -57,7 +143,7 @@ class QueryParams(BaseModel):
         Limit for the page.
 
     sort: str
-        Sort order for the results. Default is descending order.
+        Sort order for the results, comma separated +field / -field, e.g. -created_date,+_id. Default is ascending _id.
 
     Returns:
     --------
@@ -92,20 +178,12 @@ class QueryParams(BaseModel):
         """
         if not q:
             return
-
-        allowed_operators = {"$eq", "$gt", "$gte", "$in", "$lt", "$lte", "$ne", "$nin", "$or", "$and", "$nor"}
-        obj = json.loads(q)
-
-        def check_allowed_keys(query: Dict[str, Any]):
-            for k, v in query.items():
-                if k.startswith("$") and k not in allowed_operators:
-                    raise HTTPException(status_code=400, detail=f"Unauthorized query operator: {k}")
-                if isinstance(v, dict):
-                    check_allowed_keys(v)
-                elif isinstance(v, list):
-                    for item in v:
-                        if isinstance(item, dict):
-                            check_allowed_keys(item)
-
-        check_allowed_keys(obj)
+        parse_filter(q)
         return q
+
+    @property
+    def filter(self) -> QueryFilter | None:
+        """
+        Canonical filter of q, from the parse cache
+        """
+        return parse_filter(self.q) if self.q else None
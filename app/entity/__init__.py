@@ -2,10 +2,15 @@
 
 import logging
 
+from app.entity.broadcast_job_entity import BroadcastJob
+from app.entity.collection_version_entity import CollectionVersion
+from app.entity.migration_entity import MigrationState
+from app.entity.outbox_email_entity import OutboxEmail
 from app.entity.role_entity import Role
 from app.entity.user_entity import User
+from app.entity.user_stats_entity import UserStats
 
-db_entities = [User, Role]
+db_entities = [User, Role, OutboxEmail, BroadcastJob, UserStats, MigrationState, CollectionVersion]
 log = logging.getLogger(__name__)
 
 
@@ -0,0 +1,47 @@
+from datetime import datetime
+from enum import Enum
+
+from beanie import Document, PydanticObjectId
+from pymongo import ASCENDING, IndexModel
+
+
+class BroadcastStatus(str, Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    CANCELLED = "CANCELLED"
+    FAILED = "FAILED"
+
+
+class BroadcastJob(Document):
+    job_id: str
+    template: str
+    context: dict = {}
+    query: str | None = None
+    active_only: bool = True
+    concurrency: int
+    rate: float
+    status: BroadcastStatus = BroadcastStatus.PENDING
+    last_id: PydanticObjectId | None = None
+    total: int | None = None
+    processed: int = 0
+    sent: int = 0
+    deferred: int = 0
+    failed: int = 0
+    last_error: str | None = None
+    lease_owner: str | None = None
+    lease_expires_date: datetime | None = None
+    created_by: str | None = None
+    created_date: datetime
+    started_date: datetime | None = None
+    finished_date: datetime | None = None
+
+    class Settings:
+        name = "email_broadcast"
+        indexes = [
+            IndexModel([("job_id", ASCENDING)], name="job_id", unique=True),
+            IndexModel([("status", ASCENDING), ("lease_expires_date", ASCENDING)], name="status_lease_expires"),
+        ]
+
+    def __str__(self):
+        return f"BroadcastJob: {self.job_id}, {self.template}, {self.status}, {self.processed}/{self.total}"
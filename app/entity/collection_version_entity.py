@@ -0,0 +1,12 @@
+from beanie import Document
+
+
+class CollectionVersion(Document):
+    """
+    Change version of a collection, incremented by every write of the collection. id is the collection name.
+    """
+    id: str
+    version: int = 0
+
+    class Settings:
+        name = "app_collection_version"
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from beanie import Document
+
+
+class MigrationState(Document):
+    """
+    Applied migrations and the run-once lock, a single document read once per start.
+    applied maps the applied migration versions to their applied date.
+    """
+    id: str = "migrations"
+    applied: dict[str, datetime] = {}
+    lease_owner: str | None = None
+    lease_expires_date: datetime | None = None
+
+    class Settings:
+        name = "app_migration"
@@ -0,0 +1,45 @@
+from datetime import datetime
+from enum import Enum
+
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+
+from app.conf.env.email_config import SMTPSettings
+
+
+class OutboxStatus(str, Enum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    DEAD = "DEAD"
+
+
+class OutboxEmail(Document):
+    to: list[str]
+    subject: str
+    body: str
+    html: str | None = None
+    attachment_path: str | None = None
+    status: OutboxStatus = OutboxStatus.PENDING
+    attempts: int = 0
+    next_attempt_date: datetime
+    lease_owner: str | None = None
+    lease_expires_date: datetime | None = None
+    last_error: str | None = None
+    created_date: datetime
+    sent_date: datetime | None = None
+
+    class Settings:
+        name = "email_outbox"
+        indexes = [
+            # due messages: status = PENDING and next_attempt_date <= now
+            IndexModel([("status", ASCENDING), ("next_attempt_date", ASCENDING)], name="status_next_attempt"),
+            # expired leases: status = SENDING and lease_expires_date <= now
+            IndexModel([("status", ASCENDING), ("lease_expires_date", ASCENDING)], name="status_lease_expires"),
+            IndexModel([("lease_owner", ASCENDING)], name="lease_owner", sparse=True),
+            IndexModel([("sent_date", ASCENDING)], name="sent_date_ttl",
+                       expireAfterSeconds=SMTPSettings().OUTBOX_RETENTION_DAYS * 24 * 3600),
+        ]
+
+    def __str__(self):
+        return f"OutboxEmail: {self.id}, {self.to}, {self.status}, {self.attempts}"
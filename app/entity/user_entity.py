@@ -2,6 +2,7 @@ from datetime import datetime
 
 from beanie import Document
 from pydantic import EmailStr
+from pymongo import ASCENDING, IndexModel
 
 
 class User(Document):
@@ -22,6 +23,16 @@ class User(Document):
     class Settings:
         name = "app_user"
         validate_on_save = True
+        # uniqueness is enforced by the indexes, a duplicate insert raises DuplicateKeyError
+        indexes = [
+            IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True,
+                       partialFilterExpression={"user_id": {"$type": "string"}}),
+            IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+            IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+            # sort indexes of the list query, _id is the tiebreaker of the sort
+            IndexModel([("created_date", ASCENDING), ("_id", ASCENDING)], name="created_date_id"),
+            IndexModel([("last_updated_date", ASCENDING), ("_id", ASCENDING)], name="last_updated_date_id"),
+        ]
 
     def __str__(self):
         return f"User: {self.user_id}, {self.username}, {self.first_name} {self.last_name}, {self.email}, {self.is_active}, {self.roles}"
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from beanie import Document
+
+
+class UserStats(Document):
+    """
+    Materialized user counters, a single document updated with $inc by the user writes and reconciled periodically.
+    roles and daily (signups per created_date day, YYYY-MM-DD) map keys to counts.
+    lease_owner and lease_expires_date are the lease of the worker reconciling the counters for the current period.
+    """
+    id: str = "users"
+    total: int = 0
+    active: int = 0
+    inactive: int = 0
+    roles: dict[str, int] = {}
+    daily: dict[str, int] = {}
+    reconciled_date: datetime | None = None
+    last_drift: int | None = None
+    lease_owner: str | None = None
+    lease_expires_date: datetime | None = None
+
+    class Settings:
+        name = "user_stats"
@@ -1,4 +1,5 @@
 import logging
+import math
 from contextlib import asynccontextmanager
 
 import markdown
@@ -8,11 +9,16 @@ from fastapi.responses import JSONResponse
 from fastapi.templating import Jinja2Templates
 
 from app.api import api_router
-from app.conf.app_settings import app_settings, server_settings, cors_settings
-from app.conf.env.db_config import init_db
-from app.errors.business_exception import BusinessException
+from app.conf.app_settings import app_settings, server_settings, cors_settings, query_settings, watchdog_settings
+from app.conf.container import container
+from app.errors.business_exception import BusinessException, ErrorCodes
+from app.middleware.profiling_middleware import ProfilingMiddleware
 from app.middleware.security_middleware import SecurityMiddleware
-from app.migration import user_migration
+from app.middleware.timing_middleware import ServerTimingMiddleware
+from app.middleware.tracing_middleware import TracingMiddleware
+from app.utils.loop_watchdog import loop_watchdog
+from app.utils.server_timing import TimedJSONResponse
+from app.utils.tracing import tracer
 
 print("app.main.py is running")
 
@@ -23,9 +29,14 @@ _templates = Jinja2Templates(directory="././templates")
 @asynccontextmanager
 async def lifespan(_):
     _log.debug("FastAPI Lifespan started")
-    await init_db()
-    await user_migration.init_migration()
+    await tracer.start()
+    await container.start()
+    if watchdog_settings.ENABLED:
+        await loop_watchdog.start()
     yield
+    await loop_watchdog.stop()
+    await container.stop()
+    await tracer.stop()
 
 
 tags_metadata = [
@@ -40,6 +51,10 @@ tags_metadata = [
     {
         "name": "users",
         "description": "Operations with users. The **users** endpoint returns the user information."
+    },
+    {
+        "name": "admin",
+        "description": "Operations for administrators. Request profiles and runtime diagnostics."
     }
 ]
 servers_metadata = [
@@ -61,6 +76,7 @@ app = FastAPI(
     redoc_url=f"{server_settings.CONTEXT_PATH}/redoc",
     openapi_url=f"{server_settings.CONTEXT_PATH}/openapi.json",
     lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
     openapi_tags=tags_metadata,
     contact={
         "name": f"{app_settings.APP_NAME} Team",
@@ -86,6 +102,12 @@ app.add_middleware(
 
 # noinspection PyTypeChecker
 app.add_middleware(SecurityMiddleware)
+# noinspection PyTypeChecker
+app.add_middleware(ProfilingMiddleware)
+# noinspection PyTypeChecker
+app.add_middleware(ServerTimingMiddleware)
+# noinspection PyTypeChecker
+app.add_middleware(TracingMiddleware)
 app.include_router(api_router)
 
 
@@ -93,12 +115,25 @@ def write_log(request: Request, exc: BusinessException):
     _log.error(f"BusinessException - Request: {request.method} {request.url.path} failed with {exc.code} {exc.msg}")
 
 
+# HTTP status of the error codes, the other error codes are 400
+_error_status_codes = {
+    ErrorCodes.PRECONDITION_FAILED: status.HTTP_412_PRECONDITION_FAILED,
+    ErrorCodes.QUERY_THROTTLED: status.HTTP_503_SERVICE_UNAVAILABLE,
+}
+
+# extra response headers of the error codes, a running collection scan frees its slot within maxTimeMS
+_error_headers = {
+    ErrorCodes.QUERY_THROTTLED: {"Retry-After": str(max(math.ceil(query_settings.MAX_TIME_MS / 1000), 1))},
+}
+
+
 @app.exception_handler(BusinessException)
 async def business_exception_handler(request: Request, exc: BusinessException):
+    status_code = _error_status_codes.get(exc.code, status.HTTP_400_BAD_REQUEST)
     return JSONResponse(
-        status_code=status.HTTP_400_BAD_REQUEST,
-        content={"detail": {"error_code": f"{status.HTTP_400_BAD_REQUEST}.{exc.code.name}", "error_message": exc.msg}},
-        headers={"X-Error": f"{status.HTTP_400_BAD_REQUEST}.{exc.code}"},
+        status_code=status_code,
+        content={"detail": {"error_code": f"{status_code}.{exc.code.name}", "error_message": exc.msg}},
+        headers={"X-Error": f"{status_code}.{exc.code}", **_error_headers.get(exc.code, {})},
         media_type="application/json",
         background=write_log(request, exc),
     )
@@ -4,6 +4,7 @@ from logging.handlers import TimedRotatingFileHandler, RotatingFileHandler
 from log4mongo.handlers import MongoHandler
 
 from app.conf.app_settings import log_settings, app_settings, db_settings
+from app.utils.tracing import install_log_record_factory
 
 
 def get_mongodb_handler():
@@ -73,6 +74,7 @@ def configure_handler():
 
 
 def init_log():
+    install_log_record_factory()
     logging.basicConfig(
         level=log_settings.LOG_LEVEL,
         format=log_settings.LOG_FORMAT,
@@ -0,0 +1,67 @@
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.conf.app_settings import profiling_settings
+from app.security import auth_handler
+from app.utils.header_utils import get_header
+from app.utils.request_profiler import RequestProfiler, profile_store
+
+_log = logging.getLogger(__name__)
+
+_DISABLED_VALUES = {b"", b"0", b"false", b"no", b"off"}
+
+
+class ProfilingMiddleware:
+    """
+    On-demand per-request profiler.
+
+    Requests from users with the admin role that carry the profiling header (X-Profile: 1) are run under cProfile,
+    the report is stored for the admin API and its id is returned in the X-Profile-Id response header.
+    This is a plain ASGI middleware so requests without the header only pay for a header lookup.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.header = profiling_settings.HEADER.lower().encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not profiling_settings.ENABLED:
+            return await self.app(scope, receive, send)
+
+        value = get_header(scope, self.header)
+        if value is None or value.strip().lower() in _DISABLED_VALUES or not self._is_admin(scope):
+            return await self.app(scope, receive, send)
+
+        profiler = RequestProfiler()
+        if not profiler.start():
+            return await self.app(scope, receive, send)
+
+        status_code = None
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", profiler.profile_id)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            report = profiler.stop(scope["method"], scope["path"], status_code)
+            profile_store.add(report)
+            _log.info(f"ProfilingMiddleware {report.method} {report.path} profile: {report.profile_id}")
+
+    @staticmethod
+    def _is_admin(scope: Scope) -> bool:
+        """Only admins are allowed to profile requests."""
+        token = get_header(scope, b"authorization")
+        if token is None:
+            return False
+        token = token.decode("latin-1").replace("Bearer ", "")
+        if not auth_handler.is_valid_token(token):
+            return False
+        jwt_user = auth_handler.get_jwt_user_from_token(token)
+        return auth_handler.has_role(jwt_user, auth_handler.ADMIN_ROLE)
@@ -5,6 +5,7 @@ from starlette.responses import JSONResponse
 from app.conf.app_settings import security_settings, server_settings
 from app.security import auth_handler
 from app.security.jwt_token import JWTUser
+from app.utils.server_timing import timing_span
 
 API_PREFIX = server_settings.CONTEXT_PATH
 ALLOWED_PATHS = [resource for resource in security_settings.ALLOWED_PATHS]
@@ -16,10 +17,11 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             return await call_next(request)
 
         token = request.headers.get("Authorization")
-        if not self._is_valid_token(token):
-            return JSONResponse(status_code=401, content={"detail": "Unauthorized access"})
+        with timing_span("auth"):
+            if not self._is_valid_token(token):
+                return JSONResponse(status_code=401, content={"detail": "Unauthorized access"})
 
-        request.state.jwt_user = self._get_user_from_token(token)
+            request.state.jwt_user = self._get_user_from_token(token)
         response = await call_next(request)
         return response
 
@@ -0,0 +1,38 @@
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.conf.app_settings import server_settings
+from app.utils import server_timing
+
+
+class ServerTimingMiddleware:
+    """
+    Creates the request timing context and returns the collected metrics in the Server-Timing response header.
+
+    Middlewares, services and repositories add metrics with server_timing.timed / server_timing.timing_span,
+    the header also carries the total time until the response is started (e.g. auth, db, bcrypt, serialize, total).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not server_settings.TIMING_ENABLED:
+            return await self.app(scope, receive, send)
+
+        timing = server_timing.ServerTiming()
+        token = server_timing.activate(timing)
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                timing.add("total", (time.perf_counter() - start) * 1000)
+                MutableHeaders(scope=message).append("Server-Timing", timing.header_value())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            server_timing.deactivate(token)
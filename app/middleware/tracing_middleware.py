@@ -0,0 +1,50 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils import tracing
+from app.utils.header_utils import get_header
+
+
+class TracingMiddleware:
+    """
+    Starts the root span of the request and makes it the current span for services, repositories,
+    the Mongo command listener and log records.
+
+    The sampling decision is made here (traceparent header or TRACING_SAMPLE_RATE), unsampled requests run
+    without a current span. Sampled responses carry the X-Trace-Id header.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not tracing.tracer.enabled:
+            return await self.app(scope, receive, send)
+
+        traceparent = get_header(scope, b"traceparent")
+        root = tracing.tracer.start_trace(f"{scope['method']} {scope['path']}",
+                                          traceparent.decode("latin-1") if traceparent else None)
+        if root is None:
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                MutableHeaders(scope=message).append("X-Trace-Id", root.trace_id)
+            await send(message)
+
+        root.set_attribute("http.method", scope["method"])
+        root.set_attribute("http.target", scope["path"])
+        token = tracing.activate(root)
+        error = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            tracing.deactivate(token)
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                root.name = f"{scope['method']} {route.path}"
+            tracing.tracer.end(root, error)
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from app.repository.migration_repository import MigrationRepository
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: str
+    description: str
+    apply: Callable[[], Awaitable[None]]
+
+
+class MigrationRegistry:
+    """
+    Versioned migrations applied once per database, in version order.
+
+    Every start reads the applied versions once and returns when nothing is pending. Otherwise one worker claims the
+    migration lock and applies the pending migrations while the other workers wait until they are applied, or claim the
+    lock when its lease expires. A migration must be idempotent: a worker losing its lease in the middle of a migration
+    leaves it to be applied again by the next owner.
+    """
+
+    def __init__(self):
+        self._migrations: dict[str, Migration] = {}
+
+    def register(self, version: str, description: str):
+        """
+        Decorator registering an async function as the migration of a version
+        :param version: Unique version, the migrations are applied in the sort order of their versions
+        """
+        if "." in version or version.startswith("$"):
+            raise ValueError(f"Invalid migration version: {version}")
+        if version in self._migrations:
+            raise ValueError(f"Migration already registered: {version}")
+
+        def decorator(func: Callable[[], Awaitable[None]]):
+            self._migrations[version] = Migration(version, description, func)
+            return func
+
+        return decorator
+
+    def pending(self, applied) -> list[Migration]:
+        return [self._migrations[version] for version in sorted(self._migrations) if version not in applied]
+
+    async def run(self, repository: MigrationRepository, lease_seconds: int, wait_seconds: int,
+                  poll_seconds: float = 0.5):
+        """
+        Apply the pending migrations
+        :param repository: Migration state and lock
+        :param lease_seconds: Lease of the lock, extended after every migration
+        :param wait_seconds: Maximum time to wait for the migrations applied by another worker
+        :param poll_seconds: Interval of the checks while waiting
+        """
+        owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        deadline = time.monotonic() + wait_seconds
+        state = await repository.retrieve()
+        while self.pending(state.applied):
+            state = await repository.claim(owner, lease_seconds)
+            if state is not None:
+                await self._apply(repository, owner, lease_seconds, self.pending(state.applied))
+                return
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"Migrations are still applied by another worker after {wait_seconds} seconds")
+            await asyncio.sleep(poll_seconds)
+            state = await repository.retrieve()
+        log.info(f"Migrations are up to date")
+
+    @staticmethod
+    async def _apply(repository: MigrationRepository, owner: str, lease_seconds: int, migrations: list[Migration]):
+        try:
+            for migration in migrations:
+                log.info(f"Applying migration {migration.version}: {migration.description}")
+                started = time.perf_counter()
+                await migration.apply()
+                if not await repository.mark_applied(migration.version, owner, lease_seconds):
+                    raise RuntimeError(f"Migration lock lost while applying migration {migration.version}")
+                log.info(f"Migration {migration.version} applied in {(time.perf_counter() - started) * 1000:.0f} ms")
+        finally:
+            await repository.release(owner)
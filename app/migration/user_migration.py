@@ -2,32 +2,33 @@ import logging
 import uuid
 from datetime import datetime, timezone
 
+from pymongo import UpdateOne
+
+from app.conf.app_settings import db_settings
 from app.entity import Role, User
+from app.migration.registry import MigrationRegistry
+from app.repository.migration_repository import MigrationRepository
 from app.utils.pass_util import PasswordUtil
 
 log = logging.getLogger(__name__)
 
+migrations = MigrationRegistry()
+
 
+@migrations.register("0001_default_roles", "Default roles")
 async def init_roles():
-    log.info(f"Initializing roles")
-    res = await Role.find_one(Role.name == "admin")
-    if not res:
-        await Role(name="admin").create()
-    res = await Role.find_one(Role.name == "user")
-    if not res:
-        await Role(name="user").create()
+    # one unordered bulk of upserts, existing roles are left unchanged
+    await Role.get_motor_collection().bulk_write(
+        [UpdateOne({"name": name}, {"$setOnInsert": {"name": name}}, upsert=True) for name in ("admin", "user")],
+        ordered=False)
     log.info(f"Default roles initialized")
 
 
+@migrations.register("0002_default_user", "Default admin user")
 async def init_default_user():
-    log.info(f"Initializing default user")
-    res = await User.find_one(User.username == "admin")
-    if res:
-        log.info(f"Default user already exists")
-        return
-
-    hashed_password = PasswordUtil().hash_password("admin") # TODO change-me: change the default password
-    user_create = User(
+    now = datetime.now(timezone.utc)
+    hashed_password = await PasswordUtil().hash_password_async("admin")  # TODO change-me: change the default password
+    user = User(
         user_id=str(uuid.uuid4()),
         username="admin",
         first_name="Admin",
@@ -37,16 +38,22 @@ async def init_default_user():
         is_active=True,
         roles=["admin"],
         created_by="system",
-        created_date=datetime.now(timezone.utc),
+        created_date=now,
         last_updated_by="system",
-        last_updated_date=datetime.now(timezone.utc)
+        last_updated_date=now
     )
-    await User.create(user_create)
+    # an existing admin user is left unchanged
+    await User.get_motor_collection().update_one(
+        {"username": user.username},
+        {"$setOnInsert": user.model_dump(exclude={"id", "revision_id"})},
+        upsert=True)
     log.info(f"Default user initialized")
 
 
 async def init_migration():
+    """
+    Apply the pending migrations, see MigrationRegistry
+    """
     log.info(f"Initializing migration")
-    await init_roles()
-    await init_default_user()
+    await migrations.run(MigrationRepository(), db_settings.MIGRATION_LEASE_SECONDS, db_settings.MIGRATION_WAIT_SECONDS)
     log.info(f"Migration initialized")
@@ -0,0 +1,107 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from beanie import PydanticObjectId
+from pymongo import ReturnDocument
+
+from app.entity.broadcast_job_entity import BroadcastJob, BroadcastStatus
+from app.errors.business_exception import BusinessException, ErrorCodes
+
+_log = logging.getLogger(__name__)
+
+
+class BroadcastJobRepository:
+    """
+    Broadcast Job Repository class
+
+    A job is run by the node holding its lease. Every checkpoint extends the lease, a job whose lease expired
+    (node crashed or stopped) is claimed by another node and resumed after its last checkpoint.
+    """
+
+    async def create(self, job: BroadcastJob) -> BroadcastJob:
+        _log.debug(f"BroadcastJobRepository Creating job: {job}")
+        return await BroadcastJob.insert(job)
+
+    async def retrieve(self, job_id: str) -> BroadcastJob:
+        job = await BroadcastJob.find_one({"job_id": job_id})
+        if not job:
+            raise BusinessException(ErrorCodes.NOT_FOUND, f"Broadcast job not found: {job_id}")
+        return job
+
+    async def find(self, limit: int = 50) -> list[BroadcastJob]:
+        return await BroadcastJob.find({}).sort("-created_date").limit(limit).to_list()
+
+    async def claim(self, owner: str, lease_seconds: int, job_id: str | None = None,
+                    exclude: list[str] | None = None) -> BroadcastJob | None:
+        """
+        Claim a pending job or a running job with an expired lease
+        :param owner: Lease owner, unique per claim
+        :param lease_seconds: Lease duration
+        :param job_id: Claim this job only
+        :param exclude: Job ids not to claim, e.g. the jobs still running on this node
+        :return: Claimed job or None
+        """
+        now = datetime.now(timezone.utc)
+        query = {"$or": [
+            {"status": BroadcastStatus.PENDING.value},
+            {"status": BroadcastStatus.RUNNING.value, "lease_expires_date": {"$lte": now}},
+        ]}
+        if exclude:
+            query["job_id"] = {"$nin": exclude}
+        if job_id is not None:
+            if exclude and job_id in exclude:
+                return None
+            query["job_id"] = job_id
+        doc = await BroadcastJob.get_motor_collection().find_one_and_update(
+            query,
+            {"$set": {"status": BroadcastStatus.RUNNING.value,
+                      "lease_owner": owner,
+                      "lease_expires_date": now + timedelta(seconds=lease_seconds)}},
+            sort=[("created_date", 1)],
+            return_document=ReturnDocument.AFTER)
+        return BroadcastJob.model_validate(doc) if doc else None
+
+    async def checkpoint(self, job: BroadcastJob, owner: str, lease_seconds: int, last_id: PydanticObjectId,
+                         processed: int, sent: int, deferred: int, failed: int) -> bool:
+        """
+        Store the progress after a batch and extend the lease
+        :return: False when the job is no longer running for the owner (cancelled or claimed by another node)
+        """
+        now = datetime.now(timezone.utc)
+        result = await BroadcastJob.get_motor_collection().update_one(
+            {"_id": job.id, "status": BroadcastStatus.RUNNING.value, "lease_owner": owner},
+            {"$set": {"last_id": last_id, "lease_expires_date": now + timedelta(seconds=lease_seconds)},
+             "$inc": {"processed": processed, "sent": sent, "deferred": deferred, "failed": failed}})
+        return result.modified_count == 1
+
+    async def renew(self, job: BroadcastJob, owner: str, lease_seconds: int) -> bool:
+        """
+        Extend the lease while a batch is sent
+        :return: False when the job is no longer running for the owner
+        """
+        result = await BroadcastJob.get_motor_collection().update_one(
+            {"_id": job.id, "status": BroadcastStatus.RUNNING.value, "lease_owner": owner},
+            {"$set": {"lease_expires_date": datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)}})
+        return result.matched_count == 1
+
+    async def start(self, job: BroadcastJob, owner: str, total: int):
+        await BroadcastJob.get_motor_collection().update_one(
+            {"_id": job.id, "lease_owner": owner},
+            {"$set": {"total": total, "started_date": job.started_date or datetime.now(timezone.utc)}})
+
+    async def finish(self, job: BroadcastJob, owner: str, status: BroadcastStatus, error: str | None = None):
+        await BroadcastJob.get_motor_collection().update_one(
+            {"_id": job.id, "status": BroadcastStatus.RUNNING.value, "lease_owner": owner},
+            {"$set": {"status": status.value, "finished_date": datetime.now(timezone.utc), "last_error": error,
+                      "lease_owner": None, "lease_expires_date": None}})
+
+    async def cancel(self, job_id: str) -> BroadcastJob:
+        doc = await BroadcastJob.get_motor_collection().find_one_and_update(
+            {"job_id": job_id, "status": {"$in": [BroadcastStatus.PENDING.value, BroadcastStatus.RUNNING.value]}},
+            {"$set": {"status": BroadcastStatus.CANCELLED.value, "finished_date": datetime.now(timezone.utc),
+                      "lease_owner": None, "lease_expires_date": None}},
+            return_document=ReturnDocument.AFTER)
+        if not doc:
+            job = await self.retrieve(job_id)
+            raise BusinessException(ErrorCodes.INVALID_STATE, f"Broadcast job is already {job.status.value}: {job_id}")
+        return BroadcastJob.model_validate(doc)
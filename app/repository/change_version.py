@@ -0,0 +1,46 @@
+import logging
+import time
+
+from beanie import Document
+from pymongo import ReturnDocument
+
+from app.entity.collection_version_entity import CollectionVersion
+
+_log = logging.getLogger(__name__)
+
+
+class ChangeVersion:
+    """
+    Change version of a collection shared by the workers, incremented by every write of the collection.
+
+    The version is cached for cache_seconds: reading it costs one find per worker and period, a write of this worker
+    is seen at once, a write of another worker after the cached version expires. Versions only grow, a version read
+    before a query is never newer than the data the query returns.
+    """
+
+    def __init__(self, document_model: type[Document], cache_seconds: float):
+        self.collection = document_model.get_settings().name
+        self.cache_seconds = cache_seconds
+        self._version: int | None = None
+        self._expires = 0.0
+
+    async def current(self) -> int:
+        if self._version is None or time.monotonic() >= self._expires:
+            doc = await CollectionVersion.get_motor_collection().find_one({"_id": self.collection})
+            self._store(doc["version"] if doc else 0)
+        return self._version
+
+    async def bump(self):
+        # the write is done, a failed increment delays the change of the ETags of the other workers
+        try:
+            doc = await CollectionVersion.get_motor_collection().find_one_and_update(
+                {"_id": self.collection}, {"$inc": {"version": 1}}, upsert=True, return_document=ReturnDocument.AFTER)
+            self._store(doc["version"])
+        except Exception as e:
+            self._version = None
+            _log.error(f"ChangeVersion Failed to increment the version of {self.collection}, Error: {e}")
+
+    def _store(self, version: int):
+        # a concurrent read may return an older version than a bump of this worker, keep the newest
+        self._version = max(version, self._version or 0)
+        self._expires = time.monotonic() + self.cache_seconds
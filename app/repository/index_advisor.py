@@ -0,0 +1,290 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from beanie import Document
+
+from app.repository.query_guard import QueryGuard, query_shape, sort_spec
+from app.repository.sort_policy import SortPolicy
+
+_log = logging.getLogger(__name__)
+
+_EQUALITY_OPERATORS = {"$eq", "$in"}
+_MAX_PATTERNS = 16
+
+
+def filter_patterns(query: dict) -> list[tuple[frozenset, frozenset]]:
+    """
+    Equality and range fields of a filter. A filter with $or has a pattern per branch (each branch needs its own index),
+    $nor and unknown operators are ignored.
+    :return: (equality fields, range fields) of each pattern
+    """
+    equality, ranges = set(), set()
+    alternatives = []
+    for key, value in query.items():
+        if key == "$and":
+            for clause in value:
+                patterns = filter_patterns(clause)
+                if len(patterns) == 1:
+                    equality |= patterns[0][0]
+                    ranges |= patterns[0][1]
+                else:
+                    alternatives.append(patterns)
+        elif key == "$or":
+            alternatives.append([pattern for clause in value for pattern in filter_patterns(clause)])
+        elif key.startswith("$"):
+            continue
+        elif isinstance(value, dict) and any(k.startswith("$") for k in value):
+            if set(value) <= _EQUALITY_OPERATORS:
+                equality.add(key)
+            else:
+                # $gt/$gte/$lt/$lte and the negations $ne/$nin scan a range of the index
+                ranges.add(key)
+        else:
+            equality.add(key)
+
+    patterns = [(frozenset(equality), frozenset(ranges - equality))]
+    for branches in alternatives:
+        patterns = [(e | be, (r | br) - (e | be)) for e, r in patterns for be, br in branches][:_MAX_PATTERNS]
+    return patterns
+
+
+def esr_keys(equality: frozenset, ranges: frozenset, sort: str | None) -> list[tuple[str, int]]:
+    """
+    Compound index keys in equality, sort, range order. _id is unique, the keys after it never narrow the scan: with
+    an _id tiebreaker the range fields are left out, a sort on _id alone (the default sort) goes after the range fields.
+    """
+    keys = [(name, 1) for name in sorted(equality)]
+    sort_keys = [(name, direction) for name, direction in sort_spec(sort) or [] if name not in equality]
+    if any(name != "_id" for name, _ in sort_keys):
+        keys.extend(sort_keys)
+        if "_id" in dict(sort_keys):
+            return keys
+        sort_keys = []
+    used = {name for name, _ in keys}
+    keys.extend((name, 1) for name in sorted(ranges) if name not in used)
+    keys.extend(sort_keys)
+    return keys
+
+
+def index_name(keys: list[tuple[str, int]]) -> str:
+    return "_".join(f"{name}_{direction}" for name, direction in keys)
+
+
+def _is_prefix(keys: list[tuple[str, int]], index_keys: list[tuple[str, int]]) -> bool:
+    """
+    The index serves the keys when they are a prefix of its keys, in the same or the reverse direction
+    """
+    if len(keys) > len(index_keys):
+        return False
+    prefix = index_keys[:len(keys)]
+    return prefix == keys or prefix == [(name, -direction) for name, direction in keys]
+
+
+def _serves(index_keys: list[tuple[str, int]], unique: bool, keys: list[tuple[str, int]],
+            equality: frozenset) -> bool:
+    """
+    An existing index serves the keys when they are its prefix, or when it is unique and the filter has an equality on
+    all of its keys (at most one document matches)
+    """
+    return _is_prefix(keys, index_keys) or (unique and all(name in equality for name, _ in index_keys))
+
+
+@dataclass
+class ShapeStats:
+    shape: str
+    sort: str | None
+    patterns: list[tuple[frozenset, frozenset]]
+    count: int = 0
+    rejected: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_seen_date: datetime | None = None
+
+    def to_json(self) -> dict:
+        return {
+            "shape": self.shape,
+            "sort": self.sort,
+            "count": self.count,
+            "rejected": self.rejected,
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_seen_date": self.last_seen_date,
+        }
+
+
+@dataclass
+class IndexBuild:
+    name: str
+    keys: dict[str, int]
+    status: str = "building"
+    error: str | None = None
+    started_date: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_date: datetime | None = None
+
+
+class IndexAdvisor:
+    """
+    Index advisor of the users collection, driven by the filters and sorts seen by UserRepository.find.
+
+    Filters are recorded by shape (values replaced by ?) and sort with their frequency and latency, at most max_shapes
+    (least recently seen shapes are dropped). Recommendations are compound indexes in ESR order (equality fields, sort,
+    range fields) for the shapes seen at least min_count times, ranked by the total time spent in them, without the
+    ones an existing index (or a longer recommendation) already serves. Index usage comes from $indexStats, the counters
+    are per node and reset with the server. A created index drops the plans of the query guard and is added to the
+    indexes of the sort policy.
+    """
+
+    def __init__(self, document_model: type[Document], guard: QueryGuard | None = None, max_shapes: int = 500,
+                 min_count: int = 5, sort_policy: SortPolicy | None = None):
+        self.document_model = document_model
+        self.guard = guard
+        self.sort_policy = sort_policy
+        self.max_shapes = max_shapes
+        self.min_count = min_count
+        self._shapes: OrderedDict[str, ShapeStats] = OrderedDict()
+        self.builds: dict[str, IndexBuild] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def record(self, query: dict, sort: str | None, duration_ms: float, rejected: bool = False):
+        shape = query_shape(query)
+        key = f"{shape}|{sort or ''}"
+        stats = self._shapes.get(key)
+        if stats is None:
+            stats = ShapeStats(shape=shape, sort=sort, patterns=filter_patterns(query))
+            self._shapes[key] = stats
+            while len(self._shapes) > self.max_shapes:
+                self._shapes.popitem(last=False)
+        else:
+            self._shapes.move_to_end(key)
+        stats.count += 1
+        stats.rejected += int(rejected)
+        stats.total_ms += duration_ms
+        stats.max_ms = max(stats.max_ms, duration_ms)
+        stats.last_seen_date = datetime.now(timezone.utc)
+
+    def shapes(self, limit: int = 50) -> list[dict]:
+        ranked = sorted(self._shapes.values(), key=lambda s: s.total_ms, reverse=True)
+        return [stats.to_json() for stats in ranked[:limit]]
+
+    async def existing_indexes(self) -> list[tuple[list[tuple[str, int]], bool]]:
+        """
+        Keys and unique flag of the existing ascending/descending indexes (text, hashed, 2dsphere... can't serve these
+        queries)
+        """
+        info = await self.document_model.get_motor_collection().index_information()
+        return [([(name, int(direction)) for name, direction in spec["key"]], bool(spec.get("unique")))
+                for spec in info.values()
+                if all(isinstance(direction, (int, float)) for _, direction in spec["key"])]
+
+    async def recommend(self) -> list[dict]:
+        existing = await self.existing_indexes()
+        candidates: dict[str, dict] = {}
+        for stats in self._shapes.values():
+            if stats.count < self.min_count:
+                continue
+            for equality, ranges in stats.patterns:
+                keys = esr_keys(equality, ranges, stats.sort)
+                if not keys or any(_serves(index_keys, unique, keys, equality) for index_keys, unique in existing):
+                    continue
+                name = index_name(keys)
+                candidate = candidates.setdefault(name, {"name": name, "keys": keys, "count": 0, "rejected": 0,
+                                                         "total_ms": 0.0, "shapes": []})
+                candidate["count"] += stats.count
+                candidate["rejected"] += stats.rejected
+                candidate["total_ms"] += stats.total_ms
+                candidate["shapes"].append(stats.shape)
+
+        # a recommendation that is the prefix of a longer one is served by the longer one
+        result = []
+        for candidate in candidates.values():
+            longer = [other for other in candidates.values()
+                      if other is not candidate and len(other["keys"]) > len(candidate["keys"])
+                      and _is_prefix(candidate["keys"], other["keys"])]
+            if longer:
+                # prefixes are transitive, the longest one serves the whole chain
+                target = max(longer, key=lambda other: len(other["keys"]))
+                target["count"] += candidate["count"]
+                target["rejected"] += candidate["rejected"]
+                target["total_ms"] += candidate["total_ms"]
+                target["shapes"].extend(candidate["shapes"])
+            else:
+                result.append(candidate)
+        result.sort(key=lambda c: c["total_ms"], reverse=True)
+        for candidate in result:
+            candidate["keys"] = dict(candidate["keys"])
+            candidate["total_ms"] = round(candidate["total_ms"], 3)
+        return result
+
+    async def index_usage(self) -> list[dict]:
+        """
+        Access counters of the existing indexes, the unused flag excludes _id_ and unique indexes (constraints)
+        """
+        collection = self.document_model.get_motor_collection()
+        info = await collection.index_information()
+        try:
+            stats = await collection.aggregate([{"$indexStats": {}}]).to_list(None)
+        except Exception as e:
+            _log.debug(f"IndexAdvisor $indexStats is not available, Error: {e}")
+            stats = []
+        ops = {s["name"]: (s.get("accesses", {}).get("ops", 0), s.get("accesses", {}).get("since")) for s in stats}
+        result = []
+        for name, spec in info.items():
+            accesses, since = ops.get(name, (None, None))
+            unique = bool(spec.get("unique"))
+            result.append({
+                "name": name,
+                "keys": dict(spec["key"]),
+                "unique": unique,
+                "ops": accesses,
+                "since": since,
+                "unused": accesses == 0 and name != "_id_" and not unique,
+            })
+        return result
+
+    async def apply(self, names: list[str] | None = None) -> list[IndexBuild]:
+        """
+        Create the recommended indexes in the background, all of them or the given names
+        """
+        builds = []
+        for recommendation in await self.recommend():
+            name = recommendation["name"]
+            if names is not None and name not in names:
+                continue
+            build = self.builds.get(name)
+            if build is None or build.status == "failed":
+                build = IndexBuild(name=name, keys=recommendation["keys"])
+                self.builds[name] = build
+                task = asyncio.create_task(self._build(build), name=f"index-build-{name}")
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            builds.append(build)
+        return builds
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _build(self, build: IndexBuild):
+        _log.info(f"IndexAdvisor Creating index {build.name}: {build.keys}")
+        try:
+            await self.document_model.get_motor_collection().create_index(list(build.keys.items()), name=build.name)
+            build.status = "created"
+            if self.guard is not None:
+                self.guard.clear()
+            if self.sort_policy is not None:
+                await self.sort_policy.refresh(force=True)
+            _log.info(f"IndexAdvisor Created index {build.name}")
+        except asyncio.CancelledError:
+            build.status = "failed"
+            build.error = "cancelled"
+            raise
+        except Exception as e:
+            build.status = "failed"
+            build.error = f"{type(e).__name__}: {e}"
+            _log.error(f"IndexAdvisor Failed to create index {build.name}, Error: {e}")
+        finally:
+            build.finished_date = datetime.now(timezone.utc)
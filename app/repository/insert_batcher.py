@@ -0,0 +1,99 @@
+import asyncio
+import logging
+
+from beanie import Document, PydanticObjectId
+from beanie.odm.utils.dump import get_dict
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+
+_log = logging.getLogger(__name__)
+
+_DUPLICATE_KEY = 11000
+
+
+class InsertBatcher:
+    """
+    Groups concurrent inserts of a document model into one unordered insert_many.
+
+    The first insert of a batch starts a timer of max_delay_ms, the batch is written when the timer fires or when it
+    reaches max_size documents. Every caller waits for its own document: it gets the inserted document, or the error of
+    its own document (DuplicateKeyError for a unique index violation), the other documents of the batch are not
+    affected (unordered insert). Documents are validated and get their _id before they are queued, like Document.insert.
+    A caller cancelled while its batch is in flight does not cancel the write of its document.
+    """
+
+    def __init__(self, document_model: type[Document], max_size: int, max_delay_ms: int):
+        self.document_model = document_model
+        self.max_size = max_size
+        self.max_delay = max_delay_ms / 1000
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._writes: set[asyncio.Task] = set()
+        self.batches = 0
+        self.documents = 0
+
+    async def insert(self, document: Document) -> Document:
+        await document.validate_self()
+        if document.id is None:
+            document.id = PydanticObjectId()
+        raw = get_dict(document, to_db=True, keep_nulls=document.get_settings().keep_nulls)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((raw, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        # shield: a cancelled caller must not cancel the shared future of the write
+        await asyncio.shield(future)
+        return document
+
+    async def drain(self):
+        """
+        Write the pending documents and wait for the writes in flight
+        """
+        if self._pending:
+            self._flush()
+        if self._writes:
+            await asyncio.gather(*self._writes, return_exceptions=True)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._write(batch))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write(self, batch: list[tuple[dict, asyncio.Future]]):
+        errors: dict[int, Exception] = {}
+        try:
+            await self.document_model.get_motor_collection().insert_many([raw for raw, _ in batch], ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                errors[error["index"]] = self._write_error(error)
+            if not errors:  # e.g. a write concern error, the outcome of every document is unknown
+                errors = {index: e for index in range(len(batch))}
+        except Exception as e:
+            _log.error(f"InsertBatcher Failed to insert a batch of {len(batch)}, Error: {e}")
+            errors = {index: e for index in range(len(batch))}
+
+        self.batches += 1
+        self.documents += len(batch)
+        _log.debug(f"InsertBatcher Inserted batch of {len(batch)}, errors: {len(errors)}")
+        for index, (_, future) in enumerate(batch):
+            if future.done():
+                continue
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(None)
+
+    @staticmethod
+    def _write_error(error: dict) -> Exception:
+        if error.get("code") == _DUPLICATE_KEY:
+            return DuplicateKeyError(error.get("errmsg", "Duplicate key error"), _DUPLICATE_KEY, error)
+        return WriteError(error.get("errmsg", "Write error"), error.get("code"), error)
@@ -0,0 +1,60 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.entity.migration_entity import MigrationState
+
+_log = logging.getLogger(__name__)
+
+_STATE_ID = "migrations"
+
+
+class MigrationRepository:
+    """
+    Migration Repository class
+
+    The applied versions and the lock live in one document. The lock is a lease: a worker claims it when it is free or
+    expired, every applied migration extends it, a lease of a crashed worker expires and is claimed by another worker.
+    """
+
+    async def retrieve(self) -> MigrationState:
+        return await MigrationState.get(_STATE_ID) or MigrationState(id=_STATE_ID)
+
+    async def claim(self, owner: str, lease_seconds: int) -> MigrationState | None:
+        """
+        Claim the migration lock
+        :param owner: Lease owner (worker)
+        :param lease_seconds: Lease duration
+        :return: Migration state or None when another worker holds the lock
+        """
+        now = datetime.now(timezone.utc)
+        try:
+            doc = await MigrationState.get_motor_collection().find_one_and_update(
+                {"_id": _STATE_ID, "$or": [{"lease_owner": None}, {"lease_expires_date": {"$lte": now}}]},
+                {"$set": {"lease_owner": owner, "lease_expires_date": now + timedelta(seconds=lease_seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER)
+        except DuplicateKeyError:
+            # the document exists and its lease is held, the upsert tried to insert it again
+            return None
+        _log.debug(f"MigrationRepository Migration lock claimed by {owner}")
+        return MigrationState.model_validate(doc)
+
+    async def mark_applied(self, version: str, owner: str, lease_seconds: int) -> bool:
+        """
+        Record an applied migration and extend the lease
+        :return: False when the lock is no longer held by the owner
+        """
+        now = datetime.now(timezone.utc)
+        result = await MigrationState.get_motor_collection().update_one(
+            {"_id": _STATE_ID, "lease_owner": owner},
+            {"$set": {f"applied.{version}": now, "lease_expires_date": now + timedelta(seconds=lease_seconds)}})
+        return result.modified_count == 1
+
+    async def release(self, owner: str):
+        await MigrationState.get_motor_collection().update_one(
+            {"_id": _STATE_ID, "lease_owner": owner},
+            {"$set": {"lease_owner": None, "lease_expires_date": None}})
+        _log.debug(f"MigrationRepository Migration lock released by {owner}")
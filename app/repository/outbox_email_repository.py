@@ -0,0 +1,88 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from beanie import PydanticObjectId
+from pymongo import UpdateOne
+
+from app.entity.outbox_email_entity import OutboxEmail, OutboxStatus
+
+_log = logging.getLogger(__name__)
+
+
+class OutboxEmailRepository:
+    """
+    Outbox Email Repository class
+
+    Messages are claimed in batches with a lease: the ids of due messages are read first, then one update_many
+    re-checks the claim condition per document and stamps a unique lease owner. A document can only match the
+    condition of one claim, so workers on any number of nodes never send the same message twice while its lease holds.
+    """
+
+    @staticmethod
+    def _claimable(now: datetime) -> dict:
+        return {"$or": [
+            {"status": OutboxStatus.PENDING.value, "next_attempt_date": {"$lte": now}},
+            # lease of a crashed or stalled worker expired
+            {"status": OutboxStatus.SENDING.value, "lease_expires_date": {"$lte": now}},
+        ]}
+
+    async def create(self, email: OutboxEmail) -> OutboxEmail:
+        _log.debug(f"OutboxEmailRepository Queueing email: {email}")
+        return await OutboxEmail.insert(email)
+
+    async def claim_batch(self, owner: str, limit: int, lease_seconds: int) -> list[OutboxEmail]:
+        """
+        Claim up to limit due messages for the owner
+        :param owner: Unique lease owner of this claim
+        :param limit: Maximum number of messages
+        :param lease_seconds: Lease duration, the messages are reclaimable after the lease expires
+        :return: Claimed messages
+        """
+        now = datetime.now(timezone.utc)
+        collection = OutboxEmail.get_motor_collection()
+        cursor = collection.find(self._claimable(now), {"_id": 1}).sort("next_attempt_date", 1).limit(limit)
+        ids = [doc["_id"] async for doc in cursor]
+        if not ids:
+            return []
+
+        result = await collection.update_many(
+            {"_id": {"$in": ids}, **self._claimable(now)},
+            {"$set": {"status": OutboxStatus.SENDING.value,
+                      "lease_owner": owner,
+                      "lease_expires_date": now + timedelta(seconds=lease_seconds)},
+             "$inc": {"attempts": 1}})
+        if result.modified_count == 0:
+            return []
+        return await OutboxEmail.find({"lease_owner": owner}).to_list()
+
+    async def mark_sent(self, owner: str, ids: list[PydanticObjectId]) -> int:
+        """
+        Acknowledge the sent messages, the messages must still be leased by the owner
+        """
+        if not ids:
+            return 0
+        result = await OutboxEmail.get_motor_collection().update_many(
+            {"_id": {"$in": ids}, "lease_owner": owner},
+            {"$set": {"status": OutboxStatus.SENT.value, "sent_date": datetime.now(timezone.utc),
+                      "lease_owner": None, "lease_expires_date": None, "last_error": None}})
+        return result.modified_count
+
+    async def mark_failed(self, owner: str, failures: list[tuple[PydanticObjectId, str, datetime | None]]) -> int:
+        """
+        Release the failed messages for a retry at next_attempt_date, a message without a next attempt is dead-lettered
+        :param owner: Lease owner of the messages
+        :param failures: (id, error, next_attempt_date or None) tuples
+        """
+        if not failures:
+            return 0
+        operations = []
+        for email_id, error, next_attempt_date in failures:
+            update = {"lease_owner": None, "lease_expires_date": None, "last_error": error}
+            if next_attempt_date is None:
+                update["status"] = OutboxStatus.DEAD.value
+            else:
+                update["status"] = OutboxStatus.PENDING.value
+                update["next_attempt_date"] = next_attempt_date
+            operations.append(UpdateOne({"_id": email_id, "lease_owner": owner}, {"$set": update}))
+        result = await OutboxEmail.get_motor_collection().bulk_write(operations, ordered=False)
+        return result.modified_count
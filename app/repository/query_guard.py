@@ -0,0 +1,158 @@
+import asyncio
+import json
+import logging
+import time
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+
+from beanie import Document
+
+from app.errors.business_exception import BusinessException, ErrorCodes
+
+_log = logging.getLogger(__name__)
+
+GUARD_MODES = ("reject", "throttle", "off")
+
+
+def query_shape(query: dict) -> str:
+    """
+    Shape of a filter: field names and operators with the values replaced by ?, e.g.
+    {"age": {"$gte": 25}} and {"age": {"$gte": 60}} have the same shape {"age":{"$gte":"?"}}
+    """
+
+    def shape(value):
+        if isinstance(value, dict):
+            return {k: shape(v) for k, v in sorted(value.items())}
+        if isinstance(value, list) and any(isinstance(item, dict) for item in value):
+            return [shape(item) for item in value]
+        return "?"
+
+    return json.dumps(shape(query), separators=(",", ":"))
+
+
+def sort_spec(sort: str | None) -> list[tuple[str, int]] | None:
+    """
+    pymongo sort of a comma separated +field / -field sort string, e.g. -created_date,+username
+    (a + decoded from a URL query string is a space, a field without sign is ascending)
+    """
+    if not sort:
+        return None
+    fields = [field.strip() for field in sort.split(",")]
+    return [(field.lstrip("+-").strip(), -1 if field.startswith("-") else 1) for field in fields if field] or None
+
+
+def _has_stage(plan, stage: str) -> bool:
+    if isinstance(plan, dict):
+        return plan.get("stage") == stage or any(_has_stage(v, stage) for v in plan.values())
+    if isinstance(plan, list):
+        return any(_has_stage(item, stage) for item in plan)
+    return False
+
+
+class QueryGuard:
+    """
+    Cost guard for the client filters of list and count queries.
+
+    A filter is explained once per query shape and sort, the verdict (collection scan or not) is cached for
+    plan_cache_seconds. While the collection has fewer documents than collscan_threshold every filter is allowed.
+    Above it, a filter whose winning plan is a collection scan is rejected with QUERY_TOO_EXPENSIVE (reject mode) or
+    runs with at most collscan_concurrency other scans (throttle mode). A throttled filter waits up to scan_wait_ms for
+    a scan slot and fails with QUERY_THROTTLED when none frees up. Filters that can't be explained are allowed.
+    max_time_ms is attached to the guarded queries by the repository.
+    """
+
+    def __init__(self,
+                 document_model: type[Document],
+                 mode: str = "reject",
+                 max_time_ms: int = 5000,
+                 collscan_threshold: int = 10_000,
+                 collscan_concurrency: int = 2,
+                 scan_wait_ms: int = 200,
+                 plan_cache_size: int = 256,
+                 plan_cache_seconds: int = 300,
+                 size_refresh_seconds: int = 60):
+        if mode not in GUARD_MODES:
+            raise ValueError(f"Unknown query guard mode: {mode}, expected one of {', '.join(GUARD_MODES)}")
+        self.document_model = document_model
+        self.mode = mode
+        self.max_time_ms = max_time_ms
+        self.collscan_threshold = collscan_threshold
+        self.scan_wait_ms = scan_wait_ms
+        self.plan_cache_size = plan_cache_size
+        self.plan_cache_seconds = plan_cache_seconds
+        self.size_refresh_seconds = size_refresh_seconds
+        self._scans = asyncio.Semaphore(collscan_concurrency)
+        self._plans: OrderedDict[str, tuple[bool, float]] = OrderedDict()
+        self._size: tuple[int, float] | None = None
+        # collection scan shapes and how often they were seen
+        self.collscans: Counter = Counter()
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def admit(self, query: dict, sort: str | None = None):
+        """
+        Run the block if the filter is allowed, raise QUERY_TOO_EXPENSIVE (reject mode) or QUERY_THROTTLED (no scan
+        slot in throttle mode) otherwise
+        """
+        if self.mode == "off" or not query or await self._collection_size() < self.collscan_threshold:
+            yield
+            return
+        shape = query_shape(query)
+        if not await self._is_collscan(query, sort, shape):
+            yield
+            return
+
+        self.collscans[shape] += 1
+        if self.mode == "reject":
+            self.rejected += 1
+            raise BusinessException(ErrorCodes.QUERY_TOO_EXPENSIVE,
+                                    f"Query needs a full collection scan, filter on an indexed field: {shape}")
+        try:
+            # the wait comes on top of the query time, it is kept short
+            await asyncio.wait_for(self._scans.acquire(), self.scan_wait_ms / 1000)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise BusinessException(ErrorCodes.QUERY_THROTTLED,
+                                    f"Too many collection scans running, try again later: {shape}")
+        try:
+            yield
+        finally:
+            self._scans.release()
+
+    def clear(self):
+        """
+        Forget the cached plans, e.g. after an index was created
+        """
+        self._plans.clear()
+
+    async def _is_collscan(self, query: dict, sort: str | None, shape: str) -> bool:
+        key = f"{shape}|{sort or ''}"
+        now = time.monotonic()
+        cached = self._plans.get(key)
+        if cached is not None and cached[1] > now:
+            self._plans.move_to_end(key)
+            return cached[0]
+
+        try:
+            explain = await self._explain(query, sort)
+            collscan = _has_stage(explain.get("queryPlanner", {}).get("winningPlan"), "COLLSCAN")
+        except Exception as e:
+            _log.debug(f"QueryGuard Explain failed, the query is allowed: {shape}, Error: {e}")
+            collscan = False
+        self._plans[key] = (collscan, now + self.plan_cache_seconds)
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.plan_cache_size:
+            self._plans.popitem(last=False)
+        _log.debug(f"QueryGuard Plan of {key}: {'COLLSCAN' if collscan else 'indexed'}")
+        return collscan
+
+    async def _explain(self, query: dict, sort: str | None) -> dict:
+        cursor = self.document_model.get_motor_collection().find(query, sort=sort_spec(sort), limit=1)
+        return await cursor.explain()
+
+    async def _collection_size(self) -> int:
+        now = time.monotonic()
+        if self._size is None or self._size[1] <= now:
+            size = await self.document_model.get_motor_collection().estimated_document_count()
+            self._size = (size, now + self.size_refresh_seconds)
+        return self._size[0]
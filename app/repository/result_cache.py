@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import sys
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+_log = logging.getLogger(__name__)
+
+HIT = "HIT"
+MISS = "MISS"
+STALE = "STALE"
+
+_current_status: ContextVar[str | None] = ContextVar("result_cache_status", default=None)
+
+
+def cache_status() -> str | None:
+    """
+    Cache status (HIT, MISS or STALE) of the last cached read of the current request, None when nothing was cached
+    """
+    return _current_status.get()
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    fresh_until: float
+    stale_until: float
+
+
+class ResultCache:
+    """
+    In-memory cache of query results with stale-while-revalidate.
+
+    An entry is served as HIT for ttl_seconds. For stale_seconds more it is served as STALE while one background load
+    refreshes it. Concurrent misses of a key share one load (the load is not cancelled with its caller), errors are
+    not cached. Entries are evicted least recently used first to stay under max_bytes, an entry is sized with sizeof.
+    invalidate() drops every entry, the loads in flight when it is called are not stored.
+    """
+
+    def __init__(self, ttl_seconds: float, stale_seconds: float, max_bytes: int,
+                 sizeof: Callable[[Any], int] = sys.getsizeof):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._loads: dict[Hashable, asyncio.Task] = {}
+        self._generation = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry.stale_until > now:
+            self._entries.move_to_end(key)
+            if entry.fresh_until > now:
+                self.hits += 1
+                _current_status.set(HIT)
+            else:
+                self.stale += 1
+                _current_status.set(STALE)
+                if key not in self._loads:
+                    self._start_load(key, loader)
+            return entry.value
+
+        load = self._loads.get(key)
+        if load is None:
+            self.misses += 1
+            _current_status.set(MISS)
+            load = self._start_load(key, loader)
+        else:
+            # served by the load of another caller
+            self.hits += 1
+            _current_status.set(HIT)
+        return await asyncio.shield(load)
+
+    def invalidate(self):
+        self._generation += 1
+        self._entries.clear()
+        self._loads.clear()
+        self.bytes = 0
+
+    async def stop(self):
+        loads = list(self._loads.values())
+        self.invalidate()
+        for load in loads:
+            load.cancel()
+        await asyncio.gather(*loads, return_exceptions=True)
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        load = asyncio.create_task(self._load(key, loader, self._generation))
+        self._loads[key] = load
+        load.add_done_callback(lambda task: self._load_done(key, task))
+        return load
+
+    def _load_done(self, key: Hashable, task: asyncio.Task):
+        if self._loads.get(key) is task:
+            del self._loads[key]
+        if not task.cancelled() and task.exception() is not None:
+            _log.debug(f"ResultCache Load failed, Error: {task.exception()}")
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        value = await loader()
+        if generation == self._generation:
+            self._store(key, value)
+        return value
+
+    def _store(self, key: Hashable, value: Any):
+        size = self.sizeof(value)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous.size
+        if size > self.max_bytes:
+            return
+        now = time.monotonic()
+        self._entries[key] = _Entry(value, size, now + self.ttl_seconds, now + self.ttl_seconds + self.stale_seconds)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
@@ -0,0 +1,101 @@
+import logging
+import time
+
+from beanie import Document
+
+from app.errors.business_exception import BusinessException, ErrorCodes
+from app.repository.query_guard import sort_spec
+
+_log = logging.getLogger(__name__)
+
+
+def sort_string(keys: list[tuple[str, int]]) -> str:
+    """
+    Sort string of pymongo sort keys, e.g. [("created_date", -1), ("_id", -1)] is -created_date,-_id
+    """
+    return ",".join(f"{'-' if direction < 0 else '+'}{name}" for name, direction in keys)
+
+
+class SortPolicy:
+    """
+    Allowed sorts of a document model and the indexes supporting them.
+
+    A sort is a comma separated list of +field / -field of the sortable fields. _id is appended as tiebreaker, in the
+    direction of the last field, unless the sort ends with a unique field: equal values keep the same order from page
+    to page. The sort with its tiebreaker must be the prefix of an index of the model (in the same or the reverse
+    direction), otherwise it is rejected with INVALID_INPUT instead of running as an in-memory sort. The index is used
+    as hint when the filter only uses fields of the index, other filters are left to the query planner.
+
+    The indexes are the ones of the model settings until refresh() reads the indexes of the collection, every
+    refresh_seconds or at once after the index advisor created an index. Indexes created at runtime (index advisor,
+    other workers, a restart after them) extend the allowed sorts of the sortable fields.
+    """
+
+    def __init__(self, document_model: type[Document], sortable: set[str], refresh_seconds: int = 300):
+        self.document_model = document_model
+        self.sortable = sortable
+        self.refresh_seconds = refresh_seconds
+        self._expires = 0.0
+        self._load((index.document["name"], list(index.document["key"].items()), index.document)
+                   for index in getattr(document_model.Settings, "indexes", []))
+
+    async def refresh(self, force: bool = False):
+        """
+        Read the indexes of the collection when refresh_seconds passed since the last read, or at once with force
+        """
+        now = time.monotonic()
+        if not force and now < self._expires:
+            return
+        self._expires = now + self.refresh_seconds
+        try:
+            info = await self.document_model.get_motor_collection().index_information()
+        except Exception as e:
+            _log.debug(f"SortPolicy Failed to read the indexes, the known indexes are kept, Error: {e}")
+            return
+        self._load((name, [(field, direction) for field, direction in spec["key"]], spec)
+                   for name, spec in info.items())
+
+    def _load(self, specs):
+        # (name, keys) of the indexes usable for a sort, partial indexes only serve the filters matching them
+        indexes: list[tuple[str, list[tuple[str, int]]]] = [("_id_", [("_id", 1)])]
+        unique = {"_id"}
+        for name, keys, spec in specs:
+            if name == "_id_" or "partialFilterExpression" in spec:
+                continue
+            # text, hashed and geo indexes can't serve a sort
+            if not all(isinstance(direction, (int, float)) for _, direction in keys):
+                continue
+            keys = [(field, int(direction)) for field, direction in keys]
+            indexes.append((name, keys))
+            if spec.get("unique") and len(keys) == 1:
+                unique.add(keys[0][0])
+        self.indexes, self.unique = indexes, unique
+
+    def resolve(self, sort: str | None, query: dict | None = None) -> tuple[list[tuple[str, int]], str | None]:
+        """
+        Validate the sort and add the tiebreaker
+        :param sort: Sort string, e.g. -created_date
+        :param query: Filter of the query, for the hint
+        :return: pymongo sort keys and the index name to hint (None to let the planner choose)
+        """
+        keys = sort_spec(sort) or [("_id", 1)]
+        names = [name for name, _ in keys]
+        for name in names:
+            if name not in self.sortable:
+                raise BusinessException(ErrorCodes.INVALID_INPUT,
+                                        f"Sort field is not allowed: {name}, sortable fields: "
+                                        f"{', '.join(sorted(self.sortable))}")
+        if len(set(names)) != len(names):
+            raise BusinessException(ErrorCodes.INVALID_INPUT, f"Sort field is repeated: {sort}")
+        if names[-1] not in self.unique:
+            keys.append(("_id", keys[-1][1]))
+
+        reverse = [(name, -direction) for name, direction in keys]
+        index = next((index for index in self.indexes if index[1][:len(keys)] in (keys, reverse)), None)
+        if index is None:
+            raise BusinessException(ErrorCodes.INVALID_INPUT, f"No index supports the sort: {sort_string(keys)}")
+
+        index_fields = {name for name, _ in index[1]}
+        if query and any(field.startswith("$") or field not in index_fields for field in query):
+            return keys, None
+        return keys, index[0]
@@ -1,13 +1,33 @@
-import json
+import contextlib
 import logging
-from typing import Optional
+import time
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, ExecutionTimeout
 
 from app.conf.page_response import PageResponse
+from app.conf.query_params import QueryFilter, parse_filter
 from app.entity.user_entity import User
 from app.errors.business_exception import BusinessException, ErrorCodes
+from app.repository.change_version import ChangeVersion
+from app.repository.index_advisor import IndexAdvisor
+from app.repository.insert_batcher import InsertBatcher
+from app.repository.query_guard import QueryGuard, sort_spec
+from app.repository.result_cache import ResultCache
+from app.repository.sort_policy import SortPolicy, sort_string
+from app.repository.user_stats_repository import UserStatsRepository, merge_deltas, stats_delta
+from app.utils.server_timing import timed
+from app.utils.tracing import traced
 
 _log = logging.getLogger(__name__)
 
+SORTABLE_FIELDS = {"_id", "username", "email", "created_date", "last_updated_date"}
+
+# fields of the user counted by the materialized stats
+_STATS_FIELDS = {"is_active", "roles", "created_date"}
+
 
 class UserRepository:
     """
@@ -15,32 +35,118 @@ class UserRepository:
 
     This class is responsible for handling all the database operations related to the User entity.
     User entity is a beanie document model and all the operations are performed using the beanie library.
+    With an insert batcher, concurrent creates are written together with one unordered insert_many.
+    With a query guard, the filters of find and count are checked for collection scans and run with maxTimeMS.
+    With an index advisor, the filter shapes and sorts of find are recorded with their latency.
+    With a result cache, the pages of find are cached by filter, page, size and sort, every write drops the cache.
+    The sorts of find are limited to the SORTABLE_FIELDS with a supporting index (see SortPolicy).
+    With a stats repository, create, update_fields and delete apply their change to the materialized user stats.
+    With a change version, every write increments it, the version is part of the result cache key and of the ETags of
+    the list pages, so the pages cached by the other workers are dropped too.
     """
 
-    def __init__(self):
+    def __init__(self, batcher: InsertBatcher | None = None, guard: QueryGuard | None = None,
+                 advisor: IndexAdvisor | None = None, cache: ResultCache | None = None,
+                 stats: UserStatsRepository | None = None, versions: ChangeVersion | None = None,
+                 sort_policy: SortPolicy | None = None):
         _log.debug(f"UserRepository Connecting to database")
+        self.batcher = batcher
+        self.guard = guard
+        self.advisor = advisor
+        self.cache = cache
+        self.stats = stats
+        self.versions = versions
+        self.sort_policy = sort_policy or SortPolicy(User, SORTABLE_FIELDS)
 
+    @traced()
+    @timed("db")
     async def create(self, user: User) -> User:
         _log.debug(f"UserRepository Creating user: {user}")
-        result = await User.insert(user)
+        try:
+            if self.batcher is not None:
+                result = await self.batcher.insert(user)
+            else:
+                result = await User.insert(user)
+        except DuplicateKeyError as e:
+            raise self._already_exists(e) from e
+        await self._changed()
+        await self._update_stats(stats_delta(user.model_dump(include=_STATS_FIELDS)))
         _log.debug(f"UserRepository User created")
         return result
 
-    async def update(self, user: User) -> User | None:
+    async def update(self, user: User) -> User:
+        """
+        Write all fields of the user with update_fields, the stats, cache and change version are kept like every write
+        """
         _log.debug(f"UserRepository Updating user")
         if user.user_id is None:
             raise BusinessException(ErrorCodes.INVALID_PAYLOAD, "User id is required for update")
-        result = await user.replace()
-        _log.debug(f"UserRepository User updated")
-        return result
+        # validated like a save of the document, assignments to the model are not validated
+        fields = User.model_validate(user.model_dump()).model_dump(exclude={"id", "revision_id", "user_id"})
+        return await self.update_fields(user.user_id, fields)
 
+    @traced()
+    @timed("db")
+    async def update_fields(self, user_id: str, fields: dict,
+                            expected_dates: list[datetime | None] | None = None) -> User:
+        """
+        Set the given fields of the user in one round trip, the other fields are not written
+        :param user_id: User id
+        :param fields: Field values to $set
+        :param expected_dates: Update only if the last_updated_date of the user is one of them (If-Match)
+        :return: Updated user
+        """
+        _log.debug(f"UserRepository Updating user fields: {user_id}, {list(fields)}")
+        query = {"user_id": user_id}
+        if expected_dates is not None:
+            query["last_updated_date"] = {"$in": expected_dates}
+        # the document before the update is returned, the update is a $set of top level fields: after = before + fields
+        try:
+            before = await User.get_motor_collection().find_one_and_update(
+                query,
+                {"$set": fields},
+                return_document=ReturnDocument.BEFORE)
+        except DuplicateKeyError as e:
+            raise self._already_exists(e) from e
+        if not before:
+            if expected_dates is not None and await User.get_motor_collection().find_one({"user_id": user_id},
+                                                                                         {"_id": 1}):
+                raise BusinessException(ErrorCodes.PRECONDITION_FAILED, f"User was changed meanwhile: {user_id}")
+            raise BusinessException(ErrorCodes.NOT_FOUND, f"User not found: {user_id}")
+        await self._changed()
+        after = {**before, **fields}
+        if _STATS_FIELDS & fields.keys():
+            await self._update_stats(merge_deltas(stats_delta(before, -1), stats_delta(after)))
+        _log.debug(f"UserRepository User fields updated")
+        return User.model_validate(after)
+
+    @traced()
+    @timed("db")
+    async def update_password(self, username: str, current_hash: str, fields: dict) -> bool:
+        """
+        Set the fields of the user only if its password hash is still current_hash (compare-and-set)
+        :return: False when the user was not found or its password was changed meanwhile
+        """
+        _log.debug(f"UserRepository Updating user password: {username}")
+        result = await User.get_motor_collection().update_one(
+            {"username": username, "hashed_password": current_hash},
+            {"$set": fields})
+        updated = result.modified_count == 1
+        if updated:
+            await self._changed()
+        _log.debug(f"UserRepository User password updated: {updated}")
+        return updated
+
+    @traced()
+    @timed("db")
     async def delete(self, user_id: str):
         _log.debug(f"UserRepository Deleting user: {user_id}")
-        result = await User.find_one({"user_id": user_id})
-        if not result:
+        deleted = await User.get_motor_collection().find_one_and_delete(
+            {"user_id": user_id}, projection={field: 1 for field in _STATS_FIELDS})
+        if deleted is None:
             raise BusinessException(ErrorCodes.NOT_FOUND, f"User not found: {user_id}")
-
-        await result.delete()
+        await self._changed()
+        await self._update_stats(stats_delta(deleted, -1))
         _log.debug(f"UserRepository User deleted")
         return
 
@@ -69,30 +175,126 @@ class UserRepository:
     #         content = await cursor.to_list(length=size)
     #         page_content = [User(**doc) for doc in content]
 
-    async def find(self, query: str | None = None, page: int = 0, size: int = 10, sort: str = "-_id") -> PageResponse:
+    @traced()
+    @timed("db")
+    async def find(self, query: QueryFilter | str | None = None, page: int = 0, size: int = 10,
+                   sort: str = "-_id") -> PageResponse:
         _log.debug(f"UserRepository list request")
-        if query is None:
-            query = {}
-        else:
-            query = json.loads(query)
+        if not isinstance(query, QueryFilter):
+            query = parse_filter(query or "{}")
+        await self.sort_policy.refresh()
+        keys, hint = self.sort_policy.resolve(sort, query)
+        sort = sort_string(keys)
+
+        if self.cache is None:
+            return await self._find(query, page, size, sort, hint)
+        key = (await self.version(), query.key, page, size, sort)
+        return await self.cache.get(key, lambda: self._find(query, page, size, sort, hint))
 
-        total_count = await User.find(query).count()
-        if total_count == 0:
-            return PageResponse(content=[], page=page, size=size, total=total_count)
+    async def _find(self, query: QueryFilter, page: int, size: int, sort: str, hint: str | None) -> PageResponse:
+        started, rejected = time.perf_counter(), False
+        try:
+            async with self._guarded(query, sort):
+                total_count = await User.get_motor_collection().count_documents(query, **self._max_time("maxTimeMS"))
+                if total_count == 0:
+                    return PageResponse(content=[], page=page, size=size, total=total_count)
 
-        document = User.find(query).skip(page * size).limit(size).sort(sort)
-        content = await document.to_list()
+                cursor = User.get_motor_collection().find(query, sort=sort_spec(sort), skip=page * size, limit=size,
+                                                          **self._max_time("max_time_ms"))
+                if hint is not None:
+                    cursor = cursor.hint(hint)
+                content = [User.model_validate(doc) for doc in await cursor.to_list(size)]
+        except BusinessException:
+            rejected = True
+            raise
+        finally:
+            if self.advisor is not None:
+                self.advisor.record(query, sort, (time.perf_counter() - started) * 1000, rejected)
         page_content = content
         _log.debug(f"UserRepository Users retrieved")
         return PageResponse(content=page_content, page=page, size=size, total=total_count)
 
+    async def stream(self, query: QueryFilter, fields: list[str], batch_size: int) -> AsyncIterator[list[dict]]:
+        """
+        Stream the users matching the filter in _id order, in batches of batch_size raw documents with the given fields.
+        The cursor fetches batch_size documents per round trip, one batch is held in memory at a time.
+        """
+        _log.debug(f"UserRepository Streaming users: {fields}")
+        async with self._guarded(query):
+            cursor = User.get_motor_collection().find(query, {"_id": 0, **{field: 1 for field in fields}},
+                                                      sort=[("_id", 1)], batch_size=batch_size)
+            batch = []
+            async for doc in cursor:
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        _log.debug(f"UserRepository Users streamed")
+
+    @traced()
+    @timed("db")
     async def count(self, query: dict) -> int:
         _log.debug(f"UserRepository Counting users with query: {query}")
-        doc = User.find(query)
-        result = await doc.count()
+        async with self._guarded(query):
+            result = await User.get_motor_collection().count_documents(query, **self._max_time("maxTimeMS"))
         _log.debug(f"UserRepository Users counted")
         return result
 
+    async def _update_stats(self, delta: dict[str, int]):
+        # the user write is done, a failed stats update is a drift fixed by the next reconciliation
+        if self.stats is None:
+            return
+        try:
+            await self.stats.increment(delta)
+        except Exception as e:
+            _log.error(f"UserRepository Failed to update the user stats, Error: {e}")
+
+    @staticmethod
+    def _already_exists(e: DuplicateKeyError) -> BusinessException:
+        # the unique indexes reject a duplicate username or email on insert and on update
+        key_value = (e.details or {}).get("keyValue") or {}
+        field, value = next(iter(key_value.items()), ("key", None))
+        return BusinessException(ErrorCodes.ALREADY_EXISTS, f"User with {field} already exists: {value}")
+
+    async def _changed(self):
+        if self.cache is not None:
+            self.cache.invalidate()
+        if self.versions is not None:
+            await self.versions.bump()
+
+    async def version(self) -> int | None:
+        """
+        Change version of the users collection, None without a change version
+        """
+        return await self.versions.current() if self.versions is not None else None
+
+    @staticmethod
+    def page_size(page: PageResponse) -> int:
+        """
+        Approximate memory size of a page of users, for the result cache budget
+        """
+        return 256 + sum(len(user.model_dump_json()) * 2 for user in page.content)
+
+    @contextlib.asynccontextmanager
+    async def _guarded(self, query: dict, sort: str | None = None):
+        guard = self.guard.admit(query, sort) if self.guard is not None else contextlib.nullcontext()
+        try:
+            async with guard:
+                yield
+        except ExecutionTimeout as e:
+            raise BusinessException(ErrorCodes.QUERY_TIMEOUT,
+                                    f"Query exceeded the time limit of {self.guard.max_time_ms} ms") from e
+
+    def _max_time(self, name: str) -> dict:
+        # count_documents takes the server option maxTimeMS, find takes the pymongo max_time_ms
+        if self.guard is None or not self.guard.max_time_ms:
+            return {}
+        return {name: self.guard.max_time_ms}
+
+    @traced()
+    @timed("db")
     async def retrieve(self, user_id: str) -> User | None:
         _log.debug(f"UserRepository Retrieving user: {user_id}")
         doc = await User.find_one({"user_id": user_id})
@@ -102,6 +304,8 @@ class UserRepository:
         _log.debug(f"UserRepository User retrieved")
         return result
 
+    @traced()
+    @timed("db")
     async def retrieve_by_email(self, email: str) -> Optional[User]:
         _log.debug(f"UserRepository Retrieving user by email: {email}")
         doc = await User.find_one({"email": email})
@@ -111,6 +315,8 @@ class UserRepository:
         _log.debug(f"UserRepository User retrieved")
         return result
 
+    @traced()
+    @timed("db")
     async def retrieve_by_username(self, username: str) -> Optional[User]:
         _log.debug(f"UserRepository Retrieving user by username: {username}")
         doc = await User.find_one({"username": username})
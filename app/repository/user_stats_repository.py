@@ -0,0 +1,121 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Mapping
+
+from pymongo.errors import DuplicateKeyError
+
+from app.entity.user_entity import User
+from app.entity.user_stats_entity import UserStats
+
+_log = logging.getLogger(__name__)
+
+_STATS_ID = "users"
+
+
+def _key(value) -> str:
+    # a role is a field name of the roles map, . and a leading $ are not allowed in field names
+    return str(value).replace(".", "_").lstrip("$") or "_"
+
+
+def stats_delta(user: Mapping, sign: int = 1) -> dict[str, int]:
+    """
+    $inc of the counters of one user, sign 1 when the user is added and -1 when it is removed
+    :param user: User fields (is_active, roles, created_date)
+    """
+    delta = {"total": sign, "active" if user.get("is_active") is True else "inactive": sign}
+    for role in dict.fromkeys(user.get("roles") or []):
+        delta[f"roles.{_key(role)}"] = sign
+    created_date = user.get("created_date")
+    if isinstance(created_date, datetime):
+        delta[f"daily.{created_date:%Y-%m-%d}"] = sign
+    return delta
+
+
+def merge_deltas(*deltas: dict[str, int]) -> dict[str, int]:
+    result: dict[str, int] = {}
+    for delta in deltas:
+        for field, value in delta.items():
+            result[field] = result.get(field, 0) + value
+    return {field: value for field, value in result.items() if value}
+
+
+class UserStatsRepository:
+    """
+    User Stats Repository class
+
+    The counters live in one document: increments are one $inc upsert, reading them is one find by _id.
+    reconcile() recounts the users collection with one aggregation and applies the difference to the counters read
+    before it as one $inc, increments made meanwhile are kept. A counter incremented while the aggregation runs is
+    left to the next reconciliation, the aggregation may or may not have counted the write.
+    The workers reconcile under a lease of the stats document, claim() grants it to one worker per period.
+    """
+
+    async def increment(self, delta: dict[str, int]):
+        if not delta:
+            return
+        await UserStats.get_motor_collection().update_one({"_id": _STATS_ID}, {"$inc": delta}, upsert=True)
+
+    async def retrieve(self) -> UserStats | None:
+        return await UserStats.get(_STATS_ID)
+
+    async def claim(self, owner: str, lease_seconds: int) -> bool:
+        """
+        Claim the reconciliation lease, it is not released: the owner reconciles once for the lease period
+        :param owner: Lease owner (worker)
+        :param lease_seconds: Lease duration
+        :return: False when another worker holds the lease
+        """
+        now = datetime.now(timezone.utc)
+        try:
+            await UserStats.get_motor_collection().update_one(
+                {"_id": _STATS_ID, "$or": [{"lease_expires_date": None}, {"lease_expires_date": {"$lte": now}}]},
+                {"$set": {"lease_owner": owner, "lease_expires_date": now + timedelta(seconds=lease_seconds)}},
+                upsert=True)
+        except DuplicateKeyError:
+            # the document exists and its lease is held, the upsert tried to insert it again
+            return False
+        _log.debug(f"UserStatsRepository Reconciliation lease claimed by {owner}")
+        return True
+
+    async def reconcile(self) -> UserStats:
+        _log.debug(f"UserStatsRepository Reconciling user stats")
+        before = self._counters(await self.retrieve() or UserStats(id=_STATS_ID))
+        result = await User.get_motor_collection().aggregate([{"$facet": {
+            "status": [{"$group": {"_id": {"$eq": ["$is_active", True]}, "count": {"$sum": 1}}}],
+            "roles": [{"$project": {"roles": {"$setUnion": [{"$ifNull": ["$roles", []]}, []]}}},
+                      {"$unwind": "$roles"},
+                      {"$group": {"_id": "$roles", "count": {"$sum": 1}}}],
+            "daily": [{"$match": {"created_date": {"$type": "date"}}},
+                      {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_date"}},
+                                  "count": {"$sum": 1}}}],
+        }}]).to_list(None)
+        after = self._counters(await self.retrieve() or UserStats(id=_STATS_ID))
+        facets = result[0] if result else {}
+        status = {group["_id"]: group["count"] for group in facets.get("status", [])}
+        # two roles may have the same field name once sanitized, their counts are added
+        roles = merge_deltas(*({_key(group["_id"]): group["count"]} for group in facets.get("roles", [])))
+        counted = self._counters(UserStats(id=_STATS_ID,
+                                           total=sum(status.values()),
+                                           active=status.get(True, 0),
+                                           inactive=status.get(False, 0),
+                                           roles=roles,
+                                           daily={group["_id"]: group["count"] for group in facets.get("daily", [])}))
+
+        # a counter incremented during the aggregation is corrected by the next run, the write may or may not be counted
+        raced = {field for field in before.keys() | after.keys() if before.get(field, 0) != after.get(field, 0)}
+        drift = merge_deltas(counted, {field: -value for field, value in before.items()})
+        correction = {field: value for field, value in drift.items() if field not in raced}
+        update = {"$set": {"reconciled_date": datetime.now(timezone.utc),
+                           "last_drift": sum(abs(value) for value in correction.values())}}
+        if correction:
+            update["$inc"] = correction
+        await UserStats.get_motor_collection().update_one({"_id": _STATS_ID}, update, upsert=True)
+        stats = await self.retrieve()
+        _log.debug(f"UserStatsRepository User stats reconciled, drift: {stats.last_drift}")
+        return stats
+
+    @staticmethod
+    def _counters(stats: UserStats) -> dict[str, int]:
+        return {"total": stats.total, "active": stats.active, "inactive": stats.inactive,
+                **{f"roles.{role}": count for role, count in stats.roles.items()},
+                **{f"daily.{day}": count for day, count in stats.daily.items()}}
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class ProfileFunctionStat(BaseModel):
+    """Single function line of a request profile"""
+    function: str = Field(..., title="Function", description="file:line(function) of the profiled function")
+    ncalls: int = Field(..., title="Calls", description="Total number of calls")
+    primitive_calls: int = Field(..., title="Primitive Calls", description="Number of non-recursive calls")
+    total_time_ms: float = Field(..., title="Total Time", description="Time spent in the function itself")
+    cumulative_time_ms: float = Field(..., title="Cumulative Time", description="Time spent in the function and callees")
+
+
+class ProfileSummary(BaseModel):
+    """Request profile summary"""
+    profile_id: str = Field(..., title="Profile ID", description="Unique identifier of the profile")
+    method: str = Field(..., title="Method", description="HTTP method of the profiled request")
+    path: str = Field(..., title="Path", description="Path of the profiled request")
+    status_code: int | None = Field(None, title="Status Code", description="Response status code")
+    created_date: datetime = Field(..., title="Created Date", description="Profile capture time")
+    wall_time_ms: float = Field(..., title="Wall Time", description="Elapsed time of the request")
+    cpu_time_ms: float = Field(..., title="CPU Time", description="CPU time used by the event loop thread")
+    await_time_ms: float = Field(..., title="Await Time", description="Wall time not spent on CPU (I/O, executor, sleeps)")
+
+
+class ProfileReport(ProfileSummary):
+    """Request profile with the top functions and the call tree"""
+    top_functions: list[ProfileFunctionStat] = Field(default_factory=list, title="Top Functions")
+    call_tree: str = Field("", title="Call Tree", description="pstats callee listing of the top functions")
+
+
+class LagBucket(BaseModel):
+    """Cumulative histogram bucket"""
+    le: float | None = Field(..., title="Upper Bound", description="Upper bound in milliseconds, null is +Inf")
+    count: int = Field(..., title="Count", description="Number of observations less than or equal to the bound")
+
+
+class LoopLagReport(BaseModel):
+    """Event loop lag histogram"""
+    running: bool = Field(..., title="Running", description="Watchdog is running")
+    interval_ms: int = Field(..., title="Interval", description="Heartbeat interval")
+    threshold_ms: int = Field(..., title="Threshold", description="Blocking threshold")
+    count: int = Field(..., title="Count", description="Number of heartbeats")
+    sum_ms: float = Field(..., title="Sum", description="Total lag")
+    max_ms: float = Field(..., title="Max", description="Maximum lag")
+    blocking_count: int = Field(..., title="Blocking Count", description="Number of blocking events detected")
+    buckets: list[LagBucket] = Field(default_factory=list, title="Buckets")
+
+
+class BlockingEvent(BaseModel):
+    """Blocking call captured by the event loop watchdog"""
+    started_date: datetime = Field(..., title="Started Date", description="Time the loop stopped responding")
+    duration_ms: float | None = Field(None, title="Duration", description="Blocked time, null while still blocked")
+    task: str | None = Field(None, title="Task", description="Task that was running on the loop")
+    stack: list[str] = Field(default_factory=list, title="Stack", description="Stack of the loop thread, innermost last")
+
+
+class QueryShapeStat(BaseModel):
+    """Filter shape seen by the user list query"""
+    shape: str = Field(..., title="Shape", description="Filter with the values replaced by ?")
+    sort: str | None = Field(None, title="Sort", description="Sort of the query")
+    count: int = Field(..., title="Count", description="Number of queries")
+    rejected: int = Field(..., title="Rejected", description="Queries rejected by the query guard or timed out")
+    avg_ms: float = Field(..., title="Average Time", description="Average query time")
+    max_ms: float = Field(..., title="Max Time", description="Maximum query time")
+    last_seen_date: datetime | None = Field(None, title="Last Seen Date", description="Time of the last query")
+
+
+class IndexRecommendation(BaseModel):
+    """Compound index recommended in equality, sort, range order"""
+    name: str = Field(..., title="Name", description="Index name")
+    keys: dict[str, int] = Field(..., title="Keys", description="Index keys in order, 1 ascending, -1 descending")
+    count: int = Field(..., title="Count", description="Number of queries the index would serve")
+    rejected: int = Field(..., title="Rejected", description="Queries rejected by the query guard or timed out")
+    total_ms: float = Field(..., title="Total Time", description="Total time of the queries the index would serve")
+    shapes: list[str] = Field(default_factory=list, title="Shapes", description="Filter shapes the index would serve")
+
+
+class IndexUsage(BaseModel):
+    """Existing index with its access counter"""
+    name: str = Field(..., title="Name", description="Index name")
+    keys: dict[str, int | str] = Field(..., title="Keys", description="Index keys in order")
+    unique: bool = Field(False, title="Unique", description="Unique index, kept as a constraint even if unused")
+    ops: int | None = Field(None, title="Operations", description="Accesses since the counter start, null if unknown")
+    since: datetime | None = Field(None, title="Since", description="Start of the access counter (server start)")
+    unused: bool = Field(False, title="Unused", description="Index was never used and is not a constraint")
+
+
+class IndexBuildDTO(BaseModel):
+    """Background build of a recommended index"""
+    name: str = Field(..., title="Name", description="Index name")
+    keys: dict[str, int] = Field(..., title="Keys", description="Index keys in order")
+    status: str = Field(..., title="Status", description="building, created or failed")
+    error: str | None = Field(None, title="Error", description="Failure reason")
+    started_date: datetime = Field(..., title="Started Date", description="Build start time")
+    finished_date: datetime | None = Field(None, title="Finished Date", description="Build end time")
+
+
+class IndexAdvice(BaseModel):
+    """Index advice of the users collection"""
+    shapes: list[QueryShapeStat] = Field(default_factory=list, title="Shapes",
+                                         description="Most expensive filter shapes first")
+    recommendations: list[IndexRecommendation] = Field(default_factory=list, title="Recommendations",
+                                                       description="Recommended indexes, most expensive queries first")
+    indexes: list[IndexUsage] = Field(default_factory=list, title="Indexes", description="Existing indexes")
+    builds: list[IndexBuildDTO] = Field(default_factory=list, title="Builds", description="Index builds started here")
+
+
+class IndexAdviceApply(BaseModel):
+    """Recommended indexes to create"""
+    names: list[str] | None = Field(None, title="Names", description="Recommended index names, null creates all of them")
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from app.conf.app_settings import email_settings
+from app.conf.query_params import QueryParams
+from app.entity.broadcast_job_entity import BroadcastStatus
+
+
+class BroadcastCreate(BaseModel):
+    """Broadcast job request, the recipients are the users matching the query"""
+    template: str = Field(..., min_length=1, max_length=100, title="Template",
+                          description="Email template name in the email template directory, e.g. welcome")
+    context: dict = Field(default_factory=dict, title="Context",
+                          description="Template variables shared by all recipients, the user fields are added per recipient")
+    q: str | None = Field(None, min_length=3, max_length=1000, title="Query",
+                          description="User filter with the same syntax as the q parameter of the list users endpoint")
+    active_only: bool = Field(True, title="Active Only", description="Send to active users only")
+    concurrency: int = Field(email_settings.BROADCAST_CONCURRENCY, ge=1, le=64, title="Concurrency",
+                             description="Number of concurrent SMTP sends")
+    rate: float = Field(email_settings.BROADCAST_RATE, ge=0, title="Rate",
+                        description="Maximum messages per second, 0 disables the rate limit")
+
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "template": "welcome",
+            "context": {"app_name": "PyFAPI", "app_url": "http://localhost:8000"},
+            "q": '{"roles": {"$in": ["user"]}}',
+            "active_only": True,
+            "concurrency": 4,
+            "rate": 20,
+        }})
+
+    @field_validator("q")
+    @classmethod
+    def validate_query(cls, q: str | None):
+        return QueryParams.validate_query(q) if q else None
+
+
+class BroadcastJobDTO(BaseModel):
+    """Broadcast job progress"""
+    job_id: str = Field(..., title="Job ID")
+    template: str = Field(..., title="Template")
+    query: str | None = Field(None, title="Query")
+    active_only: bool = Field(..., title="Active Only")
+    concurrency: int = Field(..., title="Concurrency")
+    rate: float = Field(..., title="Rate")
+    status: BroadcastStatus = Field(..., title="Status")
+    total: int | None = Field(None, title="Total", description="Number of matching users when the job started")
+    processed: int = Field(0, title="Processed", description="Recipients processed up to the last checkpoint")
+    sent: int = Field(0, title="Sent", description="Messages sent over the SMTP pool")
+    deferred: int = Field(0, title="Deferred", description="Messages moved to the email outbox for a retry")
+    failed: int = Field(0, title="Failed", description="Messages rejected by the server or not rendered")
+    last_error: str | None = Field(None, title="Last Error")
+    created_by: str | None = Field(None, title="Created By")
+    created_date: datetime = Field(..., title="Created Date")
+    started_date: datetime | None = Field(None, title="Started Date")
+    finished_date: datetime | None = Field(None, title="Finished Date")
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class UserStatsDTO(BaseModel):
+    """Materialized user counters"""
+    total: int = Field(0, title="Total", description="Number of users")
+    active: int = Field(0, title="Active", description="Number of active users")
+    inactive: int = Field(0, title="Inactive", description="Number of inactive users (is_active false or not set)")
+    roles: dict[str, int] = Field(default_factory=dict, title="Roles", description="Number of users per role")
+    daily: dict[str, int] = Field(default_factory=dict, title="Daily Signups",
+                                  description="Number of users per created_date day (YYYY-MM-DD, UTC)")
+    reconciled_date: datetime | None = Field(None, title="Reconciled Date", description="Time of the last recount")
+    last_drift: int | None = Field(None, title="Last Drift",
+                                   description="Sum of the corrections made by the last recount")
@@ -11,6 +11,7 @@ from app.security.jwt_token import JWTUser
 SECRET_KEY = jwt_settings.SECRET_KEY
 ALGORITHM = jwt_settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = jwt_settings.EXPIRATION
+ADMIN_ROLE = "admin"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=server_settings.CONTEXT_PATH+"/auth/login/oauth")
 
@@ -58,3 +59,24 @@ def get_jwt_user_from_token(token: str) -> JWTUser:
     """
     jwt_user_token = JWTUser(**_decode_access_token(token))
     return jwt_user_token
+
+
+def has_role(jwt_user: JWTUser, role: str) -> bool:
+    """
+    Check the user roles (token scopes)
+    :param jwt_user: user data from the token
+    :param role: role name
+    :return: True when the user has the role
+    """
+    return role in (jwt_user.scopes or [])
+
+
+def get_admin_user(token_data: Dict = Depends(get_token_user)) -> Dict:
+    """
+    Get the current user from the access token and require the admin role
+    :param token_data: user and token data
+    :return: user and token data
+    """
+    if ADMIN_ROLE not in (token_data.get("scopes") or []):
+        raise HTTPException(status_code=403, detail="Admin role required")
+    return token_data
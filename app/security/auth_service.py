@@ -1,7 +1,6 @@
-from passlib.context import CryptContext
-
 from app.repository.user_repository import UserRepository
 from app.security import auth_handler
+from app.utils.pass_util import PasswordUtil
 
 
 async def create_access_token_for_user(user) -> str:
@@ -10,20 +9,14 @@ async def create_access_token_for_user(user) -> str:
 
 
 class AuthService:
-    def __init__(self, user_repository: UserRepository):
+    def __init__(self, user_repository: UserRepository, hasher: PasswordUtil | None = None):
         self.user_repository = user_repository
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return self.pwd_context.verify(plain_password, hashed_password)
-
-    def hash_password(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+        self.hasher = hasher or PasswordUtil()
 
     async def authenticate_user(self, username: str, password: str):
         user = await self.user_repository.retrieve_by_username(username)
         if not user:
             return False
-        if not self.verify_password(password, user.hashed_password):
+        if not await self.hasher.verify_password_async(password, user.hashed_password):
             return False
         return user
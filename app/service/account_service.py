@@ -1,16 +1,21 @@
+from __future__ import annotations
+
 import logging
+from typing import TYPE_CHECKING
 
-from app.api.vm.account_vm import ChangePasswordVM
 from app.errors.business_exception import BusinessException, ErrorCodes
 from app.schema.user_dto import UserDTO
 from app.service.user_service import UserService
 
+if TYPE_CHECKING:  # the api package imports the services
+    from app.api.vm.account_vm import ChangePasswordVM
+
 log = logging.getLogger(__name__)
 
 
 class AccountService:
     def __init__(self, user_service: UserService):
-        log.info(f"AccountService Initializing")
+        log.debug(f"AccountService Initializing")
         self.user_service = user_service
 
     async def get_account(self, username: str) -> UserDTO | None:
@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import os
+import smtplib
+import socket
+import uuid
+from datetime import datetime, timezone
+
+from app.conf.app_settings import email_settings
+from app.conf.query_params import parse_filter
+from app.entity.broadcast_job_entity import BroadcastJob, BroadcastStatus
+from app.entity.user_entity import User
+from app.errors.business_exception import BusinessException, ErrorCodes
+from app.repository.broadcast_job_repository import BroadcastJobRepository
+from app.schema.broadcast_dto import BroadcastCreate
+from app.service.email_message import build_message
+from app.service.email_outbox import EmailOutbox, email_outbox
+from app.service.email_template import EmailTemplates, email_templates
+from app.utils.rate_limiter import TokenBucket
+
+_log = logging.getLogger(__name__)
+
+_RECIPIENT_FIELDS = {"_id": 1, "email": 1, "username": 1, "first_name": 1, "last_name": 1}
+
+
+class BroadcastService:
+    """
+    Email broadcast to the users matching a filter.
+
+    Recipients are streamed from a Mongo cursor sorted by _id in batches of batch_size, only the current batch is kept
+    in memory. Each recipient gets the template rendered with the user fields and the message is sent over the SMTP pool
+    at the job concurrency and rate. Messages failing on a connection error are moved to the durable email outbox for
+    a retry. After every batch the last _id and the counters are checkpointed, a stopped job is resumed after its last
+    checkpoint by this or another node (the batch in flight may be sent again).
+
+    Every claim has its own lease owner, the lease is renewed every third of lease_seconds while a batch is sent, and
+    a job still running on this node is never claimed again by it. A job whose lease is lost stops after its batch.
+    """
+
+    def __init__(self,
+                 repository: BroadcastJobRepository,
+                 outbox: EmailOutbox,
+                 templates: EmailTemplates,
+                 batch_size: int = email_settings.BROADCAST_BATCH_SIZE,
+                 lease_seconds: int = email_settings.BROADCAST_LEASE_SECONDS,
+                 poll_interval_seconds: int = email_settings.BROADCAST_POLL_INTERVAL_SECONDS):
+        self.repository = repository
+        self.outbox = outbox
+        self.templates = templates
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval_seconds
+        self.node_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._jobs: dict[str, asyncio.Task] = {}
+        self._poller: asyncio.Task | None = None
+
+    async def start(self):
+        """
+        Start the poller resuming pending jobs and jobs abandoned by stopped nodes
+        """
+        if self._poller is None:
+            self._poller = asyncio.create_task(self._poll(), name="email-broadcast-poller")
+
+    async def stop(self):
+        """
+        Stop the running jobs, they are resumed after their last checkpoint
+        """
+        tasks = list(self._jobs.values()) + ([self._poller] if self._poller else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._jobs = {}
+        self._poller = None
+
+    async def create(self, request: BroadcastCreate, created_by: str | None = None) -> BroadcastJob:
+        if not self.templates.exists(request.template):
+            raise BusinessException(ErrorCodes.NOT_FOUND, f"Email template not found: {request.template}")
+        job = BroadcastJob(job_id=str(uuid.uuid4()), template=request.template, context=request.context,
+                           query=request.q, active_only=request.active_only, concurrency=request.concurrency,
+                           rate=request.rate, created_by=created_by, created_date=datetime.now(timezone.utc))
+        job = await self.repository.create(job)
+        _log.info(f"BroadcastService Created job: {job}")
+        await self._claim(job.job_id)
+        return job
+
+    async def retrieve(self, job_id: str) -> BroadcastJob:
+        return await self.repository.retrieve(job_id)
+
+    async def find(self, limit: int = 50) -> list[BroadcastJob]:
+        return await self.repository.find(limit)
+
+    async def cancel(self, job_id: str) -> BroadcastJob:
+        job = await self.repository.cancel(job_id)
+        task = self._jobs.get(job_id)
+        if task is not None:
+            task.cancel()
+        _log.info(f"BroadcastService Cancelled job: {job_id}")
+        return job
+
+    async def _poll(self):
+        while True:
+            try:
+                while await self._claim():
+                    pass
+            except Exception as e:
+                _log.error(f"BroadcastService Failed to claim jobs, Error: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _claim(self, job_id: str | None = None) -> BroadcastJob | None:
+        owner = f"{self.node_id}-{uuid.uuid4().hex[:12]}"
+        job = await self.repository.claim(owner, self.lease_seconds, job_id, exclude=list(self._jobs))
+        if job is not None:
+            self._jobs[job.job_id] = asyncio.create_task(self.run(job), name=f"email-broadcast-{job.job_id}")
+        return job
+
+    async def run(self, job: BroadcastJob):
+        """
+        Send the job from its last checkpoint, the job must be claimed (job.lease_owner) by this node
+        """
+        try:
+            await self._run(job)
+        except asyncio.CancelledError:
+            _log.info(f"BroadcastService Job stopped: {job.job_id}")
+            raise
+        except Exception as e:
+            _log.error(f"BroadcastService Job failed: {job.job_id}, Error: {e}")
+            await self.repository.finish(job, job.lease_owner, BroadcastStatus.FAILED, f"{type(e).__name__}: {e}")
+        finally:
+            self._jobs.pop(job.job_id, None)
+
+    async def _run(self, job: BroadcastJob):
+        query = parse_filter(job.query) if job.query else {}
+        if job.active_only:
+            query = {"$and": [query, {"is_active": True}]}
+        collection = User.get_motor_collection()
+        if job.total is None:
+            job.total = await collection.count_documents(query)
+            job.started_date = datetime.now(timezone.utc)
+            await self.repository.start(job, job.lease_owner, job.total)
+        if job.last_id is not None:
+            query = {"$and": [query, {"_id": {"$gt": job.last_id}}]}
+
+        _log.info(f"BroadcastService Running job: {job}")
+        limiter = TokenBucket(job.rate, burst=job.concurrency)
+        semaphore = asyncio.Semaphore(min(job.concurrency, self.outbox.pool.size))
+        cursor = collection.find(query, _RECIPIENT_FIELDS, sort=[("_id", 1)], batch_size=self.batch_size)
+
+        batch = []
+        async for user in cursor:
+            batch.append(user)
+            if len(batch) >= self.batch_size:
+                if not await self._send_batch(job, batch, limiter, semaphore):
+                    return
+                batch = []
+        if batch and not await self._send_batch(job, batch, limiter, semaphore):
+            return
+        await self.repository.finish(job, job.lease_owner, BroadcastStatus.COMPLETED)
+        _log.info(f"BroadcastService Completed job: {job.job_id}")
+
+    async def _send_batch(self, job: BroadcastJob, batch: list[dict], limiter: TokenBucket,
+                          semaphore: asyncio.Semaphore) -> bool:
+        sending = asyncio.gather(*[self._send_one(job, user, limiter, semaphore) for user in batch])
+        lease_lost = asyncio.Event()
+        keeper = asyncio.create_task(self._keep_lease(job, sending, lease_lost))
+        try:
+            results = await sending
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                raise
+            _log.info(f"BroadcastService Lease lost while sending a batch, job stopped: {job.job_id}")
+            return False
+        finally:
+            keeper.cancel()
+        running = await self.repository.checkpoint(job, job.lease_owner, self.lease_seconds, batch[-1]["_id"],
+                                                   processed=len(batch),
+                                                   sent=results.count("sent"),
+                                                   deferred=results.count("deferred"),
+                                                   failed=results.count("failed"))
+        if not running:
+            _log.info(f"BroadcastService Job is no longer running on this node: {job.job_id}")
+        return running
+
+    async def _keep_lease(self, job: BroadcastJob, sending: asyncio.Future, lease_lost: asyncio.Event):
+        # a batch may take longer than the lease (batch size / rate), the lease is renewed while it is sent
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                running = await self.repository.renew(job, job.lease_owner, self.lease_seconds)
+            except Exception as e:
+                _log.error(f"BroadcastService Failed to renew the lease of job {job.job_id}, Error: {e}")
+                continue
+            if not running:
+                lease_lost.set()
+                sending.cancel()
+                return
+
+    async def _send_one(self, job: BroadcastJob, user: dict, limiter: TokenBucket, semaphore: asyncio.Semaphore) -> str:
+        try:
+            rendered = self.templates.render(job.template, {**job.context, **self._recipient_context(user)})
+        except Exception as e:
+            _log.warning(f"BroadcastService Failed to render {job.template} for {user.get('email')}, Error: {e}")
+            return "failed"
+
+        await limiter.acquire()
+        async with semaphore:
+            message = build_message(user["email"], rendered.subject, rendered.text, html=rendered.html)
+            try:
+                await asyncio.to_thread(self._send, message)
+                return "sent"
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                _log.warning(f"BroadcastService Message to {user['email']} rejected, Error: {e}")
+                return "failed"
+            except (smtplib.SMTPException, OSError) as e:
+                _log.warning(f"BroadcastService Message to {user['email']} deferred to the outbox, Error: {e}")
+        await self.outbox.enqueue(user["email"], rendered.subject, rendered.text, html=rendered.html)
+        return "deferred"
+
+    def _send(self, message):
+        with self.outbox.pool.connection() as conn:
+            self.outbox.pool.send(conn, message)
+
+    @staticmethod
+    def _recipient_context(user: dict) -> dict:
+        return {
+            "username": user.get("username"),
+            "email": user.get("email"),
+            "first_name": user.get("first_name"),
+            "last_name": user.get("last_name"),
+        }
+
+
+broadcast_service = BroadcastService(BroadcastJobRepository(), email_outbox, email_templates)
@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from email import encoders
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+from app.conf.app_settings import email_settings
+
+_log = logging.getLogger(__name__)
+
+
+class AttachmentCache:
+    """
+    LRU cache of base64 encoded attachment parts keyed by path, modification time and size.
+
+    A part is read and encoded once and attached to every message sending the same file, a changed file gets a new key.
+    The cache is shared by the outbox worker threads.
+    """
+
+    def __init__(self, max_size: int = email_settings.ATTACHMENT_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._parts: OrderedDict[tuple, MIMEBase] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> MIMEBase | None:
+        """
+        Encoded attachment part of the file, None when the file does not exist
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            part = self._parts.get(key)
+            if part is not None:
+                self._parts.move_to_end(key)
+                self.hits += 1
+                return part
+        part = self._encode(path)
+        with self._lock:
+            self.misses += 1
+            self._parts[key] = part
+            while len(self._parts) > self.max_size:
+                self._parts.popitem(last=False)
+        return part
+
+    @staticmethod
+    def _encode(path: str) -> MIMEBase:
+        _log.debug(f"AttachmentCache Encoding attachment: {path}")
+        with open(path, 'rb') as attachment:
+            part = MIMEBase('application', 'octet-stream')
+            part.set_payload(attachment.read())
+        encoders.encode_base64(part)
+        part.add_header(
+            'Content-Disposition',
+            f'attachment; filename= {os.path.basename(path)}',
+        )
+        return part
+
+
+attachment_cache = AttachmentCache()
+
+
+def build_message(to, subject: str, body: str, attachment_path: str | None = None,
+                  html: str | None = None) -> MIMEMultipart:
+    """
+    Build the MIME message, when attachment_path is valid the file is attached
+    :param to: Email address of the receiver. A list of addresses to send this mail to. A bare string will be treated as a list with 1 address
+    :param subject: Subject of the email, The message to send
+    :param body: Content of the email
+    :param attachment_path: Path of the file to be attached
+    :param html: HTML variant of the content, sent as multipart/alternative with the plain text body
+    :return: MIME message
+    """
+    attachment = attachment_cache.get(attachment_path) if attachment_path is not None else None
+
+    content = MIMEText(body, 'plain')
+    if html is not None:
+        content = MIMEMultipart('alternative')
+        content.attach(MIMEText(body, 'plain'))
+        content.attach(MIMEText(html, 'html'))
+
+    if attachment is None and html is not None:
+        msg = content
+    else:
+        msg = MIMEMultipart()
+        msg.attach(content)
+        if attachment is not None:
+            msg.attach(attachment)
+
+    msg['From'] = email_settings.SMTP_USERNAME
+    msg['To'] = to if isinstance(to, str) else ", ".join(to)
+    msg['Subject'] = subject
+    return msg
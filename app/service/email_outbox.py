@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import os
+import random
+import smtplib
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.conf.app_settings import email_settings
+from app.entity.outbox_email_entity import OutboxEmail
+from app.repository.outbox_email_repository import OutboxEmailRepository
+from app.service.email_message import build_message
+from app.service.smtp_pool import SMTPConnectionPool
+
+_log = logging.getLogger(__name__)
+
+
+class EmailOutbox:
+    """
+    Durable email outbox drained by background workers.
+
+    Requests only insert the message into the email_outbox collection. Each worker claims up to batch_size due
+    messages with a lease and sends them over one pooled SMTP connection on a worker thread. Failed messages are
+    retried with exponential backoff and dead-lettered after max_attempts. Messages survive restarts, and workers
+    of every node drain the same collection, throughput scales with the number of workers.
+
+    Delivery is at least once: a message is sent again only when its lease expires before the worker acknowledges it.
+    """
+
+    def __init__(self,
+                 pool: SMTPConnectionPool,
+                 repository: OutboxEmailRepository,
+                 workers: int = email_settings.OUTBOX_WORKERS,
+                 batch_size: int = email_settings.OUTBOX_BATCH_SIZE,
+                 poll_interval_ms: int = email_settings.OUTBOX_POLL_INTERVAL_MS,
+                 lease_seconds: int = email_settings.OUTBOX_LEASE_SECONDS,
+                 max_attempts: int = email_settings.OUTBOX_MAX_ATTEMPTS,
+                 retry_base_seconds: int = email_settings.OUTBOX_RETRY_BASE_SECONDS,
+                 retry_max_seconds: int = email_settings.OUTBOX_RETRY_MAX_SECONDS):
+        self.pool = pool
+        self.repository = repository
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval_ms / 1000
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.node_id = f"{socket.gethostname()}-{os.getpid()}"
+        self.sent = 0
+        self.failed = 0
+        self.dead = 0
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        if self.running:
+            return
+        _log.info(f"EmailOutbox Starting {self.workers} workers on {self.node_id}")
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i), name=f"email-outbox-{i}") for i in range(self.workers)]
+
+    async def stop(self, timeout: float = 10):
+        """
+        Stop the workers after their current batch (or the timeout expires) and close the pool.
+        Unsent messages stay in the collection for the next start or the workers of other nodes.
+        """
+        if self.running:
+            _log.info(f"EmailOutbox Stopping {len(self._tasks)} workers")
+            self._stopping = True
+            self._wakeup.set()
+            _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self._tasks = []
+        await asyncio.to_thread(self.pool.close)
+
+    async def enqueue(self, to, subject: str, body: str, attachment_path: str | None = None,
+                      html: str | None = None) -> OutboxEmail:
+        """
+        Store the message in the outbox and wake up the local workers
+        """
+        now = datetime.now(timezone.utc)
+        email = OutboxEmail(to=[to] if isinstance(to, str) else list(to), subject=subject, body=body, html=html,
+                            attachment_path=attachment_path, next_attempt_date=now, created_date=now)
+        email = await self.repository.create(email)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return email
+
+    async def drain(self) -> int:
+        """
+        Claim and send due messages until none is left (scripts, tests)
+        :return: Number of processed messages
+        """
+        processed = 0
+        while count := await self._process_batch(0):
+            processed += count
+        return processed
+
+    async def _worker(self, index: int):
+        while not self._stopping:
+            try:
+                processed = await self._process_batch(index)
+            except Exception as e:
+                _log.error(f"EmailOutbox Worker {index} failed, Error: {e}")
+                processed = 0
+            if not processed and not self._stopping:
+                await self._idle()
+
+    async def _idle(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _process_batch(self, index: int) -> int:
+        owner = f"{self.node_id}-{index}-{uuid.uuid4().hex[:12]}"
+        batch = await self.repository.claim_batch(owner, self.batch_size, self.lease_seconds)
+        if not batch:
+            return 0
+
+        errors = await asyncio.to_thread(self._send_batch, batch)
+        sent_ids = [email.id for email in batch if email.id not in errors]
+        failures = [(email.id, errors[email.id], self._next_attempt_date(email.attempts))
+                    for email in batch if email.id in errors]
+        await self.repository.mark_sent(owner, sent_ids)
+        await self.repository.mark_failed(owner, failures)
+
+        dead = sum(1 for *_, next_attempt_date in failures if next_attempt_date is None)
+        self.sent += len(sent_ids)
+        self.failed += len(failures)
+        self.dead += dead
+        if dead:
+            _log.error(f"EmailOutbox {dead} messages dead-lettered after {self.max_attempts} attempts")
+        _log.debug(f"EmailOutbox Sent {len(sent_ids)} of {len(batch)} messages")
+        return len(batch)
+
+    def _next_attempt_date(self, attempts: int) -> datetime | None:
+        """
+        Exponential backoff with jitter, None when the message is out of attempts
+        """
+        if attempts >= self.max_attempts:
+            return None
+        delay = min(self.retry_base_seconds * 2 ** max(attempts - 1, 0), self.retry_max_seconds)
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        return datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+    def _send_batch(self, batch: list[OutboxEmail]) -> dict:
+        """
+        Send the batch over one pooled connection
+        :return: Errors of the failed messages by message id
+        """
+        errors = {}
+        pending = []
+        # a message that can't be built (e.g. missing attachment) fails alone, it is not a connection error
+        for email in batch:
+            try:
+                pending.append((email, build_message(email.to, email.subject, email.body, email.attachment_path,
+                                                     email.html)))
+            except Exception as e:
+                errors[email.id] = f"{type(e).__name__}: {e}"
+                _log.warning(f"EmailOutbox Message to {email.to} can't be built, Error: {e}")
+        # one reconnect per batch when the server drops a pooled connection
+        for attempt in range(2):
+            if not pending:
+                break
+            try:
+                with self.pool.connection() as conn:
+                    while pending:
+                        email, message = pending[0]
+                        try:
+                            self.pool.send(conn, message)
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError,
+                                smtplib.SMTPSenderRefused) as e:
+                            errors[email.id] = f"{type(e).__name__}: {e}"
+                            _log.warning(f"EmailOutbox Message to {email.to} rejected, Error: {e}")
+                        pending.pop(0)
+                break
+            except (smtplib.SMTPException, OSError) as e:
+                if attempt:
+                    _log.error(f"EmailOutbox SMTP connection failed, {len(pending)} messages not sent, Error: {e}")
+                    errors.update({email.id: f"{type(e).__name__}: {e}" for email, _ in pending})
+                    break
+                _log.warning(f"EmailOutbox SMTP connection lost, reconnecting, Error: {e}")
+        return errors
+
+
+email_outbox = EmailOutbox(SMTPConnectionPool(), OutboxEmailRepository())
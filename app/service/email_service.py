@@ -1,59 +1,42 @@
 import logging as log
-import os
-import smtplib
-from email import encoders
-from email.mime.base import MIMEBase
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 
-from app.conf.app_settings import email_settings
+from app.service.email_outbox import email_outbox
+from app.service.email_template import email_templates
+from app.utils.server_timing import timed
 
 
-async def send_email(to, subject: str, body: str, attachment_path: str | None = None):
+@timed("email")
+async def send_email(to, subject: str, body: str, attachment_path: str | None = None, html: str | None = None):
     """
-    Send email when attachment_path is valid then send email with attachment
+    Send email when attachment_path is valid then send email with attachment.
+    The message is stored in the durable email outbox and sent by the outbox workers with pooled SMTP connections,
+    failed messages are retried with backoff.
     :param to: Email address of the receiver. A list of addresses to send this mail to. A bare string will be treated as a list with 1 address
     :param subject: Subject of the email, The message to send
     :param body: Content of the email
     :param attachment_path: Path of the file to be attached
-    :return: None
+    :param html: HTML variant of the content
+    :return: True when the message is queued
     """
-    host = email_settings.SMTP_HOST
-    port = email_settings.SMTP_PORT
-    username = email_settings.SMTP_USERNAME
-    password = email_settings.SMTP_PASSWORD
-    tls = email_settings.SMTP_TLS
-
-    msg = MIMEMultipart()
-    msg['From'] = username
-    msg['To'] = to
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
-
-    # attach the file
-    if attachment_path is not None and os.path.exists(attachment_path):
-        with open(attachment_path, 'rb') as attachment:
-            part = MIMEBase('application', 'octet-stream')
-            part.set_payload(attachment.read())
-            encoders.encode_base64(part)
-            part.add_header(
-                'Content-Disposition',
-                f'attachment; filename= {os.path.basename(attachment_path)}',
-            )
-            msg.attach(part)
-
+    attachment_message = f"File: {attachment_path}" if attachment_path else ""
     try:
-        server = smtplib.SMTP(host=host, port=port)
-        server.starttls()
-        server.login(user=username, password=password)
-        text = msg.as_string()
-        server.sendmail(from_addr=username, to_addrs=to, msg=text)
-        attachment_message = f"File: {attachment_path}" if attachment_path else ""
-        log.info(f"Send email to {to} successfully, From: {username} {attachment_message}")
+        email = await email_outbox.enqueue(to, subject, body, attachment_path, html)
     except Exception as e:
-        log.error(f"Failed to send email to {to}, Error: {e}")
+        log.error(f"Failed to queue email to {to}, Error: {e}")
         return False
-    finally:
-        server.quit()
 
+    log.debug(f"Queued email {email.id} to {to} {attachment_message}")
     return True
+
+
+async def send_template_email(to, template: str, context: dict, attachment_path: str | None = None):
+    """
+    Render the email template (subject, plain text and HTML variants) and send it
+    :param to: Email address of the receiver
+    :param template: Template name in the email template directory, e.g. welcome
+    :param context: Template variables
+    :param attachment_path: Path of the file to be attached
+    :return: True when the message is queued
+    """
+    rendered = email_templates.render(template, context)
+    return await send_email(to, rendered.subject, rendered.text, attachment_path, rendered.html)
@@ -0,0 +1,75 @@
+import logging
+from typing import NamedTuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, TemplateNotFound, select_autoescape
+
+from app.conf.app_settings import email_settings
+from app.errors.business_exception import BusinessException, ErrorCodes
+
+_log = logging.getLogger(__name__)
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    text: str
+    html: str | None
+
+
+class EmailTemplates:
+    """
+    Jinja2 email templates.
+
+    An email template is a set of files in the template directory: <name>.subject.j2, <name>.txt.j2 and an optional
+    <name>.html.j2. Templates are compiled once (load() at startup or on first use) and kept by the environment,
+    auto_reload is disabled so rendering does not stat the files. HTML templates are autoescaped.
+    """
+
+    def __init__(self, directory: str = email_settings.TEMPLATE_DIR):
+        self.directory = directory
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=select_autoescape(enabled_extensions=("html.j2",), default_for_string=False),
+            undefined=StrictUndefined,
+            auto_reload=False,
+            cache_size=-1,
+            trim_blocks=True,
+        )
+
+    def load(self) -> list[str]:
+        """
+        Compile every template of the directory
+        :return: Names of the loaded templates
+        """
+        names = self.env.list_templates(extensions=["j2"])
+        for name in names:
+            self.env.get_template(name)
+        _log.info(f"EmailTemplates Compiled {len(names)} email templates from {self.directory}")
+        return names
+
+    def exists(self, name: str) -> bool:
+        try:
+            self.env.get_template(f"{name}.subject.j2")
+            self.env.get_template(f"{name}.txt.j2")
+        except TemplateNotFound:
+            return False
+        return True
+
+    def render(self, name: str, context: dict) -> RenderedEmail:
+        """
+        Render the subject, the plain text and the HTML variant of the template
+        :param name: Template name without the suffixes, e.g. welcome
+        :param context: Template variables
+        """
+        try:
+            subject = self.env.get_template(f"{name}.subject.j2").render(context)
+            text = self.env.get_template(f"{name}.txt.j2").render(context)
+        except TemplateNotFound as e:
+            raise BusinessException(ErrorCodes.NOT_FOUND, f"Email template not found: {e.name}") from e
+        try:
+            html = self.env.get_template(f"{name}.html.j2").render(context)
+        except TemplateNotFound:
+            html = None
+        return RenderedEmail(subject=" ".join(subject.split()), text=text, html=html)
+
+
+email_templates = EmailTemplates()
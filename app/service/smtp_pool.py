@@ -0,0 +1,127 @@
+import logging
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from email.message import Message
+
+from app.conf.app_settings import email_settings
+
+_log = logging.getLogger(__name__)
+
+
+class SMTPConnectionPool:
+    """
+    Pool of authenticated SMTP connections.
+
+    smtplib is blocking, the pool is used from worker threads (asyncio.to_thread). A connection is opened,
+    upgraded with STARTTLS and logged in once, then reused for many messages until it fails or the pool is closed.
+    """
+
+    def __init__(self,
+                 host: str = email_settings.SMTP_HOST,
+                 port: int = email_settings.SMTP_PORT,
+                 username: str = email_settings.SMTP_USERNAME,
+                 password: str = email_settings.SMTP_PASSWORD,
+                 tls: bool = email_settings.SMTP_TLS,
+                 size: int = email_settings.SMTP_POOL_SIZE,
+                 timeout: int = email_settings.SMTP_TIMEOUT,
+                 idle_timeout: int = email_settings.SMTP_POOL_IDLE_TIMEOUT,
+                 smtp_factory=smtplib.SMTP):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.tls = tls
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.smtp_factory = smtp_factory
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    @property
+    def sender(self) -> str:
+        return self.username
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection, the connection is discarded when the block raises an SMTP or socket error.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except (smtplib.SMTPException, OSError):
+            self.release(conn, broken=True)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def acquire(self) -> smtplib.SMTP:
+        if self._closed:
+            raise smtplib.SMTPException("SMTP connection pool is closed")
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    conn, last_used = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if time.monotonic() - last_used < self.idle_timeout or self._is_alive(conn):
+                    return conn
+                self._quit(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: smtplib.SMTP, broken: bool = False):
+        if broken or self._closed:
+            self._quit(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+        self._slots.release()
+
+    def send(self, conn: smtplib.SMTP, message: Message):
+        conn.send_message(message, from_addr=self.sender)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(conn)
+
+    def _connect(self) -> smtplib.SMTP:
+        _log.debug(f"SMTPConnectionPool Connecting to {self.host}:{self.port}")
+        conn = self.smtp_factory(host=self.host, port=self.port, timeout=self.timeout)
+        try:
+            if self.tls:
+                conn.starttls()
+            if self.username and self.password:
+                conn.login(user=self.username, password=self.password)
+        except BaseException:
+            self._quit(conn)
+            raise
+        return conn
+
+    @staticmethod
+    def _is_alive(conn: smtplib.SMTP) -> bool:
+        try:
+            return conn.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _quit(conn: smtplib.SMTP):
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
@@ -1,21 +1,42 @@
 import logging
 import uuid
-from typing import Optional
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
 
 from fastapi import Depends
 
-from app.conf.app_settings import app_settings
+from app.conf.app_settings import app_settings, export_settings
 from app.conf.page_response import PageResponse
+from app.conf.query_params import QueryFilter
 from app.entity.user_entity import User
 from app.errors.business_exception import BusinessException, ErrorCodes
 from app.repository.user_repository import UserRepository
 from app.schema.user_dto import UserDTO, UserCreate, UserUpdate
 from app.security.jwt_token import JWTUser
 from app.service import email_service
+from app.utils.export_writer import (EXPORT_WRITERS, KIND_BOOL, KIND_DATETIME, KIND_INT, KIND_LIST, ExportWriter,
+                                     encode_export)
+from app.utils.etag import list_etag, user_etag_dates
 from app.utils.pass_util import PasswordUtil
+from app.utils.tracing import traced
 
 _log = logging.getLogger(__name__)
 
+_UPDATABLE_FIELDS = {"first_name", "last_name", "email", "is_active", "roles"}
+
+# exportable user fields and their kinds, in column order (never the password hash)
+_EXPORT_FIELDS = {
+    "user_id": "str", "username": "str", "first_name": "str", "last_name": "str", "email": "str",
+    "is_active": KIND_BOOL, "roles": KIND_LIST, "age": KIND_INT, "created_by": "str", "created_date": KIND_DATETIME,
+    "last_updated_by": "str", "last_updated_date": KIND_DATETIME,
+}
+
+
+def _now() -> datetime:
+    # BSON dates have millisecond precision, truncate so the returned value matches the stored one
+    now = datetime.now(timezone.utc)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
 
 class UserService:
     """
@@ -24,28 +45,18 @@ class UserService:
     Attributes:
     user_repository: UserRepository
         Repository for User entity operations
+    hasher: PasswordUtil
+        Password hasher, shared by the service container
 
     """
 
-    def __init__(self, user_repository: UserRepository = Depends()):
-        _log.info("UserService Initializing")
+    def __init__(self, user_repository: UserRepository = Depends(), hasher: PasswordUtil | None = None):
+        _log.debug("UserService Initializing")
         self.repository = user_repository
+        self.hasher = hasher or PasswordUtil()
         self.email_service = email_service
 
-    async def user_create_validation(self, user_create: UserCreate):
-        """
-        Validate user create request
-            - Check if user with email already exists
-            - Check if user with username already exists
-        :param user_create: UserCreate
-        """
-        if await User.find_one(User.username == user_create.username):
-            raise BusinessException(ErrorCodes.ALREADY_EXISTS,
-                                    f"User with username already exists: {user_create.username}")
-        if await User.find_one(User.email == user_create.email):
-            raise BusinessException(ErrorCodes.ALREADY_EXISTS,
-                                    f"User with email already exists: {user_create.email}")
-
+    @traced()
     async def send_creation_email(self, user: UserDTO):
         """
         Send creation email to user with background task
@@ -55,30 +66,32 @@ class UserService:
         if user is None:
             raise BusinessException(ErrorCodes.NOT_FOUND, "User not found")
 
-        to = user.email
-        app_name = app_settings.APP_NAME
-        app_url = app_settings.APP_URL
-        subject = f"Welcome to the {app_name}"
-        body = f"Hello {user.first_name},\n\n" \
-               f"Welcome to the {app_name}. Your account has been created successfully.\n\n" \
-               f"Please visit {app_url} to login to your account.\n\n" \
-               f"{app_name} Team."
-        await self.email_service.send_email(to, subject, body)
+        context = {
+            "first_name": user.first_name,
+            "app_name": app_settings.APP_NAME,
+            "app_url": app_settings.APP_URL,
+        }
+        await self.email_service.send_template_email(user.email, "welcome", context)
         _log.debug(f"Sent Creation email sent to user: {user.email}")
 
+    @traced()
     async def create(self, user_create: UserCreate, token_data: JWTUser) -> UserDTO:
         _log.debug(f"UserService Creating user: {user_create} with: {type(user_create)}")
 
         try:
-            hashed_password = PasswordUtil().hash_password(user_create.password)
+            hashed_password = await self.hasher.hash_password_async(user_create.password)
             user = User(**user_create.model_dump(), hashed_password=hashed_password)
             user.created_by = token_data.sub
+            user.created_date = _now()
             user.last_updated_by = token_data.sub
+            user.last_updated_date = user.created_date
             user.user_id = str(uuid.uuid4())
 
-            await self.user_create_validation(user_create)
+            # username and email uniqueness is checked by the unique indexes on insert
             final_user = await self.repository.create(user)
             result = UserDTO.model_validate(final_user)
+        except BusinessException:
+            raise
         except Exception as e:
             raise BusinessException(
                 ErrorCodes.INVALID_PAYLOAD, f"Error creating user: {e}"
@@ -91,6 +104,7 @@ class UserService:
             _log.error(f"UserService Error sending creation email: {e}")
         return result
 
+    @traced()
     async def retrieve(self, user_id: str) -> Optional[UserDTO]:
         _log.debug(f"UserService Retrieving user: {user_id}")
         final_user = await self.repository.retrieve(user_id)
@@ -101,7 +115,8 @@ class UserService:
         _log.debug("UserService User retrieved")
         return result
 
-    async def find(self, query, page: int, size: int, sort: str) -> PageResponse[UserDTO]:
+    @traced()
+    async def find(self, query: QueryFilter | None, page: int, size: int, sort: str) -> PageResponse[UserDTO]:
         _log.debug("UserService list request")
         entity_page_response = await self.repository.find(query, page, size, sort)
         page_response = PageResponse[UserDTO](
@@ -114,24 +129,73 @@ class UserService:
         _log.debug("UserService Users retrieved")
         return page_response
 
-    async def update(self, user_id: str, user_update: UserUpdate, token_data: JWTUser) -> Optional[UserDTO]:
+    async def list_etag(self, query: QueryFilter | None, page: int, size: int, sort: str) -> str | None:
+        """
+        ETag of a list page from the change version of the users, read without querying the users
+        :return: None when the change version is not maintained
+        """
+        version = await self.repository.version()
+        if version is None:
+            return None
+        return list_etag(version, query.key if query is not None else None, page, size, sort)
+
+    @traced()
+    async def export(self, query: QueryFilter | None, export_format: str, fields: list[str] | None = None,
+                     gzip: bool = False) -> tuple[ExportWriter, AsyncIterator[bytes]]:
+        """
+        Export the users matching the filter as a stream of bytes, in constant memory
+        :param query: User filter
+        :param export_format: ndjson, csv or arrow
+        :param fields: Exported fields, all exportable fields when empty
+        :param gzip: Compress the stream with gzip
+        :return: Writer (media type and file extension) and the byte stream
+        """
+        _log.debug(f"UserService Exporting users as {export_format}")
+        if export_format not in EXPORT_WRITERS:
+            raise BusinessException(ErrorCodes.INVALID_INPUT, f"Unknown export format: {export_format}, "
+                                                              f"expected one of {', '.join(EXPORT_WRITERS)}")
+        unknown = [field for field in fields or [] if field not in _EXPORT_FIELDS]
+        if unknown:
+            raise BusinessException(ErrorCodes.INVALID_INPUT, f"Fields can't be exported: {', '.join(unknown)}")
+        columns = {field: _EXPORT_FIELDS[field] for field in fields} if fields else _EXPORT_FIELDS
+        try:
+            writer = EXPORT_WRITERS[export_format](columns)
+        except ImportError as e:
+            raise BusinessException(ErrorCodes.INVALID_OPERATION,
+                                    f"{export_format} export needs the {e.name} package") from e
+
+        batches = self.repository.stream(query or {}, list(columns), export_settings.BATCH_SIZE)
+        # the first batch is read before the response starts, a rejected filter fails with its error code
+        first = await anext(batches, None)
+
+        async def all_batches():
+            if first is not None:
+                yield first
+                async for batch in batches:
+                    yield batch
+
+        stream = encode_export(all_batches(), writer, export_settings.GZIP_LEVEL if gzip else None)
+        return writer, stream
+
+    @traced()
+    async def update(self, user_id: str, user_update: UserUpdate, token_data: JWTUser,
+                     if_match: str | None = None) -> Optional[UserDTO]:
+        """
+        Update the user
+        :param if_match: If-Match header, the user is updated only if its ETag is one of them
+        """
         _log.debug(f"UserService Updating user: {user_id} with: {type(user_update)}")
 
         if not user_update:
             _log.debug("UserService user_update is None")
             return None
 
-        user_entity = await self.repository.retrieve(user_id)
-        if not user_entity:
-            _log.error("UserService User not found")
-            return None
-
-        for attr in ['first_name', 'last_name', 'email', 'is_active', 'roles']:
-            if getattr(user_update, attr) is not None:
-                setattr(user_entity, attr, getattr(user_update, attr))
-
-        user_entity.last_updated_by = token_data.sub
-        final_user = await self.repository.update(user_entity)
+        fields = user_update.model_dump(include=_UPDATABLE_FIELDS, exclude_none=True)
+        fields["last_updated_by"] = token_data.sub
+        fields["last_updated_date"] = _now()
+        expected_dates = user_etag_dates(if_match, user_id) if if_match else None
+        # update_fields raises NOT_FOUND, or PRECONDITION_FAILED when the If-Match ETags are stale
+        final_user = await self.repository.update_fields(user_id, fields, expected_dates=expected_dates)
         result = UserDTO.model_validate(final_user)
         _log.debug("UserService User updated")
         return result
@@ -141,18 +205,21 @@ class UserService:
         if username == "admin":
             raise BusinessException(ErrorCodes.INVALID_PAYLOAD, "Default user cannot be edited or deleted")
 
+    @traced()
     async def delete(self, user_id: str):
         _log.debug(f"Deleting user: {user_id}")
         await self.check_default_user(user_id)
         await self.repository.delete(user_id)
         _log.debug("Deleted user")
 
+    @traced()
     async def count(self, query: dict) -> int:
         _log.debug(f"UserService Counting users with query: {query}")
         result = await self.repository.count(query)
         _log.debug(f"UserService Users counted: {result}")
         return result
 
+    @traced()
     async def retrieve_by_email(self, email: str) -> Optional[UserDTO]:
         _log.debug(f"UserService Retrieving user by email: {email}")
         final_user = await self.repository.retrieve_by_email(email)
@@ -160,6 +227,7 @@ class UserService:
         _log.debug(f"UserService User retrieved: {result}")
         return result
 
+    @traced()
     async def retrieve_by_username(self, username: str) -> Optional[UserDTO]:
         _log.debug(f"UserService Retrieving user by username: {username}")
         final_user = await self.repository.retrieve_by_username(username)
@@ -167,17 +235,24 @@ class UserService:
         _log.debug(f"UserService User retrieved: {result}")
         return result
 
+    @traced()
     async def change_password(self, username: str, current_password: str, new_password: str):
         _log.debug(f"Validating user password: {username}")
         user = await self.repository.retrieve_by_username(username)
         if user is None:
             raise BusinessException(ErrorCodes.NOT_FOUND, f"User not found: {username}")
 
-        if not PasswordUtil().verify_password(current_password, user.hashed_password):
+        if not await self.hasher.verify_password_async(current_password, user.hashed_password):
             _log.error("AccountService Password mismatch")
             raise BusinessException(ErrorCodes.INVALID_PAYLOAD, "Password mismatch")
 
-        user.hashed_password = PasswordUtil().hash_password(new_password)
-        await self.repository.update(user)
+        fields = {
+            "hashed_password": await self.hasher.hash_password_async(new_password),
+            "last_updated_by": username,
+            "last_updated_date": _now(),
+        }
+        if not await self.repository.update_password(username, user.hashed_password, fields):
+            _log.error("UserService Password changed concurrently")
+            raise BusinessException(ErrorCodes.CONFLICT, "Password was changed by another request, try again")
 
         _log.debug("Validated user password")
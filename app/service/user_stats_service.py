@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+
+from app.repository.user_stats_repository import UserStatsRepository
+from app.schema.user_stats_dto import UserStatsDTO
+
+_log = logging.getLogger(__name__)
+
+# lease of the first recount of a database when the periodic reconciliation is disabled
+_START_LEASE_SECONDS = 300
+
+
+class UserStatsService:
+    """
+    Materialized user stats: counters maintained by the user writes (see UserRepository) and a background
+    reconciliation that recounts the users every reconcile_seconds to correct their drift (writes of other tools,
+    failed increments, crashes between a write and its increment). The counters are recounted at start when the
+    stats document doesn't exist yet.
+
+    Every worker runs the loop, the one claiming the lease of the stats document reconciles for the period and the
+    others skip it, so the users are recounted once per reconcile_seconds in the cluster.
+    """
+
+    def __init__(self, repository: UserStatsRepository, reconcile_seconds: int):
+        self.repository = repository
+        self.reconcile_seconds = reconcile_seconds
+        self.lease_seconds = reconcile_seconds if reconcile_seconds > 0 else _START_LEASE_SECONDS
+        self.node_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        if await self.repository.retrieve() is None:
+            await self.reconcile()
+        if self.reconcile_seconds > 0:
+            self._task = asyncio.create_task(self._reconcile_loop(), name="user-stats-reconcile")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def reconcile(self):
+        if not await self.repository.claim(self.node_id, self.lease_seconds):
+            _log.debug(f"UserStatsService User stats reconciled by another worker for this period")
+            return
+        stats = await self.repository.reconcile()
+        if stats.last_drift:
+            _log.warning(f"UserStatsService User stats reconciled with a drift of {stats.last_drift}")
+
+    async def retrieve(self, days: int | None = None) -> UserStatsDTO:
+        """
+        User counters from the stats document, without the zero counts
+        :param days: Daily signups of the last days only, all days when None
+        """
+        stats = await self.repository.retrieve()
+        if stats is None:
+            return UserStatsDTO()
+        daily = {day: count for day, count in sorted(stats.daily.items()) if count}
+        if days is not None:
+            first_day = f"{datetime.now(timezone.utc) - timedelta(days=days - 1):%Y-%m-%d}"
+            daily = {day: count for day, count in daily.items() if day >= first_day}
+        return UserStatsDTO(total=stats.total,
+                            active=stats.active,
+                            inactive=stats.inactive,
+                            roles={role: count for role, count in sorted(stats.roles.items()) if count},
+                            daily=daily,
+                            reconciled_date=stats.reconciled_date,
+                            last_drift=stats.last_drift)
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.reconcile_seconds)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                _log.error(f"UserStatsService Reconciliation failed, Error: {e}")
@@ -0,0 +1,58 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _millis(value: datetime | None) -> int:
+    # BSON dates have millisecond precision, the ETag of a stored and a read value are the same
+    if value is None:
+        return 0
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH) // timedelta(milliseconds=1)
+
+
+def user_etag(user_id: str, last_updated_date: datetime | None) -> str:
+    """
+    Strong ETag of a user, changes with its last_updated_date
+    """
+    return f'"{user_id}@{_millis(last_updated_date)}"'
+
+
+def list_etag(version: int, *key) -> str:
+    """
+    Strong ETag of a list page, changes with the change version of the collection
+    :param version: Change version of the collection
+    :param key: Filter, page, size and sort of the page
+    """
+    digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).hexdigest()
+    return f'"v{version}-{digest}"'
+
+
+def _tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def none_match(if_none_match: str | None, etag: str) -> bool:
+    """
+    False when the If-None-Match header matches the ETag (the client's copy is current), weak comparison
+    """
+    if not if_none_match:
+        return True
+    return not any(tag == "*" or tag.removeprefix("W/") == etag for tag in _tags(if_none_match))
+
+
+def user_etag_dates(if_match: str, user_id: str) -> list[datetime | None] | None:
+    """
+    last_updated_date values of the user ETags of an If-Match header, strong comparison
+    :return: None for *, the update is not conditional then
+    """
+    dates = []
+    for tag in _tags(if_match):
+        if tag == "*":
+            return None
+        tag_user_id, _, millis = tag.strip('"').rpartition("@")
+        if tag.startswith('"') and tag_user_id == user_id and millis.isdigit():
+            dates.append(_EPOCH + timedelta(milliseconds=int(millis)) if int(millis) else None)
+    return dates
@@ -0,0 +1,154 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator
+
+from bson import ObjectId
+
+# field kinds of an export, the other fields are strings
+KIND_BOOL = "bool"
+KIND_INT = "int"
+KIND_LIST = "list"
+KIND_DATETIME = "datetime"
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ExportWriter:
+    """
+    Encodes batches of rows (dicts) of an export into bytes, the rows of a batch are encoded together.
+    fields maps the exported field names to their kind, in column order.
+    """
+
+    media_type = "application/octet-stream"
+    extension = "bin"
+
+    def __init__(self, fields: dict[str, str]):
+        self.fields = fields
+
+    def header(self) -> bytes:
+        return b""
+
+    def write(self, rows: list[dict]) -> bytes:
+        raise NotImplementedError
+
+    def close(self) -> bytes:
+        return b""
+
+
+class NdjsonWriter(ExportWriter):
+    """One JSON object per line"""
+
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def write(self, rows: list[dict]) -> bytes:
+        lines = [json.dumps({field: row.get(field) for field in self.fields}, default=_json_default,
+                            separators=(",", ":"), ensure_ascii=False) for row in rows]
+        return ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+
+
+class CsvWriter(ExportWriter):
+    """CSV with a header line, list values are joined with ; and missing values are empty"""
+
+    media_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def header(self) -> bytes:
+        return self._encode([list(self.fields)])
+
+    def write(self, rows: list[dict]) -> bytes:
+        return self._encode([[self._cell(row.get(field)) for field in self.fields] for row in rows])
+
+    @staticmethod
+    def _cell(value) -> str:
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, list):
+            return ";".join(str(item) for item in value)
+        return str(value)
+
+    @staticmethod
+    def _encode(lines: list[list[str]]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(lines)
+        return buffer.getvalue().encode("utf-8")
+
+
+class ArrowWriter(ExportWriter):
+    """Arrow IPC stream, a record batch per batch of rows. Needs the optional pyarrow package."""
+
+    media_type = "application/vnd.apache.arrow.stream"
+    extension = "arrows"
+
+    def __init__(self, fields: dict[str, str]):
+        super().__init__(fields)
+        import pyarrow as pa
+
+        types = {KIND_BOOL: pa.bool_(), KIND_INT: pa.int64(), KIND_LIST: pa.list_(pa.string()),
+                 KIND_DATETIME: pa.timestamp("ms", tz="UTC")}
+        self._pa = pa
+        self._schema = pa.schema([(field, types.get(kind, pa.string())) for field, kind in fields.items()])
+        self._buffer = io.BytesIO()
+        self._writer = pa.ipc.new_stream(self._buffer, self._schema)
+
+    def header(self) -> bytes:
+        return self._take()
+
+    def write(self, rows: list[dict]) -> bytes:
+        if rows:
+            columns = {field: [row.get(field) for row in rows] for field in self.fields}
+            self._writer.write_batch(self._pa.RecordBatch.from_pydict(columns, schema=self._schema))
+        return self._take()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._take()
+
+    def _take(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+EXPORT_WRITERS: dict[str, type[ExportWriter]] = {
+    "ndjson": NdjsonWriter,
+    "csv": CsvWriter,
+    "arrow": ArrowWriter,
+}
+
+
+async def encode_export(batches: AsyncIterator[list[dict]], writer: ExportWriter,
+                        gzip_level: int | None = None) -> AsyncIterator[bytes]:
+    """
+    Encode the batches of rows with the writer, gzip compressed on the fly when gzip_level is given.
+    Only one batch is held in memory at a time.
+    """
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31) if gzip_level is not None else None
+
+    def output(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor is not None and data else data
+
+    chunk = output(writer.header())
+    if chunk:
+        yield chunk
+    async for rows in batches:
+        chunk = output(writer.write(rows))
+        if chunk:
+            yield chunk
+    chunk = output(writer.close()) + (compressor.flush() if compressor is not None else b"")
+    if chunk:
+        yield chunk
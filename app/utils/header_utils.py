@@ -1,3 +1,5 @@
+from starlette.types import Scope
+
 from app.conf.page_response import PageResponse
 
 
@@ -13,3 +15,44 @@ def create_list_header(page_response: PageResponse):
         "X-Size": str(page_response.size),
         "X-Total-Count": str(page_response.total)
     }
+
+
+def get_header(scope: Scope, name: bytes) -> bytes | None:
+    """
+    Get the raw value of a request header from the ASGI scope.
+
+    :param scope: ASGI scope.
+    :param name: Lower-case header name.
+    :return: Header value or None.
+    """
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def accepts_encoding(accept_encoding: str | None, coding: str) -> bool:
+    """
+    Whether an Accept-Encoding header accepts a content coding, a coding with q=0 is refused.
+
+    :param accept_encoding: Accept-Encoding header value.
+    :param coding: Lower-case content coding, e.g. gzip.
+    :return: True when the coding (or *) is listed with a q-value above 0.
+    """
+    wildcard = None
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        if name == coding:
+            return q > 0
+        if name == "*":
+            wildcard = q > 0
+    return bool(wildcard)
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone, timedelta
+
+from app.conf.app_settings import watchdog_settings
+from app.schema.admin_dto import BlockingEvent, LagBucket, LoopLagReport
+
+_log = logging.getLogger(__name__)
+
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LagHistogram:
+    """
+    Fixed bucket histogram of the event loop lag in milliseconds.
+    """
+
+    def __init__(self, buckets: tuple = LAG_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def cumulative(self) -> list[LagBucket]:
+        result = []
+        total = 0
+        for bound, count in zip(list(self.buckets) + [None], self.counts):
+            total += count
+            result.append(LagBucket(le=bound, count=total))
+        return result
+
+
+class LoopWatchdog:
+    """
+    Event loop lag and blocking-call detector.
+
+    A heartbeat coroutine sleeps for the interval and records how late it wakes up (loop lag).
+    A monitor thread watches the heartbeat, when it is late by more than the threshold the loop thread is blocked
+    by synchronous code (smtplib, bcrypt, file I/O, ...) and the stack of the loop thread is captured.
+    The event being captured is shared by both threads and guarded by a lock.
+    """
+
+    def __init__(self,
+                 interval_ms: int = watchdog_settings.INTERVAL_MS,
+                 threshold_ms: int = watchdog_settings.THRESHOLD_MS,
+                 history_size: int = watchdog_settings.HISTORY_SIZE,
+                 stack_limit: int = watchdog_settings.STACK_LIMIT):
+        self.interval_ms = interval_ms
+        self.threshold_ms = threshold_ms
+        self.stack_limit = stack_limit
+        self.histogram = LagHistogram()
+        self.events: deque[BlockingEvent] = deque(maxlen=history_size)
+        self.blocking_count = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._last_beat = 0.0
+        self._current_event: BlockingEvent | None = None
+        self._lock = threading.Lock()
+        self._heartbeat_task: asyncio.Task | None = None
+        self._monitor_thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat_task is not None and not self._heartbeat_task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        _log.info(f"LoopWatchdog Starting with interval: {self.interval_ms}ms threshold: {self.threshold_ms}ms")
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stopped.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat(), name="loop-watchdog-heartbeat")
+        self._monitor_thread = threading.Thread(target=self._monitor, name="loop-watchdog-monitor", daemon=True)
+        self._monitor_thread.start()
+
+    async def stop(self):
+        if not self.running:
+            return
+        _log.info("LoopWatchdog Stopping")
+        self._stopped.set()
+        self._heartbeat_task.cancel()
+        try:
+            await self._heartbeat_task
+        except asyncio.CancelledError:
+            pass
+        self._heartbeat_task = None
+        # the monitor wakes up within one poll, joining off the loop keeps the shutdown of the other services going
+        await asyncio.to_thread(self._monitor_thread.join)
+        self._monitor_thread = None
+
+    def report(self) -> LoopLagReport:
+        return LoopLagReport(
+            running=self.running,
+            interval_ms=self.interval_ms,
+            threshold_ms=self.threshold_ms,
+            count=self.histogram.count,
+            sum_ms=round(self.histogram.sum, 3),
+            max_ms=round(self.histogram.max, 3),
+            blocking_count=self.blocking_count,
+            buckets=self.histogram.cumulative(),
+        )
+
+    def blocking_events(self) -> list[BlockingEvent]:
+        with self._lock:
+            events = list(reversed(self.events))
+            current = self._current_event
+        if current is not None:
+            events.insert(0, current)
+        return events
+
+    def prometheus(self) -> str:
+        """Lag histogram in the Prometheus text exposition format."""
+        name = "event_loop_lag_milliseconds"
+        lines = [f"# HELP {name} Event loop lag measured by the watchdog heartbeat.", f"# TYPE {name} histogram"]
+        for bucket in self.histogram.cumulative():
+            le = "+Inf" if bucket.le is None else bucket.le
+            lines.append(f'{name}_bucket{{le="{le}"}} {bucket.count}')
+        lines.append(f"{name}_sum {self.histogram.sum:.3f}")
+        lines.append(f"{name}_count {self.histogram.count}")
+        lines.append("# HELP event_loop_blocking_total Blocking events longer than the threshold.")
+        lines.append("# TYPE event_loop_blocking_total counter")
+        lines.append(f"event_loop_blocking_total {self.blocking_count}")
+        return "\n".join(lines) + "\n"
+
+    async def _heartbeat(self):
+        interval = self.interval_ms / 1000
+        start = self._last_beat = time.perf_counter()
+        while True:
+            await asyncio.sleep(interval)
+            lag_ms = max((time.perf_counter() - start - interval) * 1000, 0.0)
+            self.histogram.observe(lag_ms)
+            # the next beat starts with the event taken, a capture of the monitor for this block is discarded
+            with self._lock:
+                event = self._current_event
+                self._current_event = None
+                if event is not None:
+                    event.duration_ms = round(lag_ms, 3)
+                    self.events.append(event)
+                start = self._last_beat = time.perf_counter()
+            if event is not None:
+                _log.warning(f"LoopWatchdog Event loop blocked for {event.duration_ms}ms in task: {event.task}")
+
+    def _monitor(self):
+        interval = self.interval_ms / 1000
+        threshold = self.threshold_ms / 1000
+        poll = max(min(interval, threshold) / 2, 0.005)
+        while not self._stopped.wait(poll):
+            beat = self._last_beat
+            late = time.perf_counter() - beat - interval
+            if late < threshold or self._current_event is not None:
+                continue
+            event = self._capture(late)
+            with self._lock:
+                # checked again with the lock, the heartbeat may have run while the stack was captured
+                if self._current_event is None and self._last_beat == beat:
+                    self._current_event = event
+                    self.blocking_count += 1
+
+    def _capture(self, late: float) -> BlockingEvent:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame, limit=self.stack_limit) if frame is not None else []
+        task = None
+        try:
+            current_task = asyncio.current_task(self._loop)
+            task = current_task.get_name() if current_task else None
+        except RuntimeError:
+            pass
+        return BlockingEvent(
+            started_date=datetime.now(timezone.utc) - timedelta(seconds=late),
+            task=task,
+            stack=[line.rstrip() for line in stack],
+        )
+
+
+loop_watchdog = LoopWatchdog()
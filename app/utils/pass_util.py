@@ -1,16 +1,44 @@
+import asyncio
+import contextvars
+import functools
 import logging
+from concurrent.futures import Executor
 
 from passlib.context import CryptContext
 
+from app.utils.server_timing import timed
+
 log = logging.getLogger(__name__)
 
 
 class PasswordUtil:
-    def __init__(self):
+    """
+    bcrypt password hashing.
+
+    A hash costs tens of milliseconds of CPU, the async methods run it on the executor (the hasher pool of the service
+    container, default the loop executor) so the event loop keeps serving other requests meanwhile.
+    """
+
+    def __init__(self, executor: Executor | None = None):
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.executor = executor
 
+    @timed("bcrypt")
     def hash_password(self, password: str) -> str:
         return self.pwd_context.hash(password)
 
+    @timed("bcrypt")
     def verify_password(self, plain_text_password: str, hashed_password: str) -> bool:
         return self.pwd_context.verify(plain_text_password, hashed_password)
+
+    async def hash_password_async(self, password: str) -> str:
+        return await self._run(self.hash_password, password)
+
+    async def verify_password_async(self, plain_text_password: str, hashed_password: str) -> bool:
+        return await self._run(self.verify_password, plain_text_password, hashed_password)
+
+    async def _run(self, func, *args):
+        # like asyncio.to_thread, the context is copied so Server-Timing and tracing see the caller's request
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(self.executor,
+                                                                functools.partial(context.run, func, *args))
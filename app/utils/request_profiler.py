@@ -0,0 +1,115 @@
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+
+from app.conf.app_settings import profiling_settings
+from app.schema.admin_dto import ProfileFunctionStat, ProfileReport
+
+_log = logging.getLogger(__name__)
+
+# cProfile hooks the interpreter profiler of the thread, only one request can be profiled at a time.
+_profiler_lock = threading.Lock()
+
+
+class ProfileStore:
+    """
+    In-memory ring buffer of the latest request profiles of this worker process.
+    """
+
+    def __init__(self, size: int):
+        self._reports: deque[ProfileReport] = deque(maxlen=size)
+
+    def add(self, report: ProfileReport):
+        self._reports.append(report)
+
+    def get(self, profile_id: str) -> ProfileReport | None:
+        for report in self._reports:
+            if report.profile_id == profile_id:
+                return report
+        return None
+
+    def list(self) -> list[ProfileReport]:
+        return list(reversed(self._reports))
+
+
+profile_store = ProfileStore(profiling_settings.HISTORY_SIZE)
+
+
+class RequestProfiler:
+    """
+    Deterministic profiler for a single request.
+
+    The event loop is shared, so every coroutine that runs while the request is awaiting is profiled too.
+    Wall time is split into CPU time of the loop thread and await time (I/O, executor jobs, sleeps).
+    """
+
+    def __init__(self):
+        self.profile_id = str(uuid.uuid4())
+        self._profiler = cProfile.Profile()
+        self._wall_start = 0.0
+        self._cpu_start = 0.0
+        self._locked = False
+
+    def start(self) -> bool:
+        """
+        Start profiling, returns False when another request is already being profiled.
+        """
+        if not _profiler_lock.acquire(blocking=False):
+            _log.warning("RequestProfiler Another request is being profiled, skipping")
+            return False
+        self._locked = True
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        self._profiler.enable()
+        return True
+
+    def stop(self, method: str, path: str, status_code: int | None) -> ProfileReport:
+        self._profiler.disable()
+        wall_time = (time.perf_counter() - self._wall_start) * 1000
+        cpu_time = (time.thread_time() - self._cpu_start) * 1000
+        if self._locked:
+            _profiler_lock.release()
+            self._locked = False
+
+        stats = pstats.Stats(self._profiler).sort_stats(profiling_settings.SORT_BY)
+        report = ProfileReport(
+            profile_id=self.profile_id,
+            method=method,
+            path=path,
+            status_code=status_code,
+            created_date=datetime.now(timezone.utc),
+            wall_time_ms=round(wall_time, 3),
+            cpu_time_ms=round(cpu_time, 3),
+            await_time_ms=round(max(wall_time - cpu_time, 0.0), 3),
+            top_functions=self._top_functions(stats),
+            call_tree=self._call_tree(stats),
+        )
+        _log.debug(f"RequestProfiler {method} {path} profiled in {report.wall_time_ms}ms")
+        return report
+
+    @staticmethod
+    def _top_functions(stats: pstats.Stats) -> list[ProfileFunctionStat]:
+        result = []
+        for func in stats.fcn_list[:profiling_settings.TOP_N]:
+            primitive_calls, ncalls, total_time, cumulative_time, _ = stats.stats[func]
+            result.append(ProfileFunctionStat(
+                function=pstats.func_std_string(func),
+                ncalls=ncalls,
+                primitive_calls=primitive_calls,
+                total_time_ms=round(total_time * 1000, 3),
+                cumulative_time_ms=round(cumulative_time * 1000, 3),
+            ))
+        return result
+
+    @staticmethod
+    def _call_tree(stats: pstats.Stats) -> str:
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.print_callees(profiling_settings.TOP_N)
+        return stream.getvalue()
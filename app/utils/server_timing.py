@@ -0,0 +1,120 @@
+import functools
+import inspect
+import time
+import typing
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+from starlette.responses import JSONResponse
+
+
+class ServerTiming:
+    """
+    Request-scoped Server-Timing metrics.
+
+    Durations recorded with the same name are summed, the number of calls is reported in the description,
+    e.g. db;dur=12.40;desc="3 calls".
+    """
+
+    __slots__ = ("_metrics",)
+
+    def __init__(self):
+        self._metrics: dict[str, list] = {}
+
+    def add(self, name: str, duration_ms: float):
+        metric = self._metrics.get(name)
+        if metric is None:
+            self._metrics[name] = [duration_ms, 1]
+        else:
+            metric[0] += duration_ms
+            metric[1] += 1
+
+    def get(self, name: str) -> float | None:
+        metric = self._metrics.get(name)
+        return metric[0] if metric else None
+
+    def header_value(self) -> str:
+        parts = []
+        for name, (duration, count) in self._metrics.items():
+            part = f"{name};dur={duration:.2f}"
+            if count > 1:
+                part += f';desc="{count} calls"'
+            parts.append(part)
+        return ", ".join(parts)
+
+
+_current_timing: ContextVar[ServerTiming | None] = ContextVar("server_timing", default=None)
+
+
+def activate(timing: ServerTiming) -> Token:
+    """Bind the timing to the current request context."""
+    return _current_timing.set(timing)
+
+
+def deactivate(token: Token):
+    _current_timing.reset(token)
+
+
+def current() -> ServerTiming | None:
+    return _current_timing.get()
+
+
+@contextmanager
+def timing_span(name: str):
+    """
+    Measure the block and add it to the Server-Timing metric of the current request.
+    Outside a request (tests, scripts, background tasks) this is a no-op.
+    """
+    timing = _current_timing.get()
+    if timing is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, (time.perf_counter() - start) * 1000)
+
+
+def timed(name: str):
+    """
+    Decorator version of timing_span for sync and async functions.
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                timing = _current_timing.get()
+                if timing is None:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    timing.add(name, (time.perf_counter() - start) * 1000)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timing = _current_timing.get()
+            if timing is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timing.add(name, (time.perf_counter() - start) * 1000)
+
+        return wrapper
+
+    return decorator
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that reports the JSON encoding time as the serialize metric."""
+
+    def render(self, content: typing.Any) -> bytes:
+        with timing_span("serialize"):
+            return super().render(content)
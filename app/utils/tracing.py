@@ -0,0 +1,402 @@
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+
+from pymongo import monitoring
+
+from app.conf.app_settings import tracing_settings
+
+_log = logging.getLogger(__name__)
+
+SPAN_KIND_INTERNAL = "internal"
+SPAN_KIND_SERVER = "server"
+SPAN_KIND_CLIENT = "client"
+
+
+class Span:
+    """
+    Lightweight span, ids are hex strings compatible with W3C trace context and OTLP.
+    """
+
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str | None = None, kind: str = SPAN_KIND_INTERNAL,
+                 start_ns: int | None = None):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes: dict = {}
+        self.error: str | None = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def child(self, name: str, kind: str = SPAN_KIND_INTERNAL) -> "Span":
+        return Span(name, self.trace_id, self.span_id, kind)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+# region exporters
+class SpanExporter:
+    """Base class of the span sinks, export is called with a batch of finished spans."""
+
+    async def export(self, spans: list[Span]):
+        raise NotImplementedError
+
+    async def shutdown(self):
+        pass
+
+
+class LoggingSpanExporter(SpanExporter):
+    async def export(self, spans: list[Span]):
+        for span in spans:
+            _log.info(f"Span {json.dumps(span.to_dict(), default=str)}")
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends spans as JSON lines, the file is written on a worker thread."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    async def export(self, spans: list[Span]):
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans)
+        await asyncio.to_thread(self._write, lines)
+
+    def _write(self, lines: str):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """Posts spans in the OTLP/HTTP JSON format to a collector."""
+
+    _KINDS = {SPAN_KIND_INTERNAL: 1, SPAN_KIND_SERVER: 2, SPAN_KIND_CLIENT: 3}
+
+    def __init__(self, endpoint: str, service_name: str):
+        import httpx
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._client = httpx.AsyncClient(timeout=10)
+
+    async def export(self, spans: list[Span]):
+        response = await self._client.post(self.endpoint, json=self._payload(spans))
+        response.raise_for_status()
+
+    async def shutdown(self):
+        await self._client.aclose()
+
+    def _payload(self, spans: list[Span]) -> dict:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{"scope": {"name": __name__}, "spans": [self._span(span) for span in spans]}],
+        }]}
+
+    def _span(self, span: Span) -> dict:
+        result = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": self._KINDS.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+        }
+        if span.parent_id:
+            result["parentSpanId"] = span.parent_id
+        return result
+
+
+def create_exporter(name: str) -> SpanExporter | None:
+    if name == "log":
+        return LoggingSpanExporter()
+    if name == "file":
+        return FileSpanExporter(tracing_settings.FILE_PATH)
+    if name == "otlp":
+        return OTLPHttpSpanExporter(tracing_settings.OTLP_ENDPOINT, tracing_settings.SERVICE_NAME)
+    return None
+
+
+# endregion exporters
+
+
+class BatchSpanProcessor:
+    """
+    Buffers finished spans and exports them in batches from a background task.
+    Spans can be finished on any thread (the Mongo command listener runs on the motor executor).
+    """
+
+    def __init__(self, exporter: SpanExporter | None,
+                 batch_size: int = tracing_settings.BATCH_SIZE,
+                 flush_interval_ms: int = tracing_settings.FLUSH_INTERVAL_MS,
+                 max_queue_size: int = tracing_settings.MAX_QUEUE_SIZE):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue_size = max_queue_size
+        self.dropped = 0
+        self._queue: deque[Span] = deque()
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def on_end(self, span: Span):
+        if self.exporter is None:
+            return
+        if len(self._queue) >= self.max_queue_size:
+            self.dropped += 1
+            return
+        self._queue.append(span)
+        if len(self._queue) >= self.batch_size and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def start(self):
+        if self.exporter is None or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="span-exporter")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.flush()
+        await self.exporter.shutdown()
+
+    async def flush(self):
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            try:
+                await self.exporter.export(batch)
+            except Exception as e:
+                _log.error(f"BatchSpanProcessor Failed to export {len(batch)} spans, Error: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Creates spans and keeps the current span in a contextvar.
+
+    The sampling decision is made once at the edge (start_trace). Unsampled requests never set a current span,
+    so span() and traced() only pay for a contextvar lookup.
+    """
+
+    def __init__(self, processor: BatchSpanProcessor, sample_rate: float = tracing_settings.SAMPLE_RATE,
+                 enabled: bool = tracing_settings.ENABLED):
+        self.processor = processor
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+
+    def start_trace(self, name: str, traceparent: str | None = None) -> Span | None:
+        """
+        Start the root span of a request, honours the sampled flag of an incoming W3C traceparent header.
+        :return: root span or None when the request is not sampled
+        """
+        if not self.enabled:
+            return None
+        parsed = _parse_traceparent(traceparent) if traceparent else None
+        if parsed is not None:
+            trace_id, parent_id, sampled = parsed
+            if not sampled:
+                return None
+            return Span(name, trace_id, parent_id, SPAN_KIND_SERVER)
+        if random.random() >= self.sample_rate:
+            return None
+        return Span(name, f"{random.getrandbits(128):032x}", None, SPAN_KIND_SERVER)
+
+    def end(self, span: Span, error: BaseException | None = None):
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.error = f"{type(error).__name__}: {error}"
+        self.processor.on_end(span)
+
+    async def start(self):
+        await self.processor.start()
+
+    async def stop(self):
+        await self.processor.stop()
+
+
+tracer = Tracer(BatchSpanProcessor(create_exporter(tracing_settings.EXPORTER)))
+
+
+def activate(span: Span) -> Token:
+    return _current_span.set(span)
+
+
+def deactivate(token: Token):
+    _current_span.reset(token)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, kind: str = SPAN_KIND_INTERNAL):
+    """
+    Child span of the current span, no-op when the request is not sampled.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, kind)
+    token = _current_span.set(child)
+    error = None
+    try:
+        yield child
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        tracer.end(child, error)
+
+
+def traced(name: str | None = None):
+    """
+    Decorator that runs sync and async functions in a child span named after the function qualname.
+    """
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _parse_traceparent(value: str) -> tuple[str, str, bool] | None:
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class TracingCommandListener(monitoring.CommandListener):
+    """
+    pymongo command listener that records a client span per Mongo command.
+    Motor runs commands on its executor with a copy of the caller context, so the current span is visible here.
+    """
+
+    def __init__(self):
+        self._pending: dict[tuple, Span] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        parent = _current_span.get()
+        if parent is None:
+            return
+        command_span = parent.child(f"mongo.{event.command_name}", SPAN_KIND_CLIENT)
+        command_span.set_attribute("db.system", "mongodb")
+        command_span.set_attribute("db.name", event.database_name)
+        collection = event.command.get(event.command_name)
+        if isinstance(collection, str):
+            command_span.set_attribute("db.mongodb.collection", collection)
+        with self._lock:
+            self._pending[(event.request_id, event.connection_id)] = command_span
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, event.failure)
+
+    def _finish(self, event, failure=None):
+        with self._lock:
+            command_span = self._pending.pop((event.request_id, event.connection_id), None)
+        if command_span is None:
+            return
+        command_span.end_ns = command_span.start_ns + event.duration_micros * 1000
+        if failure is not None:
+            command_span.error = str(failure)
+        tracer.processor.on_end(command_span)
+
+
+def install_log_record_factory():
+    """
+    Attach trace_id and span_id of the current span to every log record (%(trace_id)s in the log format).
+    """
+    default_factory = logging.getLogRecordFactory()
+
+    def record_factory(*args, **kwargs):
+        record = default_factory(*args, **kwargs)
+        current = _current_span.get()
+        record.trace_id = current.trace_id if current is not None else "-"
+        record.span_id = current.span_id if current is not None else "-"
+        return record
+
+    logging.setLogRecordFactory(record_factory)
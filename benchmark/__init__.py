@@ -0,0 +1,6 @@
+# Benchmarks and load tests, run as modules from the project root, e.g. python -m benchmark.bench_user_repository
+import os
+
+# app logging is configured on import, keep the console handler only and skip the debug records while measuring
+os.environ.setdefault("LOG_HANDLER", '["console"]')
+os.environ.setdefault("LOG_LEVEL", "WARNING")
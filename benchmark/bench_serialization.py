@@ -0,0 +1,167 @@
+"""
+Serialization micro-benchmarks for the User read path.
+
+The read path converts the Mongo document to User (Beanie), User to UserDTO (model_validate), UserDTO to a dict
+(to_json) and the dicts to the JSON body (JSONResponse). Every hop and the alternatives are measured for a single user
+and pages of 10/100/1000 users, with the time per call and the allocations (tracemalloc peak) per call.
+
+    python -m benchmark.bench_serialization --sizes 1,10,100,1000 --output serialization.json
+"""
+import benchmark  # noqa: F401 (logging environment, must be imported before app)
+
+import argparse
+import asyncio
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from beanie import init_beanie
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from mongomock_motor import AsyncMongoMockClient
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse
+
+from app.entity.user_entity import User
+from app.schema.user_dto import UserDTO
+from benchmark.stats import compare, load_results, print_table, save_results, summarize
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+_USER_LIST = TypeAdapter(list[UserDTO])
+
+
+def _documents(count: int) -> list[dict]:
+    created_date = datetime(2024, 1, 1)
+    return [{
+        "_id": ObjectId(),
+        "user_id": f"bench-{i}",
+        "username": f"user{i:08d}",
+        "first_name": f"First{i}",
+        "last_name": f"Last{i}",
+        "email": f"user{i:08d}@bench.pyfapi.dev",
+        "hashed_password": "$2b$12$" + "x" * 53,
+        "is_active": True,
+        "roles": ["admin", "user"] if i % 50 == 0 else ["user"],
+        "created_by": "bench",
+        "created_date": created_date - timedelta(minutes=i),
+        "last_updated_by": "bench",
+        "last_updated_date": created_date - timedelta(minutes=i),
+        "age": 18 + i % 60,
+    } for i in range(count)]
+
+
+def cases(count: int) -> dict:
+    """
+    Benchmark cases of a page, every case is a function without arguments
+    """
+    docs = _documents(count)
+    users = [User.model_validate(doc) for doc in docs]
+    dtos = [UserDTO.model_validate(user) for user in users]
+    payload = [dto.to_json() for dto in dtos]
+
+    result = {
+        # hops of the current path
+        "hop.document_to_user": lambda: [User.model_validate(doc) for doc in docs],
+        "hop.user_to_dto": lambda: [UserDTO.model_validate(user) for user in users],
+        "hop.dto_to_json": lambda: [dto.to_json() for dto in dtos],
+        "hop.json_response": lambda: JSONResponse(content=payload).body,
+        "path.current": lambda: JSONResponse(
+            content=[UserDTO.model_validate(user).to_json() for user in users]).body,
+        # alternatives
+        "alt.user_dump_to_dto": lambda: [UserDTO.model_validate(user.model_dump()) for user in users],
+        "alt.dto_model_dump_json_mode": lambda: [dto.model_dump(mode="json") for dto in dtos],
+        "alt.dto_jsonable_encoder": lambda: jsonable_encoder(dtos),
+        "alt.dto_type_adapter_dump_json": lambda: _USER_LIST.dump_json(dtos),
+        "path.type_adapter": lambda: _USER_LIST.dump_json(_USER_LIST.validate_python(users, from_attributes=True)),
+    }
+    if orjson is not None:
+        result["alt.json_orjson"] = lambda: orjson.dumps(payload)
+        result["path.orjson"] = lambda: orjson.dumps([UserDTO.model_validate(user).to_json() for user in users])
+    return result
+
+
+def measure_sync(func, iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        func()
+    # like timeit, the collector is disabled while timing so a collection of an earlier case is not charged here
+    gc.collect()
+    gc.disable()
+    try:
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter_ns()
+            func()
+            samples.append(time.perf_counter_ns() - start)
+    finally:
+        gc.enable()
+    result = summarize(samples)
+
+    # allocations are measured in a separate pass, tracemalloc slows every allocation down
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(min(iterations, 20)):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+    finally:
+        tracemalloc.stop()
+    result["alloc_peak_kb"] = round(sorted(peaks)[len(peaks) // 2] / 1024, 2)
+    return result
+
+
+async def init():
+    await init_beanie(database=AsyncMongoMockClient()["pyfapi_bench"], document_models=[User])
+
+
+def main(args) -> int:
+    asyncio.run(init())
+    results = {}
+    for size in args.sizes:
+        # keep the total work per case roughly constant
+        iterations = max(args.iterations * 10 // max(size, 10), 20)
+        for name, func in cases(size).items():
+            results[f"{size:>4}/{name}"] = measure_sync(func, iterations, args.warmup)
+
+    print_table(results)
+    print(f"\n{'benchmark':<48} {'alloc peak kb':>14}")
+    for name, result in sorted(results.items()):
+        print(f"{name:<48} {result['alloc_peak_kb']:>14}")
+
+    meta = {"iterations": args.iterations, "orjson": orjson is not None}
+    if args.output:
+        save_results(args.output, results, meta)
+    if args.baseline and args.save_baseline:
+        save_results(args.baseline, results, meta)
+    elif args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=lambda v: [int(s) for s in v.split(",")], default=[1, 10, 100, 1000],
+                        help="Comma separated page sizes")
+    parser.add_argument("--iterations", type=int, default=1000, help="Iterations of the single user case")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Baseline JSON file to compare the results with")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,156 @@
+"""
+UserRepository and UserService micro-benchmarks with seeded datasets.
+
+mongomock-motor is the default backend, it needs no server and is good for spotting regressions in the python code
+path. Use a local mongod for real numbers and for the 100k/1M datasets.
+
+    python -m benchmark.bench_user_repository --sizes 10000
+    python -m benchmark.bench_user_repository --backend mongod --uri mongodb://localhost:27017 \
+        --sizes 10000,100000,1000000 --output bench.json --baseline benchmark/baseline.json
+
+The exit code is 1 when a benchmark regresses past --threshold compared with the baseline.
+"""
+import benchmark  # noqa: F401 (logging environment, must be imported before app)
+
+import argparse
+import asyncio
+import itertools
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+from beanie import init_beanie
+
+from app.entity.user_entity import User
+from app.repository.user_repository import UserRepository
+from app.service.user_service import UserService
+from benchmark import datagen
+from benchmark.stats import compare, load_results, measure, print_table, save_results
+
+_DATABASE = "pyfapi_bench"
+_SEED_BATCH_SIZE = 10_000
+
+
+async def init_backend(backend: str, uri: str):
+    if backend == "mongomock":
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(uri)
+    db = client[_DATABASE]
+    await db.drop_collection(User.Settings.name)
+    await init_beanie(database=db, document_models=[User])
+    return client
+
+
+async def seed(size: int, data_seed: int) -> tuple[list[str], list[str]]:
+    """
+    Replace the users collection with size users of the datagen dataset, the password is hashed once
+    :return: user_ids and usernames of the users, to look them up
+    """
+    collection = User.get_motor_collection()
+    await collection.delete_many({})
+    hashed_password = datagen.hash_password("password")
+    start_date, end_date = datetime(2018, 1, 1, tzinfo=timezone.utc), datetime(2025, 1, 1, tzinfo=timezone.utc)
+    user_ids, usernames = [], []
+    for batch, start, count in datagen.batches(size, _SEED_BATCH_SIZE):
+        docs = datagen.generate_batch(data_seed, batch, start, count, hashed_password, start_date, end_date)
+        user_ids.extend(doc["user_id"] for doc in docs)
+        usernames.extend(doc["username"] for doc in docs)
+        await collection.insert_many(docs, ordered=False)
+    return user_ids, usernames
+
+
+async def run_size(size: int, iterations: int, warmup: int, rng: random.Random, user_ids: list[str],
+                   usernames: list[str]) -> dict:
+    repository = UserRepository()
+    service = UserService(repository)
+
+    # measure() restarts the iteration index after the warmup, the unique indexes need a new user every call
+    created = itertools.count()
+
+    async def create(_):
+        n = next(created)
+        await repository.create(User(user_id=f"new-{size}-{n}", username=f"new{size}x{n}", first_name="New",
+                                     last_name="User", email=f"new{size}x{n}@bench.pyfapi.dev", is_active=True,
+                                     roles=["user"]))
+
+    async def retrieve(_):
+        await repository.retrieve(rng.choice(user_ids))
+
+    async def retrieve_by_username(_):
+        await repository.retrieve_by_username(rng.choice(usernames))
+
+    async def find_page(_):
+        await repository.find('{"is_active": true}', rng.randrange(10), 10, "-_id")
+
+    async def find_filter(_):
+        await repository.find('{"age": {"$gte": 30}, "roles": {"$in": ["admin"]}}', 0, 10, "-_id")
+
+    async def service_find(_):
+        await service.find('{"is_active": true}', rng.randrange(10), 10, "-_id")
+
+    benchmarks = {
+        "repository.retrieve": retrieve,
+        "repository.retrieve_by_username": retrieve_by_username,
+        "repository.find": find_page,
+        "repository.find_filter": find_filter,
+        "service.find": service_find,
+        # last, the inserted users would change the dataset of the other benchmarks
+        "repository.create": create,
+    }
+    results = {}
+    for name, func in benchmarks.items():
+        results[f"{size}/{name}"] = await measure(func, iterations, warmup)
+    return results
+
+
+async def main(args) -> int:
+    rng = random.Random(args.seed)
+    client = await init_backend(args.backend, args.uri)
+    results = {}
+    try:
+        for size in args.sizes:
+            start = time.perf_counter()
+            user_ids, usernames = await seed(size, args.seed)
+            print(f"Seeded {size} users in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            results.update(await run_size(size, args.iterations, args.warmup, rng, user_ids, usernames))
+    finally:
+        if args.backend == "mongod":
+            await client.drop_database(_DATABASE)
+
+    print_table(results)
+    meta = {"backend": args.backend, "iterations": args.iterations, "seed": args.seed}
+    if args.output:
+        save_results(args.output, results, meta)
+    if args.baseline and args.save_baseline:
+        save_results(args.baseline, results, meta)
+    elif args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backend", choices=["mongomock", "mongod"], default="mongomock")
+    parser.add_argument("--uri", default="mongodb://localhost:27017", help="MongoDB URI of the mongod backend")
+    parser.add_argument("--sizes", type=lambda v: [int(s) for s in v.split(",")], default=[10_000],
+                        help="Comma separated dataset sizes, e.g. 10000,100000,1000000")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Baseline JSON file to compare the results with")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
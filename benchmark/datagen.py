@@ -0,0 +1,186 @@
+"""
+Scale-test data generator for the users collection.
+
+Generates deterministic User documents for a seed: skewed roles, Zipf-like first/last names, realistic email domains,
+ages and created/updated dates in a range. Batches are written directly with unordered insert_many by parallel worker
+processes, each with its own connection. The password is hashed once and reused unless --unique-hashes is given.
+
+    python -m benchmark.datagen --uri mongodb://localhost:27017 --database app --count 10000000 --drop
+    python -m benchmark.datagen --count 100000 --unique-hashes --hash-rounds 4
+"""
+import benchmark  # noqa: F401 (logging environment, must be imported before app)
+
+import argparse
+import functools
+import itertools
+import multiprocessing
+import random
+import struct
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+
+FIRST_NAMES = ["james", "mary", "john", "patricia", "robert", "jennifer", "michael", "linda", "william", "elizabeth",
+               "david", "barbara", "richard", "susan", "joseph", "jessica", "thomas", "sarah", "charles", "karen",
+               "mehmet", "ayse", "mustafa", "fatma", "ahmet", "emine", "ali", "hatice", "huseyin", "zeynep",
+               "wei", "fang", "li", "na", "jose", "maria", "juan", "ana", "hans", "anna", "pierre", "marie", "yuki",
+               "hiroshi", "olga", "ivan", "priya", "rahul", "fatima", "omar"]
+LAST_NAMES = ["smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "rodriguez", "martinez",
+              "hernandez", "lopez", "gonzalez", "wilson", "anderson", "thomas", "taylor", "moore", "jackson", "martin",
+              "yilmaz", "kaya", "demir", "sahin", "celik", "yildiz", "aydin", "ozturk", "arslan", "dogan",
+              "wang", "li", "zhang", "liu", "chen", "muller", "schmidt", "schneider", "fischer", "dubois",
+              "tanaka", "suzuki", "ivanov", "petrov", "kumar", "singh", "patel", "khan", "ali", "nguyen"]
+EMAIL_DOMAINS = {"gmail.com": 45, "outlook.com": 15, "yahoo.com": 12, "hotmail.com": 8, "icloud.com": 6,
+                 "proton.me": 2, "company.com": 12}
+# role sets with their share of the users, most users only have the user role
+ROLE_SETS = {("user",): 900, ("user", "manager"): 60, ("user", "support"): 25, ("admin", "user"): 10,
+             ("admin",): 5}
+ACTIVE_RATIO = 0.85
+
+# Zipf-like weights, the first names of the lists are the most frequent
+_FIRST_WEIGHTS = [1 / (rank + 1) for rank in range(len(FIRST_NAMES))]
+_LAST_WEIGHTS = [1 / (rank + 1) ** 0.8 for rank in range(len(LAST_NAMES))]
+_DOMAINS, _DOMAIN_WEIGHTS = list(EMAIL_DOMAINS), list(EMAIL_DOMAINS.values())
+_ROLES, _ROLE_WEIGHTS = [list(roles) for roles in ROLE_SETS], list(ROLE_SETS.values())
+
+_USERNAME_FORMATS = ["{first}.{last}{n}", "{first}{last}{n}", "{first}_{n}", "{f}{last}{n}"]
+
+
+@functools.lru_cache
+def _crypt_context(rounds: int | None):
+    from passlib.context import CryptContext
+    if rounds is None:
+        from app.utils.pass_util import PasswordUtil
+        return PasswordUtil().pwd_context
+    return CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+
+
+def hash_password(password: str, rounds: int | None = None) -> str:
+    """
+    bcrypt hash of the password, with the app settings or the given rounds
+    """
+    return _crypt_context(rounds).hash(password)
+
+
+def generate_batch(seed: int, batch: int, start: int, count: int, hashed_password: str | None,
+                   start_date: datetime, end_date: datetime, hash_rounds: int | None = None) -> list[dict]:
+    """
+    Generate the users start..start + count. The result only depends on the seed and the batch number,
+    so batches generated in any order or process give the same dataset.
+    :param hashed_password: Hash shared by all users, None hashes a password per user (slow)
+    """
+    rng = random.Random(f"{seed}-{batch}")
+    span = (end_date - start_date).total_seconds()
+    firsts = rng.choices(FIRST_NAMES, _FIRST_WEIGHTS, k=count)
+    lasts = rng.choices(LAST_NAMES, _LAST_WEIGHTS, k=count)
+    domains = rng.choices(_DOMAINS, _DOMAIN_WEIGHTS, k=count)
+    roles = rng.choices(_ROLES, _ROLE_WEIGHTS, k=count)
+    docs = []
+    for i in range(count):
+        n = start + i
+        first, last = firsts[i], lasts[i]
+        username = rng.choice(_USERNAME_FORMATS).format(first=first, last=last, f=first[0], n=n)
+        # sign-ups grow over time: the square root skews the dates to the end of the range
+        created_date = start_date + timedelta(seconds=span * rng.random() ** 0.5)
+        updated_date = created_date + timedelta(seconds=(end_date - created_date).total_seconds() * rng.random())
+        docs.append({
+            # deterministic ObjectId: creation timestamp and the user number, _id order follows the sign-up date
+            "_id": ObjectId(struct.pack(">I", int(created_date.timestamp())) + n.to_bytes(8, "big")),
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "username": username,
+            "first_name": first.capitalize(),
+            "last_name": last.capitalize(),
+            "email": f"{username}@{domains[i]}",
+            "hashed_password": hashed_password or hash_password(f"password{n}", hash_rounds),
+            "is_active": rng.random() < ACTIVE_RATIO,
+            "roles": roles[i],
+            "created_by": "datagen",
+            "created_date": created_date.replace(microsecond=created_date.microsecond // 1000 * 1000),
+            "last_updated_by": "datagen",
+            "last_updated_date": updated_date.replace(microsecond=updated_date.microsecond // 1000 * 1000),
+            "age": min(max(int(rng.gauss(36, 12)), 18), 90),
+        })
+    return docs
+
+
+def batches(count: int, batch_size: int):
+    """
+    (batch number, start, count) of every batch
+    """
+    for batch, start in enumerate(range(0, count, batch_size)):
+        yield batch, start, min(batch_size, count - start)
+
+
+def _load_worker(args: argparse.Namespace, worker: int, hashed_password: str | None, progress) -> int:
+    from pymongo import MongoClient
+    client = MongoClient(args.uri)
+    collection = client[args.database][args.collection]
+    inserted = 0
+    for batch, start, count in itertools.islice(batches(args.count, args.batch_size), worker, None, args.workers):
+        docs = generate_batch(args.seed, batch, start, count, hashed_password, args.start_date, args.end_date,
+                              args.hash_rounds)
+        collection.insert_many(docs, ordered=False, bypass_document_validation=True)
+        inserted += count
+        with progress.get_lock():
+            progress.value += count
+    client.close()
+    return inserted
+
+
+def load(args: argparse.Namespace) -> int:
+    from pymongo import MongoClient
+    client = MongoClient(args.uri)
+    collection = client[args.database][args.collection]
+    if args.drop:
+        collection.drop()
+    client.close()
+
+    hashed_password = None if args.unique_hashes else hash_password(args.password, args.hash_rounds)
+    progress = multiprocessing.Value("q", 0)
+    begin = time.perf_counter()
+    processes = [multiprocessing.Process(target=_load_worker, args=(args, worker, hashed_password, progress))
+                 for worker in range(args.workers)]
+    for process in processes:
+        process.start()
+    while any(process.is_alive() for process in processes):
+        time.sleep(1)
+        elapsed = time.perf_counter() - begin
+        print(f"\r{progress.value}/{args.count} users, {progress.value / elapsed:,.0f} users/s", end="",
+              file=sys.stderr)
+    print(file=sys.stderr)
+    failed = [process.exitcode for process in processes if process.exitcode]
+    if failed:
+        print(f"{len(failed)} workers failed", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - begin
+    print(f"Inserted {progress.value} users in {elapsed:.1f}s ({progress.value / elapsed:,.0f} users/s)")
+    return 0
+
+
+def _date(value: str) -> datetime:
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--database", default="app")
+    parser.add_argument("--collection", default="app_user")
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--start-date", type=_date, default=_date("2018-01-01"))
+    parser.add_argument("--end-date", type=_date, default=_date("2025-01-01"))
+    parser.add_argument("--password", default="password", help="Password of the users when the hash is reused")
+    parser.add_argument("--unique-hashes", action="store_true", help="Hash a password per user (slow)")
+    parser.add_argument("--hash-rounds", type=int, help="bcrypt rounds of the generated hashes, default the app setting")
+    parser.add_argument("--drop", action="store_true", help="Drop the collection before loading")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(load(parse_args()))
@@ -0,0 +1,300 @@
+"""
+HTTP load generator for the API surface.
+
+Logs in with /auth/login and drives a weighted mix of list users, get user, create user, get account and update user
+against a running app.
+
+- open model (--rps): requests start on a fixed schedule whatever the response times are, the latency is measured
+  from the intended start, so a stalled server is not hidden by a client waiting for it (coordinated omission).
+- closed model (--concurrency without --rps): each virtual user sends the next request when the previous one
+  completes, the corrected histogram back-fills the requests a stalled user did not send (--expected-interval-ms,
+  default the median service time).
+
+    python -m benchmark.load_test --base-url http://localhost:8000 --rps 200 --duration 60
+    python -m benchmark.load_test --concurrency 32 --duration 60 --mix list_users=50,get_user=30,account=20
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import httpx
+
+from benchmark.stats import LatencyHistogram, environment
+
+DEFAULT_MIX = "list_users=40,get_user=25,account=20,create_user=5,update_user=10"
+
+
+class LoadTestState:
+    """
+    Known user ids and the results of a run
+    """
+
+    def __init__(self, context_path: str, run_id: str, seed: int):
+        self.context_path = context_path
+        self.run_id = run_id
+        self.rng = random.Random(seed)
+        self.user_ids: list[str] = []
+        self.created_ids: list[str] = []
+        self.sequence = 0
+        self.service_time: dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.response_time: dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.status_codes: dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+
+    def next_sequence(self) -> int:
+        self.sequence += 1
+        return self.sequence
+
+
+# region operations
+async def list_users(client: httpx.AsyncClient, state: LoadTestState) -> httpx.Response:
+    return await client.get(f"{state.context_path}/users", params={"page": state.rng.randrange(5), "limit": 10})
+
+
+async def get_user(client: httpx.AsyncClient, state: LoadTestState) -> httpx.Response:
+    return await client.get(f"{state.context_path}/users/{state.rng.choice(state.user_ids)}")
+
+
+async def get_account(client: httpx.AsyncClient, state: LoadTestState) -> httpx.Response:
+    return await client.get(f"{state.context_path}/account")
+
+
+async def create_user(client: httpx.AsyncClient, state: LoadTestState) -> httpx.Response:
+    n = state.next_sequence()
+    username = f"load-{state.run_id}-{n}"
+    response = await client.post(f"{state.context_path}/users", json={
+        "username": username,
+        "email": f"{username}@load.pyfapi.dev",
+        "password": "password",
+        "first_name": "Load",
+        "last_name": f"User{n}",
+        "is_active": True,
+        "roles": ["user"],
+    })
+    if response.status_code == 201:
+        user_id = response.json()["user_id"]
+        state.created_ids.append(user_id)
+        state.user_ids.append(user_id)
+    return response
+
+
+async def update_user(client: httpx.AsyncClient, state: LoadTestState) -> httpx.Response:
+    if not state.created_ids:
+        return await create_user(client, state)
+    user_id = state.rng.choice(state.created_ids)
+    return await client.put(f"{state.context_path}/users/{user_id}", json={
+        "first_name": f"Load{state.next_sequence()}",
+        "last_name": "User",
+        "is_active": True,
+        "roles": ["user"],
+    })
+
+
+OPERATIONS = {
+    "list_users": list_users,
+    "get_user": get_user,
+    "account": get_account,
+    "create_user": create_user,
+    "update_user": update_user,
+}
+
+
+# endregion operations
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        name, weight = item.split("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation: {name}, expected one of {', '.join(OPERATIONS)}")
+        mix[name] = int(weight)
+    return mix
+
+
+async def login(client: httpx.AsyncClient, state: LoadTestState, username: str, password: str):
+    response = await client.post(f"{state.context_path}/auth/login", json={"username": username, "password": password})
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    users = await client.get(f"{state.context_path}/users", params={"page": 0, "limit": 100})
+    users.raise_for_status()
+    state.user_ids = [user["user_id"] for user in users.json()]
+
+
+async def execute(client: httpx.AsyncClient, state: LoadTestState, name: str, intended_start: float | None):
+    """
+    Send one request, the response time is measured from the intended start when the request was scheduled
+    """
+    start = time.perf_counter()
+    try:
+        response = await OPERATIONS[name](client, state)
+        status = response.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    end = time.perf_counter()
+    state.service_time[name].record((end - start) * 1e6)
+    if intended_start is not None:
+        state.response_time[name].record((end - intended_start) * 1e6)
+    state.status_codes[name][status] += 1
+    if not isinstance(status, int) or status >= 400:
+        state.errors[name] += 1
+
+
+async def run_open(client, state, mix: dict[str, int], rps: float, duration: float, max_inflight: int):
+    names, weights = list(mix), list(mix.values())
+    interval = 1 / rps
+    inflight = asyncio.Semaphore(max_inflight)
+    tasks = set()
+
+    async def send(name, intended_start):
+        async with inflight:
+            await execute(client, state, name, intended_start)
+
+    begin = time.perf_counter()
+    for i in range(int(duration * rps)):
+        intended_start = begin + i * interval
+        delay = intended_start - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(send(state.rng.choices(names, weights)[0], intended_start))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+
+
+async def run_closed(client, state, mix: dict[str, int], concurrency: int, duration: float, rps: float | None):
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+    # paced users have a schedule, their latency is measured from the intended start
+    interval = concurrency / rps if rps else None
+
+    async def user(index):
+        intended_start = time.perf_counter() + (interval * index / concurrency if interval else 0)
+        while True:
+            if interval:
+                delay = intended_start - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            if time.perf_counter() >= deadline:
+                return
+            await execute(client, state, state.rng.choices(names, weights)[0], intended_start if interval else None)
+            if interval:
+                intended_start += interval
+
+    await asyncio.gather(*[user(i) for i in range(concurrency)])
+
+
+def report(state: LoadTestState, elapsed: float, expected_interval_us: int | None) -> dict:
+    service_total = LatencyHistogram()
+    for histogram in state.service_time.values():
+        service_total.merge(histogram)
+    if expected_interval_us is None:
+        expected_interval_us = service_total.percentile(50)
+
+    def corrected(name) -> LatencyHistogram:
+        if name in state.response_time:
+            return state.response_time[name]
+        return state.service_time[name].corrected(expected_interval_us)
+
+    operations = {}
+    corrected_total = LatencyHistogram()
+    for name, histogram in sorted(state.service_time.items()):
+        corrected_histogram = corrected(name)
+        corrected_total.merge(corrected_histogram)
+        operations[name] = {
+            "requests": histogram.count,
+            "errors": state.errors[name],
+            "error_rate": round(state.errors[name] / histogram.count, 4) if histogram.count else 0.0,
+            "throughput_rps": round(histogram.count / elapsed, 2),
+            "status_codes": {str(k): v for k, v in state.status_codes[name].items()},
+            "service_time": histogram.summary(),
+            "corrected": corrected_histogram.summary(),
+        }
+    requests = service_total.count
+    return {
+        "requests": requests,
+        "errors": sum(state.errors.values()),
+        "error_rate": round(sum(state.errors.values()) / requests, 4) if requests else 0.0,
+        "throughput_rps": round(requests / elapsed, 2),
+        "elapsed_seconds": round(elapsed, 2),
+        "service_time": service_total.summary(),
+        "corrected": corrected_total.summary(),
+        "operations": operations,
+    }
+
+
+def print_report(result: dict):
+    print(f"requests={result['requests']} throughput={result['throughput_rps']} rps "
+          f"errors={result['errors']} ({result['error_rate']:.2%})")
+    print(f"{'operation':<14} {'requests':>9} {'err %':>7} {'rps':>9} "
+          f"{'p50 ms':>9} {'p99 ms':>9} {'c.p50 ms':>9} {'c.p99 ms':>9} {'c.p999 ms':>10} {'c.max ms':>10}")
+    rows = list(result["operations"].items()) + [("total", result)]
+    for name, op in rows:
+        service, corrected = op["service_time"], op["corrected"]
+        print(f"{name:<14} {op.get('requests', service['count']):>9} {op['error_rate'] * 100:>7.2f} "
+              f"{op['throughput_rps']:>9} {service['p50_ms']:>9} {service['p99_ms']:>9} {corrected['p50_ms']:>9} "
+              f"{corrected['p99_ms']:>9} {corrected['p999_ms']:>10} {corrected['max_ms']:>10}")
+
+
+async def main(args) -> int:
+    state = LoadTestState(args.context_path, uuid.uuid4().hex[:8], args.seed)
+    limits = httpx.Limits(max_connections=args.max_inflight if args.rps and not args.concurrency else args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        await login(client, state, args.username, args.password)
+        if not state.user_ids:
+            await create_user(client, state)
+
+        begin = time.perf_counter()
+        if args.concurrency:
+            await run_closed(client, state, args.mix, args.concurrency, args.duration, args.rps)
+        else:
+            await run_open(client, state, args.mix, args.rps, args.duration, args.max_inflight)
+        elapsed = time.perf_counter() - begin
+
+        if args.cleanup:
+            for user_id in state.created_ids:
+                await client.delete(f"{args.context_path}/users/{user_id}")
+
+    expected_interval_us = int(args.expected_interval_ms * 1000) if args.expected_interval_ms else None
+    result = report(state, elapsed, expected_interval_us)
+    print_report(result)
+    if args.output:
+        meta = {**environment(), "base_url": args.base_url, "rps": args.rps, "concurrency": args.concurrency,
+                "duration": args.duration, "mix": args.mix}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "result": result}, f, indent=2)
+    return 1 if args.max_error_rate is not None and result["error_rate"] > args.max_error_rate else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--context-path", default="/api/v1")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--rps", type=float, help="Target request rate (open model, or pacing of the closed model)")
+    parser.add_argument("--concurrency", type=int, help="Virtual users of the closed model")
+    parser.add_argument("--duration", type=float, default=30, help="Duration in seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Weighted operation mix, default {DEFAULT_MIX}")
+    parser.add_argument("--max-inflight", type=int, default=256, help="Maximum concurrent requests of the open model")
+    parser.add_argument("--expected-interval-ms", type=float,
+                        help="Expected interval of the closed model for the coordinated omission correction")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cleanup", action="store_true", help="Delete the users created by the run")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    parser.add_argument("--max-error-rate", type=float, help="Exit with 1 when the error rate is higher")
+    args = parser.parse_args(argv)
+    if not args.rps and not args.concurrency:
+        parser.error("one of --rps or --concurrency is required")
+    return args
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
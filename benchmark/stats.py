@@ -0,0 +1,167 @@
+import json
+import math
+import platform
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+
+def percentile(sorted_samples: list[float], p: float) -> float:
+    """
+    Nearest-rank percentile of sorted samples
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(math.ceil(p / 100 * len(sorted_samples)), 1)
+    return sorted_samples[rank - 1]
+
+
+def summarize(samples_ns: list[int]) -> dict:
+    """
+    Summary of the latency samples in nanoseconds: ops/sec, mean, p50, p99 and max in milliseconds
+    """
+    samples = sorted(samples_ns)
+    total = sum(samples)
+    return {
+        "iterations": len(samples),
+        "ops_per_sec": round(len(samples) / (total / 1e9), 2) if total else 0.0,
+        "mean_ms": round(total / len(samples) / 1e6, 4) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) / 1e6, 4),
+        "p99_ms": round(percentile(samples, 99) / 1e6, 4),
+        "max_ms": round(samples[-1] / 1e6, 4) if samples else 0.0,
+    }
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of microsecond latencies, values keep 7 significant bits (relative error below 1%).
+    Memory depends on the value range only, not on the number of samples.
+    """
+
+    _PRECISION_BITS = 7
+
+    def __init__(self):
+        self.counts: dict[int, int] = defaultdict(int)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value_us: int, count: int = 1):
+        value = max(int(value_us), 0)
+        shift = max(value.bit_length() - self._PRECISION_BITS, 0)
+        self.counts[(value >> shift) << shift] += count
+        self.count += count
+        self.total += value * count
+        self.max = max(self.max, value)
+
+    def record_corrected(self, value_us: int, expected_interval_us: int, count: int = 1):
+        """
+        Record the value and back-fill the samples a stalled closed-loop client did not send while waiting
+        (HdrHistogram recordValueWithExpectedInterval)
+        """
+        self.record(value_us, count)
+        if expected_interval_us <= 0:
+            return
+        missing = value_us - expected_interval_us
+        while missing >= expected_interval_us:
+            self.record(missing, count)
+            missing -= expected_interval_us
+
+    def corrected(self, expected_interval_us: int) -> "LatencyHistogram":
+        """
+        Copy corrected for coordinated omission with the expected interval between requests
+        """
+        result = LatencyHistogram()
+        for value, count in self.counts.items():
+            result.record_corrected(value, expected_interval_us, count)
+        result.max = max(result.max, self.max)
+        return result
+
+    def merge(self, other: "LatencyHistogram"):
+        for value, count in other.counts.items():
+            self.counts[value] += count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> int:
+        if not self.count:
+            return 0
+        rank = max(math.ceil(p / 100 * self.count), 1)
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= rank:
+                return value
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count / 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) / 1000, 3),
+            "p90_ms": round(self.percentile(90) / 1000, 3),
+            "p99_ms": round(self.percentile(99) / 1000, 3),
+            "p999_ms": round(self.percentile(99.9) / 1000, 3),
+            "max_ms": round(self.max / 1000, 3),
+        }
+
+
+async def measure(func, iterations: int, warmup: int = 10) -> dict:
+    """
+    Run the coroutine function iterations times after warmup runs and summarize the latencies.
+    The function receives the iteration number so every call can use different arguments.
+    """
+    for i in range(warmup):
+        await func(i)
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        await func(i)
+        samples.append(time.perf_counter_ns() - start)
+    return summarize(samples)
+
+
+def environment() -> dict:
+    return {
+        "created_date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def save_results(path: str, results: dict, meta: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": {**environment(), **meta}, "results": results}, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compare the results with a baseline
+    :param results: Benchmark name -> summary
+    :param baseline: Benchmark name -> summary of the baseline run
+    :param threshold: Allowed relative regression, e.g. 0.2 for 20%
+    :return: Regression messages, empty when every benchmark is within the threshold
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if base["p50_ms"] and result["p50_ms"] > base["p50_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p50 {base['p50_ms']}ms -> {result['p50_ms']}ms")
+        if base["ops_per_sec"] and result["ops_per_sec"] < base["ops_per_sec"] / (1 + threshold):
+            regressions.append(f"{name}: ops/sec {base['ops_per_sec']} -> {result['ops_per_sec']}")
+    return regressions
+
+
+def print_table(results: dict):
+    print(f"{'benchmark':<48} {'ops/sec':>12} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for name, result in sorted(results.items()):
+        print(f"{name:<48} {result['ops_per_sec']:>12} {result['p50_ms']:>10} {result['p99_ms']:>10} {result['max_ms']:>10}")
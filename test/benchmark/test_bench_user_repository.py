@@ -0,0 +1,28 @@
+# python unittest for the repository micro-benchmarks on mongomock
+import random
+import unittest
+
+from benchmark.bench_user_repository import init_backend, run_size, seed
+
+
+class TestBenchUserRepository(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the UserRepository micro-benchmarks run on a small seeded dataset.
+    """
+
+    async def test_given_warmup_when_run_size_then_create_inserts_new_users(self):
+        """
+        Test case: The create benchmark inserts a new user on every warmup and measured call,
+        the unique indexes reject no insert.
+        """
+        # Arrange
+        await init_backend("mongomock", "")
+        user_ids, usernames = await seed(20, data_seed=1)
+
+        # Act
+        results = await run_size(20, iterations=3, warmup=2, rng=random.Random(1), user_ids=user_ids,
+                                 usernames=usernames)
+
+        # Assert
+        self.assertIn("20/repository.create", results)
+        self.assertEqual(len(results), 6)
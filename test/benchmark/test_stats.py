@@ -0,0 +1,61 @@
+# python unittest for the benchmark statistics and the baseline regression check
+import unittest
+
+from benchmark.stats import LatencyHistogram, compare, percentile, summarize
+
+
+class TestBenchmarkStats(unittest.TestCase):
+    """
+    Test suite for the benchmark summary and the comparison with a stored baseline.
+    """
+
+    def test_given_samples_when_summarize_then_return_percentiles(self):
+        """
+        Test case: Latency samples are summarized with nearest-rank percentiles in milliseconds.
+        """
+        # Arrange
+        samples = [i * 1_000_000 for i in range(1, 101)]
+
+        # Act
+        result = summarize(samples)
+
+        # Assert
+        self.assertEqual(percentile(sorted(samples), 50), 50_000_000)
+        self.assertEqual((result["p50_ms"], result["p99_ms"], result["max_ms"]), (50.0, 99.0, 100.0))
+        self.assertEqual(result["ops_per_sec"], round(100 / 5.05, 2))
+
+    def test_given_baseline_when_compare_then_report_regressions_past_threshold(self):
+        """
+        Test case: Only the benchmarks slower than the baseline by more than the threshold are reported.
+        """
+        # Arrange
+        baseline = {"find": {"p50_ms": 10.0, "ops_per_sec": 100.0}, "retrieve": {"p50_ms": 1.0, "ops_per_sec": 1000.0}}
+        results = {"find": {"p50_ms": 11.0, "ops_per_sec": 91.0}, "retrieve": {"p50_ms": 1.5, "ops_per_sec": 650.0},
+                   "create": {"p50_ms": 5.0, "ops_per_sec": 200.0}}
+
+        # Act
+        regressions = compare(results, baseline, threshold=0.2)
+
+        # Assert
+        self.assertEqual(regressions, ["retrieve: p50 1.0ms -> 1.5ms", "retrieve: ops/sec 1000.0 -> 650.0"])
+
+    def test_given_stalled_closed_loop_when_corrected_then_backfill_missing_samples(self):
+        """
+        Test case: A closed-loop client stalled for 100 expected intervals did not send 99 requests,
+        the corrected histogram back-fills them so the percentiles show the stall.
+        """
+        # Arrange
+        interval = 8192
+        histogram = LatencyHistogram()
+        for _ in range(99):
+            histogram.record(interval)
+        histogram.record(interval * 100)
+
+        # Act
+        corrected = histogram.corrected(expected_interval_us=interval)
+
+        # Assert
+        self.assertEqual(histogram.percentile(99), interval)
+        self.assertEqual(corrected.count, 199)
+        self.assertGreater(corrected.percentile(75), interval * 50)
+        self.assertEqual(corrected.max, interval * 100)
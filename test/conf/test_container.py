@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import AsyncMock
+
+from app.conf import dependencies
+from app.conf.container import ServiceContainer, container
+from app.utils.pass_util import PasswordUtil
+
+
+class TestServiceContainer(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the application scoped ServiceContainer and the FastAPI dependencies resolving to it.
+    """
+
+    async def test_given_not_started_container_when_get_then_raise_runtime_error(self):
+        # Arrange
+        not_started = ServiceContainer()
+
+        # Act & Assert
+        with self.assertRaises(RuntimeError):
+            not_started.get("user_service")
+
+    async def test_given_override_when_resolve_dependency_then_return_same_override(self):
+        # Arrange
+        user_service = AsyncMock()
+
+        # Act
+        with container.override(user_service=user_service):
+            first = await dependencies.get_user_service()
+            second = await dependencies.get_user_service()
+
+        # Assert
+        self.assertIs(first, user_service)
+        self.assertIs(second, user_service)
+        with self.assertRaises(RuntimeError):
+            await dependencies.get_user_service()
+
+    async def test_given_executor_when_hash_async_then_verify(self):
+        # Arrange
+        hasher = PasswordUtil()
+
+        # Act
+        hashed_password = await hasher.hash_password_async("password")
+
+        # Assert
+        self.assertTrue(await hasher.verify_password_async("password", hashed_password))
+        self.assertFalse(await hasher.verify_password_async("wrong", hashed_password))
@@ -0,0 +1,48 @@
+import unittest
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+
+from app.conf.query_params import QueryParams, parse_filter
+
+
+class TestQueryParams(unittest.TestCase):
+    """
+    Test suite for the q filter parsing and canonicalization of QueryParams.
+    """
+
+    def test_given_same_filter_in_other_key_order_when_parse_then_same_canonical_key(self):
+        # Arrange
+        q = '{"is_active": true, "age": {"$lte": 60, "$gte": 25}}'
+
+        # Act
+        first = QueryParams(q=q).filter
+        second = parse_filter(q)
+        reordered = parse_filter('{"age": {"$gte": 25, "$lte": 60}, "is_active": true}')
+
+        # Assert
+        self.assertIs(first, second)
+        self.assertEqual(list(first), ["age", "is_active"])
+        self.assertEqual(list(first["age"]), ["$gte", "$lte"])
+        self.assertEqual(first.key, reordered.key)
+        self.assertIsNone(QueryParams().filter)
+
+    def test_given_iso_dates_when_parse_then_date_fields_coerced_to_datetimes(self):
+        # Act
+        result = parse_filter('{"created_date": {"$gte": "2024-01-01", "$lt": "2024-02-01T00:00:00+03:00"}, '
+                              '"username": "2024-01-01"}')
+
+        # Assert
+        self.assertEqual(result["created_date"]["$gte"], datetime(2024, 1, 1, tzinfo=timezone.utc))
+        self.assertEqual(result["created_date"]["$lt"].utcoffset().total_seconds(), 3 * 3600)
+        self.assertEqual(result["username"], "2024-01-01")
+
+    def test_given_unauthorized_or_invalid_filter_when_parse_then_raise_bad_request(self):
+        for q in ('{"username": {"$where": "sleep(1000)"}}', '{"profile": {"name": {"$regex": "a"}}}',
+                  '[{"username": "john"}]', '{"created_date": "yesterday"}', '{bad', '{"username": }'):
+            with self.subTest(q=q), self.assertRaises(HTTPException) as context:
+                parse_filter(q)
+            self.assertEqual(context.exception.status_code, 400)
+        with self.assertRaises(HTTPException) as context:
+            QueryParams(q="{bad")
+        self.assertEqual(context.exception.status_code, 400)
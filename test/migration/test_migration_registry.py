@@ -0,0 +1,93 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.entity.migration_entity import MigrationState
+from app.entity.role_entity import Role
+from app.entity.user_entity import User
+from app.migration import user_migration
+from app.migration.registry import MigrationRegistry
+from app.repository.migration_repository import MigrationRepository
+
+
+class TestMigrationRegistry(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the versioned migrations applied once per database with the migration lock.
+    """
+
+    async def asyncSetUp(self):
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[User, Role, MigrationState],
+                          database=self.client.get_database(name="pyfapi"))
+        self.repository = MigrationRepository()
+
+    async def asyncTearDown(self):
+        await self.client.drop_database("pyfapi")
+
+    async def test_given_concurrent_workers_when_run_then_each_migration_applied_once(self):
+        # Arrange
+        registry = MigrationRegistry()
+        calls = []
+
+        async def slow_migration():
+            calls.append("0001")
+            await asyncio.sleep(0.05)
+
+        registry.register("0001", "Slow")(slow_migration)
+        registry.register("0002", "Fast")(AsyncMock())
+
+        # Act
+        await asyncio.gather(*(registry.run(self.repository, lease_seconds=10, wait_seconds=5, poll_seconds=0.01)
+                               for _ in range(4)))
+        state = await self.repository.retrieve()
+
+        # Assert
+        self.assertEqual(calls, ["0001"])
+        self.assertEqual(sorted(state.applied), ["0001", "0002"])
+        self.assertIsNone(state.lease_owner)
+
+    async def test_given_applied_migrations_when_run_then_skipped_with_single_read(self):
+        # Arrange
+        registry = MigrationRegistry()
+        migration = AsyncMock()
+        registry.register("0001", "Once")(migration)
+        await registry.run(self.repository, lease_seconds=10, wait_seconds=5)
+
+        # Act
+        with patch.object(self.repository, "claim", wraps=self.repository.claim) as claim, \
+                patch.object(self.repository, "retrieve", wraps=self.repository.retrieve) as retrieve:
+            await registry.run(self.repository, lease_seconds=10, wait_seconds=5)
+
+        # Assert
+        migration.assert_awaited_once()
+        self.assertEqual(retrieve.await_count, 1)
+        claim.assert_not_called()
+
+    async def test_given_existing_role_when_init_migration_then_seeded_once(self):
+        # Arrange
+        await Role(name="admin").create()
+
+        # Act
+        await user_migration.init_migration()
+        await MigrationState.get_motor_collection().delete_many({})
+        await user_migration.init_migration()
+
+        # Assert
+        self.assertEqual(sorted(role.name for role in await Role.find_all().to_list()), ["admin", "user"])
+        admin = await User.find_one({"username": "admin"})
+        self.assertEqual(await User.count(), 1)
+        self.assertEqual(admin.roles, ["admin"])
+        self.assertTrue(admin.hashed_password.startswith("$2"))
+
+    async def test_given_lock_held_when_run_then_raise_after_wait(self):
+        # Arrange
+        registry = MigrationRegistry()
+        registry.register("0001", "Blocked")(AsyncMock())
+        await self.repository.claim("other-worker", lease_seconds=60)
+
+        # Act & Assert
+        with self.assertRaises(RuntimeError):
+            await registry.run(self.repository, lease_seconds=10, wait_seconds=0, poll_seconds=0.01)
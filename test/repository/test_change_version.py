@@ -0,0 +1,80 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.conf.query_params import parse_filter
+from app.entity.collection_version_entity import CollectionVersion
+from app.entity.user_entity import User
+from app.errors.business_exception import BusinessException, ErrorCodes
+from app.repository.change_version import ChangeVersion
+from app.repository.user_repository import UserRepository
+from app.service.user_service import UserService
+from app.utils.etag import none_match, user_etag, user_etag_dates
+
+
+class TestChangeVersion(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the change version of the users collection and the conditional requests built on it.
+    """
+
+    async def asyncSetUp(self):
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[User, CollectionVersion], database=self.client.get_database(name="pyfapi"))
+        self.repository = UserRepository(versions=ChangeVersion(User, cache_seconds=60))
+        self.service = UserService(self.repository)
+        await self.repository.create(User(user_id="etag-1", username="etag1", first_name="Etag", last_name="User",
+                                          email="etag1@etag.pyfapi.dev",
+                                          last_updated_date=datetime(2024, 5, 1, 12, 30, 0, 123456, timezone.utc)))
+
+    async def asyncTearDown(self):
+        await self.client.drop_database("pyfapi")
+
+    async def test_given_write_of_other_worker_when_version_cache_expires_then_version_changes(self):
+        # Arrange
+        other_worker = ChangeVersion(User, cache_seconds=0)
+        before = await other_worker.current()
+
+        # Act
+        await self.repository.update_fields("etag-1", {"first_name": "Changed"})
+        after = await other_worker.current()
+
+        # Assert
+        self.assertEqual((before, after), (1, 2))
+        self.assertEqual(await self.repository.version(), 2)
+
+    async def test_given_list_etag_when_user_written_then_etag_no_longer_matches(self):
+        # Arrange
+        query = parse_filter('{"first_name": "Etag"}')
+        etag = await self.service.list_etag(query, 0, 10, "-_id")
+
+        # Act
+        unchanged = await self.service.list_etag(query, 0, 10, "-_id")
+        await self.repository.delete("etag-1")
+        changed = await self.service.list_etag(query, 0, 10, "-_id")
+
+        # Assert
+        self.assertFalse(none_match(f"W/{unchanged}", etag))
+        self.assertTrue(none_match(changed, etag))
+        self.assertNotEqual(etag, await self.service.list_etag(query, 1, 10, "-_id"))
+
+    async def test_given_if_match_when_update_fields_then_conditional_write(self):
+        # Arrange
+        user = await self.repository.retrieve("etag-1")
+        etag = user_etag(user.user_id, user.last_updated_date)
+        changed_date = user.last_updated_date + timedelta(seconds=1)
+
+        # Act
+        fields = {"first_name": "First", "last_updated_date": changed_date}
+        updated = await self.repository.update_fields("etag-1", fields, user_etag_dates(etag, "etag-1"))
+        with self.assertRaises(BusinessException) as stale:
+            await self.repository.update_fields("etag-1", {"first_name": "Second"}, user_etag_dates(etag, "etag-1"))
+        with self.assertRaises(BusinessException) as missing:
+            await self.repository.update_fields("etag-2", {"first_name": "Second"}, user_etag_dates(etag, "etag-2"))
+
+        # Assert
+        self.assertEqual(updated.first_name, "First")
+        self.assertEqual(stale.exception.code, ErrorCodes.PRECONDITION_FAILED)
+        self.assertEqual(missing.exception.code, ErrorCodes.NOT_FOUND)
+        self.assertIsNone(user_etag_dates('"*", *', "etag-1"))
@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.entity.user_entity import User
+from app.errors.business_exception import BusinessException
+from app.repository.index_advisor import IndexAdvisor, esr_keys, filter_patterns
+from app.repository.query_guard import QueryGuard
+from app.repository.user_repository import UserRepository
+
+_COLLSCAN = {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+
+
+class TestIndexAdvisor(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the IndexAdvisor of the UserRepository find filters.
+    """
+
+    async def asyncSetUp(self):
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[User], database=self.client.get_database(name="pyfapi"))
+        await User.get_motor_collection().insert_many([
+            {"user_id": f"advisor-{i}", "username": f"advisor{i}", "first_name": "Advisor", "last_name": "User",
+             "email": f"advisor{i}@advisor.pyfapi.dev", "age": 20 + i, "is_active": i % 2 == 0} for i in range(10)])
+        self.advisor = IndexAdvisor(User, min_count=2)
+        self.repository = UserRepository(advisor=self.advisor)
+
+    async def asyncTearDown(self):
+        await self.advisor.stop()
+        await self.client.drop_database("pyfapi")
+
+    def test_given_equality_sort_range_filter_when_esr_keys_then_equality_sort_range_order(self):
+        # Arrange
+        patterns = filter_patterns({"age": {"$gte": 25}, "is_active": True, "roles": {"$in": ["ROLE_USER"]}})
+
+        # Act
+        result = esr_keys(*patterns[0], "-created_date")
+
+        # Assert
+        self.assertEqual(result, [("is_active", 1), ("roles", 1), ("created_date", -1), ("age", 1)])
+        self.assertEqual(len(filter_patterns({"is_active": True, "$or": [{"age": 30}, {"roles": "ROLE_ADMIN"}]})), 2)
+
+    async def test_given_recorded_filters_when_recommend_then_uncovered_indexes_ranked(self):
+        # Arrange
+        for age in (25, 30, 35):
+            await self.repository.find(f'{{"is_active": true, "age": {{"$gte": {age}}}}}', sort="-created_date")
+        await self.repository.find('{"is_active": true}', sort="-created_date")
+        await self.repository.find('{"is_active": true}', sort="-created_date")
+        for username in ("advisor1", "advisor2"):
+            await self.repository.find(f'{{"username": "{username}"}}')
+
+        # Act
+        result = await self.advisor.recommend()
+
+        # Assert
+        self.assertEqual([r["name"] for r in result], ["is_active_1_created_date_-1__id_-1"])
+        self.assertEqual(result[0]["keys"], {"is_active": 1, "created_date": -1, "_id": -1})
+        self.assertEqual(result[0]["count"], 5)
+        # shapes are ranked by their total time, the is_active shapes are found by field
+        self.assertEqual(sum(shape["count"] for shape in self.advisor.shapes() if "is_active" in shape["shape"]), 5)
+
+    async def test_given_rejected_filter_when_apply_then_index_created_and_plans_cleared(self):
+        # Arrange
+        guard = QueryGuard(User, collscan_threshold=1)
+        guard._explain = AsyncMock(return_value=_COLLSCAN)
+        self.advisor.guard = guard
+        self.repository.guard = guard
+        for age in (25, 30):
+            with self.assertRaises(BusinessException):
+                await self.repository.find(f'{{"age": {{"$gt": {age}}}}}')
+
+        # Act
+        builds = await self.advisor.apply()
+        await asyncio.gather(*self.advisor._tasks)
+
+        # Assert
+        self.assertEqual([b.name for b in builds], ["age_1__id_-1"])
+        self.assertEqual(builds[0].status, "created")
+        self.assertEqual((await self.advisor.recommend()), [])
+        self.assertIn("age_1__id_-1", await User.get_motor_collection().index_information())
+        self.assertEqual(self.advisor.shapes()[0]["rejected"], 2)
+        self.assertEqual(len(guard._plans), 0)
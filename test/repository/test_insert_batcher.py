@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.entity.user_entity import User
+from app.errors.business_exception import BusinessException, ErrorCodes
+from app.repository.insert_batcher import InsertBatcher
+from app.repository.user_repository import UserRepository
+
+
+def _user(i: int, email: str | None = None) -> User:
+    return User(user_id=f"batch-{i}", username=f"batch{i}", first_name="Batch", last_name=f"User{i}",
+                email=email or f"batch{i}@batch.pyfapi.dev", is_active=True, roles=["user"])
+
+
+class TestInsertBatcher(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the InsertBatcher grouping concurrent UserRepository.create calls into one insert_many.
+    """
+
+    async def asyncSetUp(self):
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[User], database=self.client.get_database(name="pyfapi"))
+        self.batcher = InsertBatcher(User, max_size=10, max_delay_ms=20)
+        self.repository = UserRepository(self.batcher)
+
+    async def asyncTearDown(self):
+        await self.client.drop_database("pyfapi")
+
+    async def test_given_concurrent_creates_when_create_then_one_batch(self):
+        # Act
+        results = await asyncio.gather(*[self.repository.create(_user(i)) for i in range(5)])
+
+        # Assert
+        self.assertEqual(self.batcher.batches, 1)
+        self.assertEqual([user.user_id for user in results], [f"batch-{i}" for i in range(5)])
+        self.assertTrue(all(user.id is not None for user in results))
+        self.assertEqual(await User.find({}).count(), 5)
+
+    async def test_given_more_creates_than_max_size_when_create_then_flush_by_size(self):
+        # Act
+        await asyncio.gather(*[self.repository.create(_user(i)) for i in range(25)])
+
+        # Assert
+        self.assertEqual(self.batcher.batches, 3)
+        self.assertEqual(await User.find({}).count(), 25)
+
+    async def test_given_duplicate_in_batch_when_create_then_only_duplicate_fails(self):
+        # Arrange
+        creates = [self.repository.create(_user(0)),
+                   self.repository.create(_user(1, email="batch0@batch.pyfapi.dev")),
+                   self.repository.create(_user(2))]
+
+        # Act
+        results = await asyncio.gather(*creates, return_exceptions=True)
+
+        # Assert
+        self.assertEqual(self.batcher.batches, 1)
+        self.assertIsInstance(results[1], BusinessException)
+        self.assertEqual(results[1].code, ErrorCodes.ALREADY_EXISTS)
+        self.assertEqual(results[0].user_id, "batch-0")
+        self.assertEqual(results[2].user_id, "batch-2")
+        self.assertEqual(await User.find({}).count(), 2)
@@ -0,0 +1,100 @@
+import time
+import unittest
+from unittest.mock import AsyncMock
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.entity.user_entity import User
+from app.errors.business_exception import BusinessException, ErrorCodes
+from app.repository.query_guard import QueryGuard, query_shape
+from app.repository.user_repository import UserRepository
+
+_COLLSCAN = {"queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}}
+_IXSCAN = {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}}
+
+
+class TestQueryGuard(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the QueryGuard of the UserRepository find and count filters.
+    """
+
+    async def asyncSetUp(self):
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[User], database=self.client.get_database(name="pyfapi"))
+        await User.get_motor_collection().insert_many([
+            {"user_id": f"guard-{i}", "username": f"guard{i}", "first_name": "Guard", "last_name": "User",
+             "email": f"guard{i}@guard.pyfapi.dev", "age": 20 + i} for i in range(20)])
+        self.guard = QueryGuard(User, mode="reject", collscan_threshold=10)
+        self.repository = UserRepository(guard=self.guard)
+
+    async def asyncTearDown(self):
+        await self.client.drop_database("pyfapi")
+
+    def test_given_same_filter_with_other_values_when_query_shape_then_same_shape(self):
+        self.assertEqual(query_shape({"age": {"$gte": 25}, "username": {"$in": ["a", "b"]}}),
+                         query_shape({"username": {"$in": ["c"]}, "age": {"$gte": 60}}))
+        self.assertNotEqual(query_shape({"age": {"$gte": 25}}), query_shape({"age": {"$lte": 25}}))
+
+    async def test_given_collscan_plan_when_find_then_reject_and_cache_plan(self):
+        # Arrange
+        self.guard._explain = AsyncMock(return_value=_COLLSCAN)
+
+        # Act & Assert
+        for age in (25, 30):
+            with self.assertRaises(BusinessException) as context:
+                await self.repository.find(f'{{"age": {{"$gte": {age}}}}}')
+            self.assertEqual(context.exception.code, ErrorCodes.QUERY_TOO_EXPENSIVE)
+        self.guard._explain.assert_called_once()
+        self.assertEqual(self.guard.rejected, 2)
+
+    async def test_given_no_scan_slot_when_throttled_then_fail_after_scan_wait(self):
+        # Arrange
+        guard = QueryGuard(User, mode="throttle", max_time_ms=5000, collscan_threshold=10, collscan_concurrency=1,
+                           scan_wait_ms=50)
+        guard._explain = AsyncMock(return_value=_COLLSCAN)
+        repository = UserRepository(guard=guard)
+
+        # Act
+        async with guard.admit({"age": {"$gte": 25}}):
+            start = time.perf_counter()
+            with self.assertRaises(BusinessException) as context:
+                await repository.find('{"age": {"$gte": 30}}')
+            waited = time.perf_counter() - start
+        result = await repository.find('{"age": {"$gte": 30}}')
+
+        # Assert
+        self.assertEqual(context.exception.code, ErrorCodes.QUERY_THROTTLED)
+        self.assertLess(waited, 1)
+        self.assertEqual((result.total, guard.rejected), (10, 1))
+
+    async def test_given_indexed_plan_when_find_then_allowed(self):
+        # Arrange
+        self.guard._explain = AsyncMock(return_value=_IXSCAN)
+
+        # Act
+        result = await self.repository.find('{"username": "guard1"}')
+
+        # Assert
+        self.assertEqual(result.total, 1)
+
+    async def test_given_small_collection_when_count_then_not_explained(self):
+        # Arrange
+        guard = QueryGuard(User, mode="reject", collscan_threshold=1000)
+        guard._explain = AsyncMock(return_value=_COLLSCAN)
+
+        # Act
+        result = await UserRepository(guard=guard).count({"age": {"$gte": 30}})
+
+        # Assert
+        self.assertEqual(result, 10)
+        guard._explain.assert_not_called()
+
+    async def test_given_unexplainable_filter_when_find_then_allowed(self):
+        # mongomock does not support explain, the filter is allowed
+
+        # Act
+        result = await self.repository.find('{"age": {"$gte": 30}}')
+
+        # Assert
+        self.assertEqual(result.total, 10)
@@ -0,0 +1,88 @@
+import asyncio
+import unittest
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.entity.user_entity import User
+from app.repository.result_cache import ResultCache, cache_status
+from app.repository.user_repository import UserRepository
+
+
+class TestResultCache(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the ResultCache of the UserRepository find pages.
+    """
+
+    async def asyncSetUp(self):
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[User], database=self.client.get_database(name="pyfapi"))
+        await User.get_motor_collection().insert_many([
+            {"user_id": f"cache-{i}", "username": f"cache{i}", "first_name": "Cache", "last_name": "User",
+             "email": f"cache{i}@cache.pyfapi.dev", "age": 20 + i} for i in range(5)])
+        self.cache = ResultCache(ttl_seconds=60, stale_seconds=60, max_bytes=1024 * 1024,
+                                 sizeof=UserRepository.page_size)
+        self.repository = UserRepository(cache=self.cache)
+
+    async def asyncTearDown(self):
+        await self.cache.stop()
+        await self.client.drop_database("pyfapi")
+
+    async def test_given_cached_page_when_find_same_filter_then_hit_until_write(self):
+        # Act
+        first = await self.repository.find('{"age": {"$gte": 21}, "first_name": "Cache"}')
+        first_status = cache_status()
+        second = await self.repository.find('{"first_name": "Cache", "age": {"$gte": 21}}')
+        second_status = cache_status()
+        await self.repository.create(User(user_id="cache-new", username="cachenew", first_name="Cache",
+                                          last_name="User", email="cachenew@cache.pyfapi.dev", age=40))
+        third = await self.repository.find('{"age": {"$gte": 21}, "first_name": "Cache"}')
+
+        # Assert
+        self.assertEqual((first_status, second_status, cache_status()), ("MISS", "HIT", "MISS"))
+        self.assertIs(second, first)
+        self.assertEqual((first.total, third.total), (4, 5))
+
+    async def test_given_expired_entry_when_get_then_stale_served_and_refreshed_once(self):
+        # Arrange
+        cache = ResultCache(ttl_seconds=0, stale_seconds=60, max_bytes=1024)
+        loads = []
+
+        async def loader():
+            loads.append(len(loads))
+            return len(loads)
+
+        await cache.get("key", loader)
+
+        # Act
+        stale = [await cache.get("key", loader) for _ in range(3)]
+        await asyncio.sleep(0)
+        refreshed = await cache.get("key", loader)
+
+        # Assert
+        self.assertEqual(stale, [1, 1, 1])
+        self.assertEqual(cache_status(), "STALE")
+        self.assertEqual(refreshed, 2)
+        self.assertEqual(len(loads), 2)
+
+    async def test_given_concurrent_misses_when_get_then_one_load_and_lru_eviction(self):
+        # Arrange
+        cache = ResultCache(ttl_seconds=60, stale_seconds=0, max_bytes=2, sizeof=lambda value: 1)
+        loads = []
+
+        async def loader():
+            loads.append(1)
+            await asyncio.sleep(0.01)
+            return "page"
+
+        # Act
+        results = await asyncio.gather(*[cache.get("a", loader) for _ in range(10)])
+        await cache.get("b", loader)
+        await cache.get("a", loader)
+        await cache.get("c", loader)
+
+        # Assert
+        self.assertEqual(results, ["page"] * 10)
+        self.assertEqual(len(loads), 3)
+        self.assertEqual(list(cache._entries), ["a", "c"])
+        self.assertEqual((cache.bytes, cache.evictions), (2, 1))
@@ -0,0 +1,86 @@
+import unittest
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.entity.user_entity import User
+from app.errors.business_exception import BusinessException, ErrorCodes
+from app.repository.index_advisor import IndexAdvisor, IndexBuild
+from app.repository.sort_policy import SortPolicy
+from app.repository.user_repository import SORTABLE_FIELDS, UserRepository
+
+
+class TestSortPolicy(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the SortPolicy of the UserRepository find sorts.
+    """
+
+    async def asyncSetUp(self):
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[User], database=self.client.get_database(name="pyfapi"))
+        self.policy = SortPolicy(User, SORTABLE_FIELDS)
+
+    async def asyncTearDown(self):
+        await self.client.drop_database("pyfapi")
+
+    def test_given_allowed_sort_when_resolve_then_tiebreaker_and_hint(self):
+        # Act & Assert
+        self.assertEqual(self.policy.resolve("-created_date"), ([("created_date", -1), ("_id", -1)], "created_date_id"))
+        self.assertEqual(self.policy.resolve(" username"), ([("username", 1)], "username_unique"))
+        self.assertEqual(self.policy.resolve(None), ([("_id", 1)], "_id_"))
+        self.assertEqual(self.policy.resolve("-created_date", {"age": {"$gte": 30}}),
+                         ([("created_date", -1), ("_id", -1)], None))
+
+    def test_given_unsortable_or_unsupported_sort_when_resolve_then_raise_invalid_input(self):
+        for sort in ("-age", "-created_date,+username", "+email,-email", "-hashed_password"):
+            with self.subTest(sort=sort), self.assertRaises(BusinessException) as context:
+                self.policy.resolve(sort)
+            self.assertEqual(context.exception.code, ErrorCodes.INVALID_INPUT)
+
+    async def test_given_equal_sort_values_when_find_pages_then_stable_order(self):
+        # Arrange
+        await User.get_motor_collection().insert_many([
+            {"user_id": f"sort-{i}", "username": f"sort{i}", "first_name": "Sort", "last_name": "User",
+             "email": f"sort{i}@sort.pyfapi.dev", "created_date": None} for i in range(6)])
+        repository = UserRepository()
+
+        # Act
+        pages = [await repository.find(None, page, 2, "-created_date") for page in range(3)]
+
+        # Assert
+        usernames = [user.username for page in pages for user in page.content]
+        self.assertEqual(usernames, [f"sort{i}" for i in reversed(range(6))])
+
+    async def test_given_index_built_by_advisor_when_resolve_then_sort_allowed_and_hinted(self):
+        # Arrange
+        advisor = IndexAdvisor(User, sort_policy=self.policy)
+        sort = "+last_updated_date,+created_date"
+        with self.assertRaises(BusinessException):
+            self.policy.resolve(sort)
+
+        # Act
+        await advisor._build(IndexBuild(name="last_updated_date_1_created_date_1__id_1",
+                                        keys={"last_updated_date": 1, "created_date": 1, "_id": 1}))
+
+        # Assert
+        self.assertEqual(self.policy.resolve(sort), ([("last_updated_date", 1), ("created_date", 1), ("_id", 1)],
+                                                     "last_updated_date_1_created_date_1__id_1"))
+        self.assertEqual(self.policy.resolve("-created_date")[1], "created_date_id")
+
+    async def test_given_index_of_other_worker_when_refresh_due_then_find_uses_it(self):
+        # Arrange
+        repository = UserRepository(sort_policy=SortPolicy(User, SORTABLE_FIELDS, refresh_seconds=60))
+        await repository.find(None, 0, 2, "-created_date")
+        await User.get_motor_collection().create_index([("last_updated_date", 1), ("created_date", -1), ("_id", -1)],
+                                                       name="last_updated_created")
+        sort = "+last_updated_date,-created_date"
+
+        # Act
+        with self.assertRaises(BusinessException):
+            await repository.find(None, 0, 2, sort)
+        repository.sort_policy._expires = 0.0
+        result = await repository.find(None, 0, 2, sort)
+
+        # Assert
+        self.assertEqual(result.total, 0)
+        self.assertEqual(repository.sort_policy.resolve(sort)[1], "last_updated_created")
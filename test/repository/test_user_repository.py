@@ -13,6 +13,7 @@ from testcontainers.mongodb import MongoDbContainer
 
 from app.entity import Role
 from app.entity.user_entity import User
+from app.errors.business_exception import BusinessException, ErrorCodes
 from app.repository.user_repository import UserRepository
 
 logging.basicConfig(level=logging.INFO)
@@ -214,6 +215,27 @@ class TestUserRepository(unittest.IsolatedAsyncioTestCase):
         with pytest.raises(Exception):
             await repository.create(entity)
 
+    @pytest.mark.asyncio
+    async def test_given_existing_username_or_email_when_insert_then_already_exists(self):
+        """
+        Test case to handle the unique index violations of username and email.
+        """
+        _log.info("test_given_existing_username_or_email_when_insert_then_already_exists")
+
+        # Given
+        repository = _get_repo()
+        await repository.create(_get_full_entity())
+        same_username = _get_full_entity()
+        same_username.user_id, same_username.email = "other_user_id", "other@email.com"
+        same_email = _get_full_entity()
+        same_email.user_id, same_email.username = "other_user_id", "other_username"
+
+        # When / Then
+        for entity in (same_username, same_email):
+            with pytest.raises(BusinessException) as context:
+                await repository.create(entity)
+            assert context.value.code == ErrorCodes.ALREADY_EXISTS
+
     # endregion create entity tests
 
     # region update entity tests
@@ -317,6 +339,56 @@ class TestUserRepository(unittest.IsolatedAsyncioTestCase):
         with pytest.raises(Exception):
             await repository.update(result)
 
+    @pytest.mark.asyncio
+    async def test_given_fields_when_update_fields_then_only_fields_updated(self):
+        """
+        Test case to set some fields of a user entity, the other fields must be kept.
+        """
+        _log.info("test_given_fields_when_update_fields_then_only_fields_updated")
+
+        # Given
+        entity = _get_full_entity()
+        repository = _get_repo()
+        created = await repository.create(entity)
+
+        # When
+        updated_result = await repository.update_fields(created.user_id, {"first_name": "updated_first_name",
+                                                                          "is_active": False})
+
+        # Then
+        assert updated_result.first_name == "updated_first_name"
+        assert updated_result.is_active is False
+        assert updated_result.last_name == created.last_name
+        assert updated_result.email == created.email
+        assert updated_result.hashed_password == created.hashed_password
+
+        # When
+        with pytest.raises(Exception):
+            await repository.update_fields("not_found", {"first_name": "updated_first_name"})
+
+    @pytest.mark.asyncio
+    async def test_given_stale_hash_when_update_password_then_not_updated(self):
+        """
+        Test case to change the password only when the hash was not changed meanwhile.
+        """
+        _log.info("test_given_stale_hash_when_update_password_then_not_updated")
+
+        # Given
+        entity = _get_full_entity()
+        repository = _get_repo()
+        created = await repository.create(entity)
+
+        # When
+        updated = await repository.update_password(created.username, created.hashed_password,
+                                                   {"hashed_password": "new_hash"})
+        stale = await repository.update_password(created.username, created.hashed_password,
+                                                 {"hashed_password": "other_hash"})
+
+        # Then
+        assert updated is True
+        assert stale is False
+        assert (await repository.retrieve(created.user_id)).hashed_password == "new_hash"
+
     # endregion update entity tests
 
     # region delete entity tests
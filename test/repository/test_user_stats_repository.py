@@ -0,0 +1,138 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.entity.user_entity import User
+from app.entity.user_stats_entity import UserStats
+from app.repository.user_repository import UserRepository
+from app.repository.user_stats_repository import UserStatsRepository
+from app.service.user_stats_service import UserStatsService
+
+
+def _user(i: int, created_date: datetime, is_active: bool = True, roles: list[str] | None = None) -> User:
+    return User(user_id=f"stats-{i}", username=f"stats{i}", first_name="Stats", last_name="User",
+                email=f"stats{i}@stats.pyfapi.dev", is_active=is_active, roles=roles, created_date=created_date)
+
+
+class TestUserStatsRepository(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the materialized user stats maintained by the UserRepository writes and their reconciliation.
+    """
+
+    async def asyncSetUp(self):
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[User, UserStats], database=self.client.get_database(name="pyfapi"))
+        self.stats = UserStatsRepository()
+        self.repository = UserRepository(stats=self.stats)
+        self.today = datetime.now(timezone.utc).replace(microsecond=0)
+
+    async def asyncTearDown(self):
+        await self.client.drop_database("pyfapi")
+
+    async def test_given_user_writes_when_retrieve_then_counters_match_recount(self):
+        # Arrange
+        await self.repository.create(_user(1, self.today, roles=["ROLE_USER", "ROLE_ADMIN"]))
+        await self.repository.create(_user(2, self.today, roles=["ROLE_USER"]))
+        await self.repository.create(_user(3, self.today - timedelta(days=1), is_active=False))
+
+        # Act
+        await self.repository.update_fields("stats-2", {"is_active": False, "roles": ["ROLE_USER", "ROLE_AUDIT"]})
+        await self.repository.update_fields("stats-3", {"first_name": "Renamed"})
+        await self.repository.delete("stats-1")
+        stats = await self.stats.retrieve()
+
+        # Assert
+        self.assertEqual((stats.total, stats.active, stats.inactive), (2, 0, 2))
+        self.assertEqual(stats.roles, {"ROLE_USER": 1, "ROLE_ADMIN": 0, "ROLE_AUDIT": 1})
+        self.assertEqual(sum(stats.daily.values()), 2)
+        self.assertEqual((await self.stats.reconcile()).last_drift, 0)
+
+    async def test_given_full_user_when_update_then_counters_kept(self):
+        # Arrange
+        await self.repository.create(_user(1, self.today, roles=["ROLE_USER"]))
+        user = await self.repository.retrieve("stats-1")
+        user.is_active = False
+        user.roles = ["ROLE_AUDIT"]
+
+        # Act
+        updated = await self.repository.update(user)
+        stats = await self.stats.retrieve()
+
+        # Assert
+        self.assertEqual((updated.is_active, updated.roles, updated.email), (False, ["ROLE_AUDIT"], user.email))
+        self.assertEqual((stats.total, stats.active, stats.inactive), (1, 0, 1))
+        self.assertEqual(stats.roles, {"ROLE_USER": 0, "ROLE_AUDIT": 1})
+        self.assertEqual((await self.stats.reconcile()).last_drift, 0)
+
+    async def test_given_writes_outside_repository_when_reconcile_then_drift_corrected(self):
+        # Arrange
+        await self.repository.create(_user(1, self.today, roles=["ROLE_USER"]))
+        await User.get_motor_collection().insert_one(
+            {"user_id": "stats-raw", "username": "statsraw", "first_name": "Stats", "last_name": "User",
+             "email": "statsraw@stats.pyfapi.dev", "is_active": True, "roles": ["ROLE_USER", "ROLE_USER"],
+             "created_date": self.today - timedelta(days=40)})
+        service = UserStatsService(self.stats, reconcile_seconds=0)
+
+        # Act
+        await service.reconcile()
+        result = await service.retrieve(days=30)
+
+        # Assert
+        self.assertEqual((result.total, result.active, result.roles), (2, 2, {"ROLE_USER": 2}))
+        self.assertEqual(result.daily, {f"{self.today:%Y-%m-%d}": 1})
+        self.assertEqual(result.last_drift, 4)
+
+    async def test_given_increment_during_aggregation_when_reconcile_then_increment_kept(self):
+        # Arrange
+        await self.repository.create(_user(1, self.today, roles=["ROLE_USER"]))
+        await User.get_motor_collection().insert_one(
+            {"user_id": "stats-raw", "username": "statsraw", "first_name": "Stats", "last_name": "User",
+             "email": "statsraw@stats.pyfapi.dev", "is_active": False, "roles": ["ROLE_AUDIT"],
+             "created_date": self.today - timedelta(days=40)})
+        collection = User.get_motor_collection()
+        aggregate = collection.aggregate
+        repository, today = self.repository, self.today
+
+        class CreateAfterAggregation:
+            def __init__(self, pipeline):
+                self.cursor = aggregate(pipeline)
+
+            async def to_list(self, length):
+                result = await self.cursor.to_list(length)
+                await repository.create(_user(2, today, roles=["ROLE_USER"]))
+                return result
+
+        # Act
+        with patch.object(collection, "aggregate", CreateAfterAggregation):
+            raced = await self.stats.reconcile()
+        reconciled = await self.stats.reconcile()
+
+        # Assert
+        self.assertEqual((raced.active, raced.roles["ROLE_USER"]), (2, 2))
+        self.assertEqual((raced.inactive, raced.roles["ROLE_AUDIT"], raced.total), (1, 1, 2))
+        self.assertEqual((reconciled.total, reconciled.active, reconciled.inactive), (3, 2, 1))
+        self.assertEqual(reconciled.last_drift, 1)
+
+    async def test_given_workers_when_reconcile_then_one_recount_per_lease(self):
+        # Arrange
+        for i in range(3):
+            await User.get_motor_collection().insert_one(
+                _user(i, self.today).model_dump(by_alias=True, exclude={"id", "revision_id"}))
+        workers = [UserStatsService(self.stats, reconcile_seconds=60) for _ in range(4)]
+
+        # Act
+        with patch.object(self.stats, "reconcile", wraps=self.stats.reconcile) as reconcile:
+            await asyncio.gather(*(worker.start() for worker in workers))
+            await asyncio.gather(*(worker.reconcile() for worker in workers))
+            for worker in workers:
+                await worker.stop()
+        stats = await self.stats.retrieve()
+
+        # Assert
+        self.assertEqual(reconcile.await_count, 1)
+        self.assertEqual((stats.total, stats.active, stats.last_drift), (3, 3, 9))
+        self.assertEqual(stats.lease_owner, workers[0].node_id)
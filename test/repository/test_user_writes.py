@@ -0,0 +1,52 @@
+import unittest
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.entity.collection_version_entity import CollectionVersion
+from app.entity.user_entity import User
+from app.errors.business_exception import BusinessException, ErrorCodes
+from app.repository.change_version import ChangeVersion
+from app.repository.user_repository import UserRepository
+
+
+def _user(i: int) -> User:
+    return User(user_id=f"writes-{i}", username=f"writes{i}", first_name="Writes", last_name="User",
+                email=f"writes{i}@writes.pyfapi.dev")
+
+
+class TestUserWrites(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the UserRepository writes checked by the unique indexes and the password compare-and-set.
+    """
+
+    async def asyncSetUp(self):
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[User, CollectionVersion], database=self.client.get_database(name="pyfapi"))
+        self.repository = UserRepository(versions=ChangeVersion(User, cache_seconds=0))
+        await self.repository.create(_user(1))
+        await self.repository.create(_user(2))
+
+    async def asyncTearDown(self):
+        await self.client.drop_database("pyfapi")
+
+    async def test_given_email_of_other_user_when_update_fields_then_raise_already_exists(self):
+        with self.assertRaises(BusinessException) as context:
+            await self.repository.update_fields("writes-2", {"email": "writes1@writes.pyfapi.dev"})
+        self.assertEqual(context.exception.code, ErrorCodes.ALREADY_EXISTS)
+        self.assertEqual((await self.repository.retrieve("writes-2")).email, "writes2@writes.pyfapi.dev")
+
+    async def test_given_stale_password_hash_when_update_password_then_version_unchanged(self):
+        # Arrange
+        await self.repository.update_fields("writes-1", {"hashed_password": "hash-1"})
+        version = await self.repository.version()
+
+        # Act
+        stale = await self.repository.update_password("writes1", "hash-0", {"hashed_password": "hash-2"})
+        stale_version = await self.repository.version()
+        updated = await self.repository.update_password("writes1", "hash-1", {"hashed_password": "hash-2"})
+
+        # Assert
+        self.assertEqual((stale, updated), (False, True))
+        self.assertEqual(stale_version, version)
+        self.assertEqual(await self.repository.version(), version + 1)
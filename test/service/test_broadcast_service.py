@@ -0,0 +1,181 @@
+# python unittest for the email broadcast jobs with mongomock and a local SMTP stand-in
+import asyncio
+import os
+import unittest
+from datetime import datetime, timezone
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.entity import BroadcastJob, OutboxEmail, User
+from app.entity.broadcast_job_entity import BroadcastStatus
+from app.repository.broadcast_job_repository import BroadcastJobRepository
+from app.repository.outbox_email_repository import OutboxEmailRepository
+from app.service.broadcast_service import BroadcastService
+from app.service.email_outbox import EmailOutbox
+from app.service.email_template import EmailTemplates
+from app.service.smtp_pool import SMTPConnectionPool
+from test.service.test_email_outbox import FakeSMTP
+
+_TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "templates", "email")
+_CONTEXT = {"app_name": "PyFAPI", "app_url": "http://localhost:8000"}
+
+
+def _refuse_connection(host, port, timeout):
+    raise ConnectionRefusedError("Connection refused")
+
+
+def _get_service(smtp_factory=FakeSMTP, lease_seconds=60):
+    pool = SMTPConnectionPool(host="localhost", port=2525, username="sender@test.com", password="password",
+                              tls=False, size=2, timeout=5, idle_timeout=60, smtp_factory=smtp_factory)
+    outbox = EmailOutbox(pool, OutboxEmailRepository(), workers=0)
+    return BroadcastService(BroadcastJobRepository(), outbox, EmailTemplates(_TEMPLATE_DIR), batch_size=3,
+                            lease_seconds=lease_seconds)
+
+
+async def _create_users(active, inactive=0):
+    users = [User(user_id=f"user{i}", username=f"user{i}", first_name=f"First{i}", last_name="Last",
+                  email=f"user{i}@test.com", is_active=i < active)
+             for i in range(active + inactive)]
+    await User.insert_many(users)
+    return await User.find({}).sort("+_id").to_list()
+
+
+async def _claim_job(service, **fields):
+    job = BroadcastJob(job_id="job-1", template="welcome", context=_CONTEXT, concurrency=2, rate=0,
+                       created_date=datetime.now(timezone.utc), **fields)
+    await service.repository.create(job)
+    return await service.repository.claim(service.node_id, service.lease_seconds)
+
+
+class TestBroadcastService(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for BroadcastService. Recipients are streamed from the users collection in batches and checkpointed.
+    """
+
+    async def asyncSetUp(self):
+        FakeSMTP.connections = []
+        FakeSMTP.rejected = set()
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[User, OutboxEmail, BroadcastJob],
+                          database=self.client.get_database(name="pyfapi"))
+
+    async def test_given_active_users_when_run_then_send_to_each_and_complete(self):
+        """
+        Test case: A job sends the rendered template to every active user and completes with the counters
+        and the checkpoint of the last recipient.
+        """
+        # Arrange
+        users = await _create_users(active=7, inactive=2)
+        service = _get_service()
+        job = await _claim_job(service)
+
+        # Act
+        await service.run(job)
+
+        # Assert
+        result = await service.retrieve("job-1")
+        messages = [message for conn in FakeSMTP.connections for message in conn.messages]
+        self.assertEqual(result.status, BroadcastStatus.COMPLETED)
+        self.assertEqual((result.total, result.processed, result.sent), (7, 7, 7))
+        self.assertEqual(result.last_id, users[6].id)
+        self.assertEqual(sorted(message["To"] for message in messages), [f"user{i}@test.com" for i in range(7)])
+        self.assertLessEqual(len(FakeSMTP.connections), 2)
+
+    async def test_given_checkpoint_when_resume_then_send_after_last_id(self):
+        """
+        Test case: A job resumed by another node continues after the last checkpointed recipient.
+        """
+        # Arrange
+        users = await _create_users(active=5)
+        service = _get_service()
+        job = await _claim_job(service, status=BroadcastStatus.RUNNING, last_id=users[2].id, total=5, processed=3,
+                               sent=3, lease_expires_date=datetime(2024, 1, 1))
+
+        # Act
+        await service.run(job)
+
+        # Assert
+        result = await service.retrieve("job-1")
+        messages = [message for conn in FakeSMTP.connections for message in conn.messages]
+        self.assertEqual(result.status, BroadcastStatus.COMPLETED)
+        self.assertEqual((result.processed, result.sent), (5, 5))
+        self.assertEqual(sorted(message["To"] for message in messages), ["user3@test.com", "user4@test.com"])
+
+    async def test_given_smtp_failures_when_run_then_count_rejected_and_defer_to_outbox(self):
+        """
+        Test case: Rejected recipients are counted as failed, messages failing on a connection error
+        are moved to the email outbox.
+        """
+        # Arrange
+        await _create_users(active=3)
+        FakeSMTP.rejected = {"user1@test.com"}
+        rejecting = _get_service()
+        refused = _get_service(_refuse_connection)
+
+        # Act
+        await rejecting.run(await _claim_job(rejecting))
+        rejected_job = await rejecting.retrieve("job-1")
+        await BroadcastJob.find_all().delete()
+        await refused.run(await _claim_job(refused))
+        deferred_job = await refused.retrieve("job-1")
+
+        # Assert
+        self.assertEqual((rejected_job.sent, rejected_job.failed, rejected_job.deferred), (2, 1, 0))
+        self.assertEqual((deferred_job.sent, deferred_job.failed, deferred_job.deferred), (0, 0, 3))
+        self.assertEqual(await OutboxEmail.count(), 3)
+
+    async def test_given_job_running_on_node_when_claim_then_not_claimed_again(self):
+        """
+        Test case: A running job whose lease expired is not claimed again by the node still running it,
+        another node claims it with its own lease owner.
+        """
+        # Arrange
+        service = _get_service()
+        other = _get_service()
+        await service.repository.create(BroadcastJob(job_id="job-1", template="welcome", context=_CONTEXT,
+                                                     concurrency=2, rate=0, status=BroadcastStatus.RUNNING,
+                                                     lease_owner="crashed",
+                                                     lease_expires_date=datetime(2024, 1, 1),
+                                                     created_date=datetime.now(timezone.utc)))
+        running = asyncio.create_task(asyncio.sleep(10))
+        service._jobs["job-1"] = running
+
+        # Act
+        try:
+            own_claims = (await service._claim(), await service._claim("job-1"))
+            other_claim = await other.repository.claim(f"{other.node_id}-other", other.lease_seconds)
+        finally:
+            running.cancel()
+
+        # Assert
+        self.assertEqual(own_claims, (None, None))
+        self.assertEqual(other_claim.lease_owner, f"{other.node_id}-other")
+
+    async def test_given_batch_longer_than_lease_when_run_then_lease_renewed_and_sent_once(self):
+        """
+        Test case: The lease is renewed while a rate limited batch is sent, no other node claims the job meanwhile.
+        """
+        # Arrange
+        await _create_users(active=3)
+        service = _get_service(lease_seconds=0.3)
+        other = _get_service(lease_seconds=0.3)
+        await service.repository.create(BroadcastJob(job_id="job-1", template="welcome", context=_CONTEXT,
+                                                     concurrency=1, rate=5, created_date=datetime.now(timezone.utc)))
+        job = await service.repository.claim(f"{service.node_id}-claim", service.lease_seconds)
+
+        # Act
+        run = asyncio.create_task(service.run(job))
+        other_claims = []
+        while not run.done():
+            other_claims.append(await other.repository.claim(f"{other.node_id}-other", other.lease_seconds))
+            await asyncio.sleep(0.05)
+        await run
+
+        # Assert
+        result = await service.retrieve("job-1")
+        messages = [message for conn in FakeSMTP.connections for message in conn.messages]
+        self.assertEqual(result.status, BroadcastStatus.COMPLETED)
+        self.assertEqual((result.processed, result.sent), (3, 3))
+        self.assertEqual(len(messages), 3)
+        self.assertEqual(set(other_claims), {None})
@@ -0,0 +1,224 @@
+# python unittest for the durable email outbox and the SMTP connection pool with a local SMTP stand-in
+import asyncio
+import os
+import smtplib
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.entity.outbox_email_entity import OutboxEmail, OutboxStatus
+from app.repository.outbox_email_repository import OutboxEmailRepository
+from app.service.email_outbox import EmailOutbox
+from app.service.smtp_pool import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """
+    Local SMTP stand-in recording connections, logins and sent messages.
+    """
+    connections = []
+    rejected = set()
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.logins = 0
+        self.starttls_calls = 0
+        self.messages = []
+        self.closed = False
+        self.disconnect_after = None
+        FakeSMTP.connections.append(self)
+
+    def starttls(self):
+        self.starttls_calls += 1
+
+    def login(self, user, password):
+        self.logins += 1
+
+    def send_message(self, message, from_addr=None):
+        if self.disconnect_after is not None and len(self.messages) >= self.disconnect_after:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        if message["To"] in FakeSMTP.rejected:
+            raise smtplib.SMTPRecipientsRefused({message["To"]: (550, b"mailbox unavailable")})
+        self.messages.append(message)
+
+    def noop(self):
+        return 250, b"OK"
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+def _get_pool(size=1):
+    return SMTPConnectionPool(host="localhost", port=2525, username="sender@test.com", password="password",
+                              tls=True, size=size, timeout=5, idle_timeout=60, smtp_factory=FakeSMTP)
+
+
+def _get_outbox(pool=None, max_attempts=3):
+    return EmailOutbox(pool or _get_pool(), OutboxEmailRepository(), workers=0, batch_size=50,
+                       lease_seconds=60, max_attempts=max_attempts, retry_base_seconds=30, retry_max_seconds=600)
+
+
+async def _enqueue(outbox, count):
+    for i in range(count):
+        await outbox.enqueue(f"user{i}@test.com", "subject", f"body {i}")
+
+
+async def _make_due():
+    await OutboxEmail.get_motor_collection().update_many(
+        {"status": OutboxStatus.PENDING.value}, {"$set": {"next_attempt_date": datetime.now(timezone.utc)}})
+
+
+class TestEmailOutbox(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for EmailOutbox. Messages are stored in the outbox collection, claimed with a lease
+    and sent over pooled connections.
+    """
+
+    async def asyncSetUp(self):
+        FakeSMTP.connections = []
+        FakeSMTP.rejected = set()
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[OutboxEmail], database=self.client.get_database(name="pyfapi"))
+
+    async def test_given_queued_messages_when_drain_then_all_sent_over_one_connection(self):
+        """
+        Test case: Given many queued messages, when the outbox is drained,
+        then the messages are sent with one authenticated connection and marked as sent.
+        """
+        # Arrange
+        outbox = _get_outbox()
+        await _enqueue(outbox, 20)
+
+        # Act
+        processed = await outbox.drain()
+
+        # Assert
+        self.assertEqual(processed, 20)
+        self.assertEqual(len(FakeSMTP.connections), 1)
+        self.assertEqual(FakeSMTP.connections[0].logins, 1)
+        self.assertEqual(FakeSMTP.connections[0].starttls_calls, 1)
+        self.assertEqual(len(FakeSMTP.connections[0].messages), 20)
+        self.assertEqual(await OutboxEmail.find({"status": OutboxStatus.SENT.value}).count(), 20)
+        self.assertEqual(outbox.sent, 20)
+
+    async def test_given_claimed_messages_when_claim_again_then_not_claimed_twice(self):
+        """
+        Test case: Messages claimed by one worker are not claimed by another worker while the lease holds,
+        and are reclaimed once the lease expires.
+        """
+        # Arrange
+        outbox = _get_outbox()
+        repository = OutboxEmailRepository()
+        await _enqueue(outbox, 5)
+
+        # Act
+        first = await repository.claim_batch("node-a", 3, lease_seconds=60)
+        second = await repository.claim_batch("node-b", 10, lease_seconds=60)
+        none_left = await repository.claim_batch("node-c", 10, lease_seconds=60)
+        await OutboxEmail.get_motor_collection().update_many(
+            {"lease_owner": "node-a"}, {"$set": {"lease_expires_date": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+        reclaimed = await repository.claim_batch("node-d", 10, lease_seconds=60)
+
+        # Assert
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({email.id for email in first} & {email.id for email in second})
+        self.assertEqual(none_left, [])
+        self.assertEqual({email.id for email in reclaimed}, {email.id for email in first})
+        self.assertTrue(all(email.attempts == 2 for email in reclaimed))
+
+    async def test_given_rejected_recipient_when_drain_then_retry_later_and_dead_letter(self):
+        """
+        Test case: A rejected message is scheduled for a retry with backoff
+        and dead-lettered when it runs out of attempts.
+        """
+        # Arrange
+        outbox = _get_outbox(max_attempts=2)
+        FakeSMTP.rejected = {"user1@test.com"}
+        await _enqueue(outbox, 3)
+
+        # Act
+        await outbox.drain()
+        retry = await OutboxEmail.find_one({"to": "user1@test.com"})
+        await _make_due()
+        await outbox.drain()
+        dead = await OutboxEmail.find_one({"to": "user1@test.com"})
+
+        # Assert
+        self.assertEqual(retry.status, OutboxStatus.PENDING)
+        self.assertGreater(retry.next_attempt_date, datetime.now() + timedelta(seconds=10))
+        self.assertIn("SMTPRecipientsRefused", retry.last_error)
+        self.assertEqual(dead.status, OutboxStatus.DEAD)
+        self.assertEqual(dead.attempts, 2)
+        self.assertEqual(outbox.sent, 2)
+        self.assertEqual(outbox.dead, 1)
+
+    async def test_given_dropped_connection_when_send_then_reconnect_and_send_rest(self):
+        """
+        Test case: When the SMTP server drops a pooled connection in the middle of a batch,
+        the outbox should reconnect once and send the remaining messages.
+        """
+        # Arrange
+        pool = _get_pool()
+        outbox = _get_outbox(pool)
+        conn = pool.acquire()
+        conn.disconnect_after = 3
+        pool.release(conn)
+        await _enqueue(outbox, 10)
+
+        # Act
+        await outbox.drain()
+
+        # Assert
+        self.assertEqual(outbox.sent, 10)
+        self.assertEqual(len(FakeSMTP.connections), 2)
+        self.assertTrue(FakeSMTP.connections[0].closed)
+        self.assertEqual(len(FakeSMTP.connections[1].messages), 7)
+
+    async def test_given_unreadable_attachment_when_drain_then_only_that_message_fails(self):
+        """
+        Test case: A message whose attachment can't be read (an OSError) fails alone, without a reconnect,
+        the other messages of the batch are sent and marked as sent.
+        """
+        # Arrange
+        outbox = _get_outbox()
+        await _enqueue(outbox, 2)
+        broken = await outbox.enqueue("broken@test.com", "subject", "body", attachment_path=os.path.dirname(__file__))
+        await _enqueue(outbox, 2)
+
+        # Act
+        await outbox.drain()
+
+        # Assert
+        failed = await OutboxEmail.get(broken.id)
+        self.assertEqual(len(FakeSMTP.connections), 1)
+        self.assertEqual(len(FakeSMTP.connections[0].messages), 4)
+        self.assertEqual(await OutboxEmail.find({"status": OutboxStatus.SENT.value}).count(), 4)
+        self.assertEqual((failed.status, failed.attempts), (OutboxStatus.PENDING, 1))
+        self.assertIn("IsADirectoryError", failed.last_error)
+
+    async def test_given_running_workers_when_enqueue_then_sent_by_workers(self):
+        """
+        Test case: Running workers are woken up by enqueue and send the message.
+        """
+        # Arrange
+        outbox = EmailOutbox(_get_pool(), OutboxEmailRepository(), workers=2, poll_interval_ms=5000)
+        await outbox.start()
+
+        # Act
+        await _enqueue(outbox, 4)
+        for _ in range(100):
+            if outbox.sent == 4:
+                break
+            await asyncio.sleep(0.01)
+        await outbox.stop()
+
+        # Assert
+        self.assertEqual(outbox.sent, 4)
+        self.assertEqual(await OutboxEmail.find({"status": OutboxStatus.SENT.value}).count(), 4)
@@ -0,0 +1,72 @@
+# python unittest for the email templates and the attachment cache
+import os
+import tempfile
+import unittest
+
+from app.errors.business_exception import BusinessException, ErrorCodes
+from app.service.email_message import AttachmentCache, build_message
+from app.service.email_template import EmailTemplates
+
+_TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "templates", "email")
+
+
+class TestEmailTemplates(unittest.TestCase):
+    """
+    Test suite for EmailTemplates and the attachment cache used by build_message.
+    """
+
+    def setUp(self):
+        self.templates = EmailTemplates(_TEMPLATE_DIR)
+
+    def test_given_welcome_template_when_render_then_return_subject_text_and_html(self):
+        """
+        Test case: The welcome template renders the subject, the plain text and the escaped HTML variant.
+        """
+        # Arrange
+        context = {"first_name": "<John>", "app_name": "pyfapi", "app_url": "http://localhost:8000"}
+
+        # Act
+        self.templates.load()
+        result = self.templates.render("welcome", context)
+
+        # Assert
+        self.assertEqual(result.subject, "Welcome to the pyfapi")
+        self.assertIn("Hello <John>,", result.text)
+        self.assertIn("Hello &lt;John&gt;,", result.html)
+
+    def test_given_unknown_template_when_render_then_raise_not_found(self):
+        """
+        Test case: Rendering a missing template raises a BusinessException with NOT_FOUND.
+        """
+        # Act & Assert
+        with self.assertRaises(BusinessException) as context:
+            self.templates.render("unknown", {})
+        self.assertEqual(context.exception.code, ErrorCodes.NOT_FOUND)
+
+    def test_given_same_attachment_when_build_messages_then_encoded_once(self):
+        """
+        Test case: An attachment sent to many recipients is read and encoded once,
+        a modified file is encoded again.
+        """
+        # Arrange
+        cache = AttachmentCache(max_size=4)
+        with tempfile.NamedTemporaryFile("wb", suffix=".txt", delete=False) as f:
+            f.write(b"report")
+        self.addCleanup(os.remove, f.name)
+
+        # Act
+        parts = [cache.get(f.name) for _ in range(3)]
+        with open(f.name, "ab") as changed:
+            changed.write(b" v2")
+        changed_part = cache.get(f.name)
+        message = build_message(["a@test.com", "b@test.com"], "subject", "body", f.name, html="<p>body</p>")
+
+        # Assert
+        self.assertIs(parts[0], parts[1])
+        self.assertIs(parts[0], parts[2])
+        self.assertIsNot(parts[0], changed_part)
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        self.assertEqual(message.get_content_type(), "multipart/mixed")
+        self.assertEqual([part.get_content_type() for part in message.walk()],
+                         ["multipart/mixed", "multipart/alternative", "text/plain", "text/html",
+                          "application/octet-stream"])
@@ -0,0 +1,83 @@
+import csv
+import gzip
+import io
+import json
+import unittest
+from datetime import datetime, timezone
+from importlib.util import find_spec
+from unittest.mock import patch
+
+from beanie import init_beanie
+from mongomock_motor import AsyncMongoMockClient
+
+from app.conf.app_settings import export_settings
+from app.conf.query_params import parse_filter
+from app.entity.user_entity import User
+from app.errors.business_exception import BusinessException, ErrorCodes
+from app.repository.user_repository import UserRepository
+from app.service.user_service import UserService
+
+
+async def _read(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+class TestUserExport(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the streaming user export of the UserService.
+    """
+
+    async def asyncSetUp(self):
+        self.client = AsyncMongoMockClient()
+        await init_beanie(document_models=[User], database=self.client.get_database(name="pyfapi"))
+        await User.get_motor_collection().insert_many([
+            {"user_id": f"export-{i}", "username": f"export{i}", "first_name": "Export", "last_name": "User",
+             "email": f"export{i}@export.pyfapi.dev", "hashed_password": "secret", "is_active": i % 2 == 0,
+             "roles": ["ROLE_USER", "ROLE_ADMIN"], "age": 20 + i,
+             "created_date": datetime(2024, 1, 1 + i, tzinfo=timezone.utc)} for i in range(7)])
+        self.service = UserService(UserRepository())
+
+    async def asyncTearDown(self):
+        await self.client.drop_database("pyfapi")
+
+    async def test_given_filter_when_export_ndjson_gzip_then_all_rows_in_batches(self):
+        # Act
+        with patch.object(export_settings, "BATCH_SIZE", 3):
+            writer, stream = await self.service.export(parse_filter('{"is_active": true}'), "ndjson", gzip=True)
+            chunks = [chunk async for chunk in stream]
+
+        # Assert
+        rows = [json.loads(line) for line in gzip.decompress(b"".join(chunks)).decode().splitlines()]
+        self.assertEqual(writer.media_type, "application/x-ndjson")
+        self.assertEqual([row["username"] for row in rows], ["export0", "export2", "export4", "export6"])
+        self.assertNotIn("hashed_password", rows[0])
+        self.assertEqual(rows[0]["created_date"], "2024-01-01T00:00:00")
+
+    async def test_given_fields_when_export_csv_then_header_and_selected_columns(self):
+        # Act
+        _, stream = await self.service.export(None, "csv", ["username", "roles", "is_active"])
+        rows = list(csv.reader(io.StringIO((await _read(stream)).decode())))
+
+        # Assert
+        self.assertEqual(rows[0], ["username", "roles", "is_active"])
+        self.assertEqual(rows[1], ["export0", "ROLE_USER;ROLE_ADMIN", "true"])
+        self.assertEqual(len(rows), 8)
+
+    @unittest.skipUnless(find_spec("pyarrow"), "pyarrow is not installed")
+    async def test_given_arrow_format_when_export_then_arrow_ipc_stream(self):
+        import pyarrow as pa
+
+        # Act
+        with patch.object(export_settings, "BATCH_SIZE", 4):
+            _, stream = await self.service.export(None, "arrow", ["username", "age", "created_date"])
+            table = pa.ipc.open_stream(await _read(stream)).read_all()
+
+        # Assert
+        self.assertEqual(table.num_rows, 7)
+        self.assertEqual(table.column("age").to_pylist(), list(range(20, 27)))
+        self.assertEqual(str(table.schema.field("created_date").type), "timestamp[ms, tz=UTC]")
+
+    async def test_given_password_field_when_export_then_raise_invalid_input(self):
+        with self.assertRaises(BusinessException) as context:
+            await self.service.export(None, "ndjson", ["username", "hashed_password"])
+        self.assertEqual(context.exception.code, ErrorCodes.INVALID_INPUT)
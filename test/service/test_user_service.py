@@ -127,14 +127,14 @@ class TestUserService(unittest.IsolatedAsyncioTestCase):
         fvo = _get_mock_dto()
 
         self.mock_repository.create.return_value = fvo
-        self.mock_email_service.send_email.return_value = True
+        self.mock_email_service.send_template_email.return_value = True
 
         # Act
         result = await self.service.create(create_entity, jwt_user)
 
         # Assert
         self.mock_repository.create.assert_called_once()
-        self.mock_email_service.send_email.assert_called_once()
+        self.mock_email_service.send_template_email.assert_called_once()
         self.assertEqual(result.user_id, fvo.user_id)
         self.assertEqual(result, UserDTO.model_validate(fvo))
 
@@ -159,7 +159,7 @@ class TestUserService(unittest.IsolatedAsyncioTestCase):
         """
         # Arrange
         dto = None
-        self.mock_email_service.send_email.return_value = False
+        self.mock_email_service.send_template_email.return_value = False
 
         # Act & Assert
         with self.assertRaises(BusinessException) as context:
@@ -181,34 +181,21 @@ class TestUserService(unittest.IsolatedAsyncioTestCase):
             await self.service.create(create_entity, jwt_user)
 
 
-    async def test_given_existing_username_when_validation_then_raise_already_exists(self):
+    async def test_given_existing_user_when_create_then_raise_already_exists(self):
         """
-        Test case: When creating a user with an existing email,
-        it should raise a BusinessException with the appropriate error code.
+        Test case: When creating a user with an existing username or email,
+        the duplicate key error of the repository should be raised as is, without an email.
         """
         # Arrange
         create_entity = _get_create_entity()
-        existing_user = _get_mock_dto()
-        User.find_one = AsyncMock(return_value=existing_user)
+        self.mock_repository.create.side_effect = BusinessException(ErrorCodes.ALREADY_EXISTS,
+                                                                    "User with email already exists: test@test.com")
 
         # Act & Assert
         with self.assertRaises(BusinessException) as context:
-            await self.service.user_create_validation(create_entity)
-        self.assertEqual(context.exception.code, ErrorCodes.ALREADY_EXISTS)
-
-    async def test_given_existing_email_when_validation_then_raise_already_exists(self):
-        """
-        Test case: When creating a user with an existing email,
-        it should raise a BusinessException with the appropriate error code.
-        """
-        # Arrange
-        create_entity = _get_create_entity()
-        User.find_one = AsyncMock(side_effect=[None, _get_mock_dto()])
-
-        # Act & Assert
-        with self.assertRaises(BusinessException) as context:
-            await self.service.user_create_validation(create_entity)
+            await self.service.create(create_entity, _get_jwt_user())
         self.assertEqual(context.exception.code, ErrorCodes.ALREADY_EXISTS)
+        self.mock_email_service.send_template_email.assert_not_called()
 
     async def test_given_valid_user_id_when_retrieve_then_return_user(self):
         """
@@ -253,34 +240,56 @@ class TestUserService(unittest.IsolatedAsyncioTestCase):
         user_id = "test"
         update_entity = _get_update_entity()
         fvo = _get_mock_dto()
-        self.mock_repository.retrieve.return_value = fvo
-        self.mock_repository.update.return_value = fvo
+        self.mock_repository.update_fields.return_value = fvo
 
         # Act
         result = await self.service.update(user_id, update_entity, _get_jwt_user())
 
         # Assert
-        self.mock_repository.retrieve.assert_called_once_with(user_id)
-        self.mock_repository.update.assert_called_once()
+        self.mock_repository.retrieve.assert_not_called()
+        self.mock_repository.update_fields.assert_called_once()
+        called_user_id, fields = self.mock_repository.update_fields.call_args.args
+        self.assertEqual(called_user_id, user_id)
+        self.assertEqual(fields["first_name"], update_entity.first_name)
+        self.assertEqual(fields["roles"], update_entity.roles)
+        self.assertEqual(fields["last_updated_by"], "system")
+        self.assertIn("last_updated_date", fields)
         self.assertEqual(result.user_id, fvo.user_id)
         self.assertEqual(result, UserDTO.model_validate(fvo))
 
-    async def test_given_invalid_update_entity_when_update_then_return_none(self):
+    async def test_given_invalid_user_id_when_update_then_raise_not_found(self):
         """
         Test case: When attempting to update a user that doesn't exist,
-        the service should return None.
+        the NOT_FOUND error of the repository should propagate.
         """
         # Arrange
         user_id = "test"
         update_entity = _get_update_entity()
-        self.mock_repository.retrieve.return_value = None
+        self.mock_repository.update_fields.side_effect = BusinessException(ErrorCodes.NOT_FOUND,
+                                                                           f"User not found: {user_id}")
+
+        # Act & Assert
+        with self.assertRaises(BusinessException) as context:
+            await self.service.update(user_id, update_entity, _get_jwt_user())
+        self.mock_repository.update_fields.assert_called_once()
+        self.assertEqual(context.exception.code, ErrorCodes.NOT_FOUND)
+
+    async def test_given_partial_update_entity_when_update_then_set_only_given_fields(self):
+        """
+        Test case: When updating only some fields of a user,
+        the service should $set only these fields and the audit fields.
+        """
+        # Arrange
+        user_id = "test"
+        update_entity = UserUpdate(first_name="partial")
+        self.mock_repository.update_fields.return_value = _get_mock_dto()
 
         # Act
-        result = await self.service.update(user_id, update_entity, _get_jwt_user())
+        await self.service.update(user_id, update_entity, _get_jwt_user())
 
         # Assert
-        self.mock_repository.retrieve.assert_called_once_with(user_id)
-        self.assertIsNone(result)
+        _, fields = self.mock_repository.update_fields.call_args.args
+        self.assertEqual(set(fields), {"first_name", "last_updated_by", "last_updated_date"})
 
     async def test_given_null_update_entity_when_update_then_return_none(self):
         """
@@ -377,13 +386,35 @@ class TestUserService(unittest.IsolatedAsyncioTestCase):
         fvo = _get_mock_dto()
         self.mock_repository.retrieve_by_username.return_value = fvo
 
+        self.mock_repository.update_password.return_value = True
+
         # Act
         await self.service.change_password(username, current_password, new_password)
 
         # Assert
         self.mock_repository.retrieve_by_username.assert_called_once_with(username)
-        self.mock_repository.update.assert_called_once()
-        self.assertTrue(PasswordUtil().verify_password(new_password, fvo.hashed_password))
+        self.mock_repository.update.assert_not_called()
+        called_username, current_hash, fields = self.mock_repository.update_password.call_args.args
+        self.assertEqual(called_username, username)
+        self.assertEqual(current_hash, fvo.hashed_password)
+        self.assertTrue(PasswordUtil().verify_password(new_password, fields["hashed_password"]))
+
+    async def test_given_concurrent_password_change_when_change_password_then_raise_conflict(self):
+        """
+        Test case: When the password was changed by another request between the read and the write,
+        the service should raise a BusinessException with the conflict error code.
+        """
+
+        # Arrange
+        username = "test"
+        fvo = _get_mock_dto()
+        self.mock_repository.retrieve_by_username.return_value = fvo
+        self.mock_repository.update_password.return_value = False
+
+        # Act & Assert
+        with self.assertRaises(BusinessException) as context:
+            await self.service.change_password(username, "password", "new_password")
+        self.assertEqual(context.exception.code, ErrorCodes.CONFLICT)
 
     async def test_given_invalid_username_when_change_password_then_raise_not_found(self):
         """
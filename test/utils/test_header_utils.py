@@ -0,0 +1,26 @@
+import unittest
+
+from app.utils.header_utils import accepts_encoding
+
+
+class TestHeaderUtils(unittest.TestCase):
+    """
+    Test suite for the request header helpers.
+    """
+
+    def test_given_accept_encoding_when_accepts_gzip_then_q_values_respected(self):
+        cases = {
+            "gzip": True,
+            "deflate, GZIP;q=0.5": True,
+            "gzip;q=0": False,
+            "gzip; q=0.0, *": False,
+            "*": True,
+            "*;q=0": False,
+            "br, deflate": False,
+            "gzip;q=bad": False,
+            "": False,
+            None: False,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(accepts_encoding(header, "gzip"), expected)
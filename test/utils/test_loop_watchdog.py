@@ -0,0 +1,55 @@
+import asyncio
+import time
+import unittest
+
+from app.utils.loop_watchdog import LagHistogram, LoopWatchdog
+
+
+def _blocking_call():
+    time.sleep(0.3)
+
+
+class TestLoopWatchdog(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the event loop lag histogram and the blocking-call detector.
+    """
+
+    def test_given_lags_when_observe_then_cumulative_buckets(self):
+        # Arrange
+        histogram = LagHistogram(buckets=(1, 10, 100))
+
+        # Act
+        for value_ms in (0.0, 1.0, 1.5, 10.0, 99.9, 250.0):
+            histogram.observe(value_ms)
+
+        # Assert
+        self.assertEqual([(bucket.le, bucket.count) for bucket in histogram.cumulative()],
+                         [(1, 2), (10, 4), (100, 5), (None, 6)])
+        self.assertEqual((histogram.count, histogram.sum, histogram.max), (6, 362.4, 250.0))
+
+    async def test_given_blocking_call_when_loop_stalls_then_stack_captured(self):
+        # Arrange
+        watchdog = LoopWatchdog(interval_ms=20, threshold_ms=100, history_size=10, stack_limit=20)
+        await watchdog.start()
+        monitor = watchdog._monitor_thread
+
+        # Act
+        await asyncio.sleep(0.1)
+        await asyncio.create_task(self._block(), name="blocking-task")
+        await asyncio.sleep(0.1)
+        await watchdog.stop()
+
+        # Assert
+        events = watchdog.blocking_events()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(watchdog.blocking_count, 1)
+        self.assertEqual(events[0].task, "blocking-task")
+        self.assertGreaterEqual(events[0].duration_ms, 200)
+        self.assertTrue(any("_blocking_call" in line for line in events[0].stack))
+        self.assertIn('event_loop_blocking_total 1', watchdog.prometheus())
+        self.assertFalse(monitor.is_alive())
+        self.assertFalse(watchdog.report().running)
+
+    @staticmethod
+    async def _block():
+        _blocking_call()
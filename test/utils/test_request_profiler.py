@@ -0,0 +1,109 @@
+import unittest
+from datetime import datetime, timezone
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import admin_api
+from app.conf.app_settings import server_settings
+from app.middleware.profiling_middleware import ProfilingMiddleware
+from app.schema.admin_dto import ProfileReport
+from app.security import auth_handler
+from app.utils.request_profiler import ProfileStore, RequestProfiler
+
+
+def _token(scopes: list[str]) -> dict:
+    token = auth_handler.create_access_token({"sub": "profiler", "scopes": scopes, "user_id": "profile-1",
+                                              "email": "profiler@profile.pyfapi.dev"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _report(profile_id: str) -> ProfileReport:
+    return ProfileReport(profile_id=profile_id, method="GET", path="/users", created_date=datetime.now(timezone.utc),
+                         wall_time_ms=1.0, cpu_time_ms=1.0, await_time_ms=0.0)
+
+
+def _fibonacci(n: int) -> int:
+    return n if n < 2 else _fibonacci(n - 1) + _fibonacci(n - 2)
+
+
+async def _users():
+    return [{"fibonacci": _fibonacci(12)}]
+
+
+class TestRequestProfiler(unittest.TestCase):
+    """
+    Test suite for the on-demand request profiler, its ring buffer and the admin API returning the reports.
+    """
+
+    def setUp(self):
+        app = FastAPI()
+        app.add_api_route("/users", _users)
+        app.include_router(admin_api.router)
+        app.add_middleware(ProfilingMiddleware)
+        self.client = TestClient(app)
+        self.admin = _token(["admin"])
+        self.user = _token(["user"])
+
+    def test_given_store_full_when_add_then_oldest_evicted(self):
+        # Arrange
+        store = ProfileStore(2)
+
+        # Act
+        for profile_id in ("p1", "p2", "p3"):
+            store.add(_report(profile_id))
+
+        # Assert
+        self.assertIsNone(store.get("p1"))
+        self.assertEqual(store.get("p2").profile_id, "p2")
+        self.assertEqual([report.profile_id for report in store.list()], ["p3", "p2"])
+
+    def test_given_profiled_request_when_another_starts_then_skipped(self):
+        # Arrange
+        first, second = RequestProfiler(), RequestProfiler()
+
+        # Act
+        started = first.start()
+        concurrent = second.start()
+        _fibonacci(10)
+        report = first.stop("GET", "/users", 200)
+        after_stop = second.start()
+        second.stop("GET", "/users", 200)
+
+        # Assert
+        self.assertEqual((started, concurrent, after_stop), (True, False, True))
+        self.assertTrue(any("_fibonacci" in stat.function for stat in report.top_functions))
+        self.assertEqual((report.method, report.path, report.status_code), ("GET", "/users", 200))
+
+    def test_given_profile_header_when_request_then_profiled_only_for_admin(self):
+        # Act
+        profiled = self.client.get("/users", headers={**self.admin, "X-Profile": "1"})
+        disabled = self.client.get("/users", headers={**self.admin, "X-Profile": "0"})
+        not_admin = self.client.get("/users", headers={**self.user, "X-Profile": "1"})
+        anonymous = self.client.get("/users", headers={"X-Profile": "1"})
+        invalid = self.client.get("/users", headers={"Authorization": "Bearer invalid", "X-Profile": "1"})
+
+        # Assert
+        self.assertEqual(profiled.json(), [{"fibonacci": 144}])
+        self.assertIn("x-profile-id", profiled.headers)
+        for response in (disabled, not_admin, anonymous, invalid):
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("x-profile-id", response.headers)
+
+    def test_given_profile_id_when_admin_api_then_report_for_admin_role_only(self):
+        # Arrange
+        profile_id = self.client.get("/users", headers={**self.admin, "X-Profile": "1"}).headers["x-profile-id"]
+        path = f"{server_settings.CONTEXT_PATH}/admin/profiles"
+
+        # Act
+        report = self.client.get(f"{path}/{profile_id}", headers=self.admin)
+        listed = self.client.get(path, headers=self.admin)
+        missing = self.client.get(f"{path}/unknown", headers=self.admin)
+        not_admin = self.client.get(f"{path}/{profile_id}", headers=self.user)
+        anonymous = self.client.get(path)
+
+        # Assert
+        self.assertEqual((report.json()["profile_id"], report.json()["status_code"]), (profile_id, 200))
+        self.assertEqual(listed.json()[0]["profile_id"], profile_id)
+        self.assertNotIn("top_functions", listed.json()[0])
+        self.assertEqual((missing.status_code, not_admin.status_code, anonymous.status_code), (404, 403, 401))
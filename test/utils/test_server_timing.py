@@ -0,0 +1,83 @@
+import asyncio
+import unittest
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.middleware.timing_middleware import ServerTimingMiddleware
+from app.utils import server_timing
+from app.utils.server_timing import ServerTiming, TimedJSONResponse, timed, timing_span
+
+
+@timed("db")
+async def _query():
+    await asyncio.sleep(0)
+    return "users"
+
+
+@timed("bcrypt")
+def _hash():
+    return "hash"
+
+
+async def _list_users(request):
+    await _query()
+    with timing_span("dto"):
+        content = [{"user_id": "timing-1"}]
+    return TimedJSONResponse(content=content)
+
+
+class TestServerTiming(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the request-scoped Server-Timing metrics and the middleware returning them.
+    """
+
+    def test_given_metrics_when_header_value_then_durations_summed_with_calls(self):
+        # Arrange
+        timing = ServerTiming()
+
+        # Act
+        timing.add("db", 1.5)
+        timing.add("auth", 0.25)
+        timing.add("db", 2.0)
+
+        # Assert
+        self.assertEqual(timing.get("db"), 3.5)
+        self.assertIsNone(timing.get("email"))
+        self.assertEqual(timing.header_value(), 'db;dur=3.50;desc="2 calls", auth;dur=0.25')
+
+    async def test_given_request_timing_when_timed_then_sync_and_async_recorded(self):
+        # Arrange
+        timing = ServerTiming()
+
+        # Act
+        outside = (await _query(), _hash())
+        token = server_timing.activate(timing)
+        try:
+            inside = (await _query(), _hash())
+            with timing_span("email"):
+                pass
+            TimedJSONResponse(content={"user_id": "timing-1"})
+        finally:
+            server_timing.deactivate(token)
+
+        # Assert
+        self.assertEqual(outside, inside)
+        self.assertEqual([metric.split(";")[0] for metric in timing.header_value().split(", ")],
+                         ["db", "bcrypt", "email", "serialize"])
+        self.assertIsNone(server_timing.current())
+
+    def test_given_list_response_when_middleware_then_server_timing_header(self):
+        # Arrange
+        app = Starlette(routes=[Route("/users", _list_users)])
+        app.add_middleware(ServerTimingMiddleware)
+
+        # Act
+        response = TestClient(app).get("/users")
+
+        # Assert
+        metrics = {metric.split(";")[0]: metric for metric in response.headers["server-timing"].split(", ")}
+        self.assertEqual(response.json(), [{"user_id": "timing-1"}])
+        self.assertEqual(list(metrics), ["db", "dto", "serialize", "total"])
+        self.assertNotIn("calls", metrics["serialize"])
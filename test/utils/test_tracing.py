@@ -0,0 +1,199 @@
+import logging
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.middleware.tracing_middleware import TracingMiddleware
+from app.utils import tracing
+from app.utils.tracing import BatchSpanProcessor, Span, SpanExporter, TracingCommandListener, Tracer
+
+_TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+_PARENT_ID = "00f067aa0ba902b7"
+
+
+class RecordingExporter(SpanExporter):
+    """
+    Span exporter keeping the exported batches in memory.
+    """
+
+    def __init__(self):
+        self.batches: list[list[Span]] = []
+        self.shutdown_calls = 0
+
+    async def export(self, spans: list[Span]):
+        self.batches.append(spans)
+
+    async def shutdown(self):
+        self.shutdown_calls += 1
+
+    @property
+    def spans(self) -> list[Span]:
+        return [span for batch in self.batches for span in batch]
+
+
+def _tracer(sample_rate: float = 1.0, **processor_args) -> tuple[Tracer, RecordingExporter]:
+    exporter = RecordingExporter()
+    processor = BatchSpanProcessor(exporter, **{"batch_size": 10, "flush_interval_ms": 60_000,
+                                                "max_queue_size": 100, **processor_args})
+    return Tracer(processor, sample_rate=sample_rate, enabled=True), exporter
+
+
+def _command_event(name: str, request_id: int, failure: dict | None = None):
+    return SimpleNamespace(command_name=name, database_name="pyfapi", command={name: "app_user"},
+                           request_id=request_id, connection_id=("localhost", 27017), duration_micros=1500,
+                           failure=failure)
+
+
+class TestTracing(unittest.IsolatedAsyncioTestCase):
+    """
+    Test suite for the in-process tracer: trace context propagation, sampling, batched export,
+    the Mongo command listener and the trace ids of the log records.
+    """
+
+    def test_given_traceparent_when_start_trace_then_continue_caller_trace(self):
+        # Arrange
+        tracer, _ = _tracer(sample_rate=0.0)
+
+        # Act
+        sampled = tracer.start_trace("GET /users", f"00-{_TRACE_ID}-{_PARENT_ID}-01")
+        not_sampled = tracer.start_trace("GET /users", f"00-{_TRACE_ID}-{_PARENT_ID}-00")
+
+        # Assert
+        self.assertEqual((sampled.trace_id, sampled.parent_id, sampled.kind), (_TRACE_ID, _PARENT_ID, "server"))
+        self.assertEqual(sampled.traceparent, f"00-{_TRACE_ID}-{sampled.span_id}-01")
+        self.assertIsNone(not_sampled)
+
+    def test_given_malformed_traceparent_when_start_trace_then_new_trace_by_sample_rate(self):
+        malformed = ["", "garbage", f"00-{_TRACE_ID}-{_PARENT_ID}", f"00-{_TRACE_ID[:-1]}-{_PARENT_ID}-01",
+                     f"00-{'z' * 32}-{_PARENT_ID}-01", f"00-{'0' * 32}-{_PARENT_ID}-01", f"00-{_TRACE_ID}-{'0' * 16}-01",
+                     f"00-{_TRACE_ID}-{_PARENT_ID}-xx"]
+        always, _ = _tracer(sample_rate=1.0)
+        never, _ = _tracer(sample_rate=0.0)
+        for header in malformed:
+            with self.subTest(header=header):
+                root = always.start_trace("GET /users", header)
+                self.assertIsNone(root.parent_id)
+                self.assertNotEqual(root.trace_id, _TRACE_ID)
+                self.assertEqual(len(root.trace_id), 32)
+                self.assertIsNone(never.start_trace("GET /users", header))
+
+    def test_given_sample_rate_when_start_trace_then_sampled_below_rate(self):
+        # Arrange
+        tracer, _ = _tracer(sample_rate=0.25)
+        disabled, _ = _tracer(sample_rate=1.0)
+        disabled.enabled = False
+
+        # Act
+        with patch("app.utils.tracing.random.random", side_effect=[0.1, 0.25, 0.9]):
+            decisions = [tracer.start_trace("GET /users") is not None for _ in range(3)]
+
+        # Assert
+        self.assertEqual(decisions, [True, False, False])
+        self.assertIsNone(disabled.start_trace("GET /users", f"00-{_TRACE_ID}-{_PARENT_ID}-01"))
+
+    async def test_given_full_queue_when_span_ends_then_dropped_and_rest_flushed_on_stop(self):
+        # Arrange
+        tracer, exporter = _tracer(batch_size=2, max_queue_size=5)
+        await tracer.start()
+
+        # Act
+        for i in range(7):
+            tracer.end(Span(f"span-{i}", _TRACE_ID))
+        await tracer.stop()
+
+        # Assert
+        self.assertEqual(tracer.processor.dropped, 2)
+        self.assertEqual([span.name for span in exporter.spans], [f"span-{i}" for i in range(5)])
+        self.assertTrue(all(len(batch) <= 2 for batch in exporter.batches))
+        self.assertEqual(exporter.shutdown_calls, 1)
+
+    async def test_given_current_span_when_mongo_command_then_client_span_recorded(self):
+        # Arrange
+        tracer, exporter = _tracer()
+        listener = TracingCommandListener()
+        root = Span("GET /users", _TRACE_ID)
+
+        # Act
+        with patch.object(tracing, "tracer", tracer):
+            listener.started(_command_event("find", 1))
+            token = tracing.activate(root)
+            try:
+                listener.started(_command_event("find", 2))
+                listener.started(_command_event("insert", 3))
+            finally:
+                tracing.deactivate(token)
+            listener.succeeded(_command_event("find", 2))
+            listener.failed(_command_event("insert", 3, failure={"errmsg": "dup"}))
+            listener.succeeded(_command_event("find", 1))
+        await tracer.processor.flush()
+
+        # Assert
+        find, insert = exporter.spans
+        self.assertEqual((find.name, find.kind, find.parent_id, find.trace_id), ("mongo.find", "client", root.span_id,
+                                                                               _TRACE_ID))
+        self.assertEqual(find.attributes["db.mongodb.collection"], "app_user")
+        self.assertEqual(find.end_ns - find.start_ns, 1_500_000)
+        self.assertIsNone(find.error)
+        self.assertEqual(insert.error, "{'errmsg': 'dup'}")
+
+    def test_given_current_span_when_log_then_record_has_trace_ids(self):
+        # Arrange
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logger = logging.getLogger("test.tracing.records")
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        previous_factory = logging.getLogRecordFactory()
+        root = Span("GET /users", _TRACE_ID)
+
+        # Act
+        try:
+            tracing.install_log_record_factory()
+            logger.info("outside")
+            token = tracing.activate(root)
+            try:
+                logger.info("inside")
+            finally:
+                tracing.deactivate(token)
+        finally:
+            logging.setLogRecordFactory(previous_factory)
+            logger.removeHandler(handler)
+
+        # Assert
+        self.assertEqual([(record.trace_id, record.span_id) for record in records],
+                         [("-", "-"), (_TRACE_ID, root.span_id)])
+
+    async def test_given_sampled_request_when_middleware_then_propagated_and_trace_id_header(self):
+        # Arrange
+        tracer, exporter = _tracer(sample_rate=0.0)
+        seen = []
+        sent = []
+
+        async def app(scope, receive, send):
+            seen.append(tracing.current_span())
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/api/v1/users",
+                 "headers": [(b"traceparent", f"00-{_TRACE_ID}-{_PARENT_ID}-01".encode())]}
+
+        # Act
+        with patch.object(tracing, "tracer", tracer):
+            await TracingMiddleware(app)(scope, None, send)
+            await TracingMiddleware(app)({**scope, "headers": []}, None, send)
+        await tracer.processor.flush()
+
+        # Assert
+        root = exporter.spans[0]
+        self.assertEqual(len(exporter.spans), 1)
+        self.assertIs(seen[0], root)
+        self.assertIsNone(seen[1])
+        self.assertEqual((root.trace_id, root.parent_id), (_TRACE_ID, _PARENT_ID))
+        self.assertEqual(root.attributes["http.status_code"], 200)
+        self.assertIn((b"x-trace-id", _TRACE_ID.encode()), sent[0]["headers"])
+        self.assertNotIn(b"x-trace-id", [key for key, _ in sent[2]["headers"]])
+        self.assertIsNone(tracing.current_span())